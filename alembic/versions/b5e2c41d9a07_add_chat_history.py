@@ -0,0 +1,46 @@
+"""Add chat history
+
+Revision ID: b5e2c41d9a07
+Revises: 6734f5545579
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e2c41d9a07'
+down_revision: Union[str, Sequence[str], None] = '6734f5545579'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('role', sa.String(length=16), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('tokens', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_chat_messages_user_id_timestamp', 'chat_messages', ['user_id', 'timestamp'], unique=False)
+    op.create_table('chat_summaries',
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('through_message_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('chat_summaries')
+    op.drop_index('ix_chat_messages_user_id_timestamp', table_name='chat_messages')
+    op.drop_table('chat_messages')
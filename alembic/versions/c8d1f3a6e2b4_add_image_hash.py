@@ -0,0 +1,36 @@
+"""Add image hash to meals and health logs
+
+Revision ID: c8d1f3a6e2b4
+Revises: b5e2c41d9a07
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d1f3a6e2b4'
+down_revision: Union[str, Sequence[str], None] = 'b5e2c41d9a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('meals', sa.Column('image_hash', sa.BigInteger(), nullable=True))
+    op.create_index('ix_meals_user_id_image_hash', 'meals', ['user_id', 'image_hash'], unique=False)
+    op.add_column('health_logs', sa.Column('image_hash', sa.BigInteger(), nullable=True))
+    op.create_index('ix_health_logs_user_id_image_hash', 'health_logs', ['user_id', 'image_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_health_logs_user_id_image_hash', table_name='health_logs')
+    with op.batch_alter_table('health_logs') as batch_op:
+        batch_op.drop_column('image_hash')
+    op.drop_index('ix_meals_user_id_image_hash', table_name='meals')
+    with op.batch_alter_table('meals') as batch_op:
+        batch_op.drop_column('image_hash')
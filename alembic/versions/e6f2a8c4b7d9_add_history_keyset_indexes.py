@@ -0,0 +1,31 @@
+"""Add (user_id, timestamp, id) indexes for history pagination
+
+Revision ID: e6f2a8c4b7d9
+Revises: d4a7e9b1c3f5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f2a8c4b7d9'
+down_revision: Union[str, Sequence[str], None] = 'd4a7e9b1c3f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_meals_user_id_timestamp_id', 'meals', ['user_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_workouts_user_id_timestamp_id', 'workouts', ['user_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_health_logs_user_id_timestamp_id', 'health_logs', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_health_logs_user_id_timestamp_id', table_name='health_logs')
+    op.drop_index('ix_workouts_user_id_timestamp_id', table_name='workouts')
+    op.drop_index('ix_meals_user_id_timestamp_id', table_name='meals')
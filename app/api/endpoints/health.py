@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.pagination import Page, page_params, paginate
 from app.db.database import get_db
-from app.schemas.health import HealthLogCreate, HealthLogResponse, WeightHistoryItem
+from app.schemas.bulk import BULK_MAX_ITEMS, BulkCreateResponse
+from app.schemas.health import HealthLogBulkItem, HealthLogCreate, HealthLogResponse, WeightHistoryItem
 from app.services.health_service import HealthService
 
 router = APIRouter()
@@ -22,15 +26,35 @@ async def log_health_entry(
     )
     return HealthLogResponse.model_validate(created_entry)
 
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=status.HTTP_201_CREATED)
+async def log_health_entries(
+    entries: Annotated[list[HealthLogBulkItem], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+) -> BulkCreateResponse:
+    ids = await HealthService(db).log_health_entries([
+        {
+            "user_id": entry.user_id,
+            "category": entry.category,
+            "description": entry.description,
+            "data": entry.data,
+            "photo_url": entry.photo_url,
+            "timestamp": entry.timestamp,
+        }
+        for entry in entries
+    ])
+    return BulkCreateResponse(ids=ids)
+
 @router.get("/{user_id}", response_model=list[HealthLogResponse])
 async def get_health_history(
     user_id: int, 
+    response: Response,
     category: str | None = None,
+    page: Page = Depends(page_params),
     db: AsyncSession = Depends(get_db)
 ) -> list[HealthLogResponse]:
     service = HealthService(db)
-    entries = await service.get_health_entries(user_id, category)
-    return [HealthLogResponse.model_validate(item) for item in entries]
+    entries = await service.get_health_entries(user_id, category, limit=page.fetch, after=page.after)
+    return [HealthLogResponse.model_validate(item) for item in paginate(entries, page, response)]
 
 @router.get("/history/{user_id}", response_model=list[WeightHistoryItem])
 async def get_weight_history_endpoint(
@@ -0,0 +1,73 @@
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Form, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.uploads import image_upload
+from app.core.config import settings
+from app.core.hashed_image import HashedImage
+from app.db.database import get_db
+from app.schemas.job import JobResponse
+from app.services.job_service import FINISHED_STATUSES, JobService, JobTask
+from app.services.job_worker import JobWorkerPool, get_job_pool
+
+router = APIRouter()
+
+@router.post("/{task}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    task: JobTask,
+    image: HashedImage = Depends(image_upload),
+    user_id: int | None = Form(None),
+    db: AsyncSession = Depends(get_db),
+    pool: JobWorkerPool = Depends(get_job_pool),
+) -> JobResponse:
+    """Queues a photo analysis; with a user_id the result is also logged for that user"""
+    service = JobService(db)
+    if await service.queued_count() >= settings.JOB_MAX_QUEUED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis queue is full, try again shortly",
+            headers={"Retry-After": str(max(1, round(settings.JOB_POLL_INTERVAL_SECONDS * 5)))},
+        )
+    job = await service.enqueue(task, image, user_id)
+    pool.notify()
+    return JobResponse.model_validate(job)
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)) -> JobResponse:
+    job = await JobService(db).get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return JobResponse.model_validate(job)
+
+async def _read_job(pool: JobWorkerPool, job_id: int) -> JobResponse | None:
+    # A session per read: an open stream must not hold a connection (or a
+    # read transaction that holds up the workers' writes) for the whole job
+    async with pool.session_factory() as session:
+        job = await JobService(session).get_job(job_id)
+        return JobResponse.model_validate(job) if job is not None else None
+
+async def _job_events(pool: JobWorkerPool, job_id: int) -> AsyncIterator[str]:
+    last_status: str | None = None
+    while True:
+        response = await _read_job(pool, job_id)
+        if response is None:
+            return
+        if response.status != last_status:
+            yield f"event: status\ndata: {response.model_dump_json()}\n\n"
+            last_status = response.status
+        if response.status in FINISHED_STATUSES:
+            return
+        await pool.wait_finished(settings.JOB_POLL_INTERVAL_SECONDS)
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: int, pool: JobWorkerPool = Depends(get_job_pool)) -> StreamingResponse:
+    """Server-sent events: one per status change, ending once the job finishes"""
+    if await _read_job(pool, job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return StreamingResponse(
+        _job_events(pool, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
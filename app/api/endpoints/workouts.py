@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.pagination import Page, page_params, paginate
 from app.db.database import get_db
-from app.schemas.workout import WorkoutCreate, WorkoutResponse
+from app.schemas.bulk import BULK_MAX_ITEMS, BulkCreateResponse
+from app.schemas.workout import WorkoutBulkItem, WorkoutCreate, WorkoutResponse
 from app.services.workout_service import WorkoutService
 
 router = APIRouter()
@@ -23,11 +27,32 @@ async def create_workout(
     )
     return WorkoutResponse.model_validate(workout_model)
 
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_workouts(
+    workouts: Annotated[list[WorkoutBulkItem], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+) -> BulkCreateResponse:
+    ids = await WorkoutService(db).create_workouts([
+        {
+            "user_id": workout.user_id,
+            "description": workout.description,
+            "duration_minutes": workout.duration_minutes,
+            "intensity": workout.intensity,
+            "activity_type": workout.activity_type,
+            "metrics": workout.metrics,
+            "timestamp": workout.timestamp,
+        }
+        for workout in workouts
+    ])
+    return BulkCreateResponse(ids=ids)
+
 @router.get("/{user_id}", response_model=list[WorkoutResponse])
 async def get_workouts(
     user_id: int,
+    response: Response,
+    page: Page = Depends(page_params),
     db: AsyncSession = Depends(get_db),
 ) -> list[WorkoutResponse]:
     service = WorkoutService(db)
-    workouts = await service.get_workouts(user_id)
-    return [WorkoutResponse.model_validate(item) for item in workouts]
+    workouts = await service.get_workouts(user_id, limit=page.fetch, after=page.after)
+    return [WorkoutResponse.model_validate(item) for item in paginate(workouts, page, response)]
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Protocol, TypeVar
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy.orm import Mapped
+
+from app.core.config import settings
+from app.services.pagination import Cursor, InvalidCursorError
+
+# Set when there are older rows; pass it back as ?cursor= for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class _Row(Protocol):
+    timestamp: Mapped[datetime]
+    id: Mapped[int]
+
+
+RowT = TypeVar("RowT", bound=_Row)
+
+
+@dataclass(frozen=True)
+class Page:
+    limit: int
+    after: Cursor | None
+
+    @property
+    def fetch(self) -> int:
+        # One extra row tells whether another page follows
+        return self.limit + 1
+
+
+def page_params(
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: str | None = None,
+) -> Page:
+    try:
+        after = Cursor.decode(cursor) if cursor else None
+    except InvalidCursorError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from None
+    return Page(limit=limit, after=after)
+
+
+def paginate(rows: list[RowT], page: Page, response: Response) -> list[RowT]:
+    """Drops the extra row fetched past the page and sets X-Next-Cursor if there was one"""
+    if len(rows) <= page.limit:
+        return rows
+    rows = rows[:page.limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = Cursor(last.timestamp, last.id).encode()
+    return rows
@@ -1,50 +1,57 @@
-from fastapi import APIRouter, UploadFile, File, Depends
-from app.core.ai import ai_client
+import json
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, Response, status
+from fastapi.responses import StreamingResponse
+from app.core.ai import get_ai
+from app.core.ai_base import AIProvider, AIProviderError
 from app.core.ai_types import (
     ClassificationResult,
     FoodAnalysisResult,
     HealthAnalysisResult,
+    PhotoAnalysisResult,
     WorkoutAnalysisResult,
 )
+from app.core.hashed_image import HashedImage
+from app.api.pagination import Page, page_params, paginate
+from app.api.uploads import image_upload
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
+from app.schemas.bulk import BULK_MAX_ITEMS, BulkCreateResponse, UTCDateTime
 from app.services.meal_service import MealService
+from app.services.nutrition_service import NutritionService
 from app.services.chat_service import ChatService
 from pydantic import BaseModel
 
-from app.api.endpoints import workouts, stats, users, health
+from app.api.endpoints import workouts, stats, users, health, jobs
 
 router = APIRouter(prefix="/api")
 router.include_router(workouts.router, prefix="/workouts", tags=["workouts"])
 router.include_router(stats.router, prefix="/stats", tags=["stats"])
 router.include_router(users.router, prefix="/users", tags=["users"])
 router.include_router(health.router, prefix="/health", tags=["health"])
+router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 @router.post("/analyze/classify")
-async def classify_photo(file: UploadFile = File(...)) -> ClassificationResult:
-    content = await file.read()
-    # TODO: Add validation for mime type if needed
-    result = await ai_client.classify_photo(content)
-    return result
+async def classify_photo(image: HashedImage = Depends(image_upload), ai: AIProvider = Depends(get_ai)) -> ClassificationResult:
+    return await ai.classify_photo(image)
+
+@router.post("/analyze/auto")
+async def analyze_auto(image: HashedImage = Depends(image_upload), ai: AIProvider = Depends(get_ai)) -> PhotoAnalysisResult:
+    return await ai.classify_and_analyze(image)
 
 @router.post("/analyze/food")
-async def analyze_food(file: UploadFile = File(...)) -> FoodAnalysisResult:
-    content = await file.read()
-    result = await ai_client.analyze_food_image(content)
-    return result
+async def analyze_food(image: HashedImage = Depends(image_upload), ai: AIProvider = Depends(get_ai)) -> FoodAnalysisResult:
+    return await ai.analyze_food_image(image)
 
 @router.post("/analyze/workout")
-async def analyze_workout(file: UploadFile = File(...)) -> WorkoutAnalysisResult:
-    content = await file.read()
-    result = await ai_client.analyze_workout_image(content)
-    return result
+async def analyze_workout(image: HashedImage = Depends(image_upload), ai: AIProvider = Depends(get_ai)) -> WorkoutAnalysisResult:
+    return await ai.analyze_workout_image(image)
 
 @router.post("/analyze/health")
-async def analyze_health(file: UploadFile = File(...)) -> HealthAnalysisResult:
-    content = await file.read()
-    result = await ai_client.analyze_health_image(content)
-    result = await ai_client.analyze_health_image(content)
-    return result
+async def analyze_health(image: HashedImage = Depends(image_upload), ai: AIProvider = Depends(get_ai)) -> HealthAnalysisResult:
+    return await ai.analyze_health_image(image)
 
 class MealCreate(BaseModel):
     user_id: int
@@ -64,16 +71,100 @@ async def save_meal(meal: MealCreate, db: AsyncSession = Depends(get_db)):
         photo_url=meal.photo_url
     )
 
+class MealBulkItem(MealCreate):
+    # When the meal was eaten, for backfilled history; defaults to now
+    timestamp: UTCDateTime | None = None
+
+@router.post("/meals/bulk", status_code=status.HTTP_201_CREATED)
+async def save_meals(
+    meals: Annotated[list[MealBulkItem], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: AsyncSession = Depends(get_db),
+) -> BulkCreateResponse:
+    ids = await MealService(db).create_meals([
+        {
+            "user_id": meal.user_id,
+            "description": meal.description,
+            "calories": meal.calories,
+            "macros": meal.macros,
+            "photo_url": meal.photo_url,
+            "timestamp": meal.timestamp,
+        }
+        for meal in meals
+    ])
+    return BulkCreateResponse(ids=ids)
+
+class MealTextCreate(BaseModel):
+    user_id: int
+    text: str
+
+class MealTextResponse(BaseModel):
+    id: int
+    description: str
+    calories: float
+    macros: dict[str, int]
+    # Foods resolved from the local table, and the parts estimated by the model
+    matched: list[str]
+    estimated: list[str]
+
+@router.post("/meals/text")
+async def log_meal_text(
+    meal: MealTextCreate,
+    db: AsyncSession = Depends(get_db),
+    ai: AIProvider = Depends(get_ai),
+) -> MealTextResponse:
+    saved, analysis = await NutritionService(db, ai).log_meal_text(meal.user_id, meal.text)
+    return MealTextResponse(
+        id=saved.id,
+        description=analysis.result["description"],
+        calories=analysis.result["calories"],
+        macros=analysis.result["macros"],
+        matched=[entry.food.name for entry in analysis.resolved],
+        estimated=[item.text for item in analysis.unresolved],
+    )
+
 @router.get("/meals/{user_id}")
-async def get_meals(user_id: int, db: AsyncSession = Depends(get_db)):
+async def get_meals(
+    user_id: int,
+    response: Response,
+    page: Page = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+):
     service = MealService(db)
-    return await service.get_user_meals(user_id)
+    meals = await service.get_user_meals(user_id, limit=page.fetch, after=page.after)
+    return paginate(meals, page, response)
 
 class ChatRequest(BaseModel):
     user_id: int
     message: str
 
 @router.post("/chat")
-async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
-    service = ChatService(db, ai_client)
+async def chat(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    ai: AIProvider = Depends(get_ai),
+):
+    service = ChatService(db, ai)
     return await service.chat(request.user_id, request.message)
+
+async def _sse_events(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        async for chunk in chunks:
+            yield f"data: {json.dumps({'text': chunk})}\n\n"
+    except AIProviderError:
+        yield "event: error\ndata: {}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    ai: AIProvider = Depends(get_ai),
+) -> StreamingResponse:
+    service = ChatService(db, ai)
+    chunks = await service.chat_stream(request.user_id, request.message)
+    return StreamingResponse(
+        _sse_events(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,124 @@
+import hashlib
+
+from fastapi import File, HTTPException, UploadFile, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.hashed_image import HashedImage
+from app.core.images import detect_mime_type
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Room for the multipart boundary and part headers around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Starlette only names 413 HTTP_413_CONTENT_TOO_LARGE from 0.48, and FastAPI
+# accepts older releases
+CONTENT_TOO_LARGE = 413
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=CONTENT_TOO_LARGE,
+        detail=f"Upload is larger than {max_bytes} bytes",
+    )
+
+
+async def read_image(file: UploadFile, max_bytes: int) -> HashedImage:
+    """
+    Reads an uploaded image from its spooled file in chunks. Files over
+    max_bytes (413) or whose first bytes are not a supported image format
+    (415) are rejected before the rest is copied into memory, and the
+    SHA-256 cache keys use is computed chunk by chunk. The request body
+    itself is capped while it is received, by UploadLimitMiddleware.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    chunks: list[bytes] = []
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        if not chunks and detect_mime_type(chunk) is None:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        digest.update(chunk)
+        chunks.append(chunk)
+    if not chunks:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload is not a supported image (JPEG, PNG, WebP, HEIC, GIF or BMP)",
+        )
+
+    data = b"".join(chunks)
+    chunks.clear()
+    return HashedImage(data, digest.hexdigest())
+
+
+async def image_upload(file: UploadFile = File(...)) -> HashedImage:
+    return await read_image(file, settings.UPLOAD_MAX_BYTES)
+
+
+class UploadLimitMiddleware:
+    """
+    Answers 413 to uploads over the limit: at once when the declared
+    Content-Length is too large, otherwise as soon as the body received
+    passes it (chunked uploads declare no length), before the rest is
+    read or spooled to disk.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: tuple[str, ...]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not str(scope["path"]).startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        too_large = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            # The app's answer to a body cut short (a parse error) is replaced by the 413
+            if too_large and not started:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not too_large or started:
+                raise
+        if too_large and not started:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            status_code=CONTENT_TOO_LARGE,
+            content={"detail": f"Upload is larger than {self.max_bytes} bytes"},
+        )
+        await response(scope, receive, send)
+
+
+class _BodyTooLarge(Exception):
+    pass
@@ -5,16 +5,21 @@ from aiogram.enums import ParseMode
 from app.core.config import settings
 from app.bot.handlers import register_handlers
 
-bot = Bot(
-    token=settings.BOT_TOKEN.get_secret_value(),
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-)
 dp = Dispatcher()
 
 
+def create_bot() -> Bot:
+    if not settings.BOT_TOKEN:
+        raise ValueError("BOT_TOKEN is required to run the Telegram bot")
+    return Bot(
+        token=settings.BOT_TOKEN.get_secret_value(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+
+
 async def start_bot() -> None:
     register_handlers(dp)
-    await dp.start_polling(bot)  # pyright: ignore[reportUnknownMemberType]
+    await dp.start_polling(create_bot())  # pyright: ignore[reportUnknownMemberType]
 
 
 if __name__ == "__main__":
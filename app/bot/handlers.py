@@ -1,14 +1,56 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
 from aiogram import Dispatcher, Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
-from aiogram.filters import CommandStart
-from app.core.ai import ai_client
-from app.db import AsyncSessionLocal, User, Meal, Workout, HealthLog
+from aiogram.filters import Command, CommandObject, CommandStart
+from app.core.ai import get_ai
+from app.core.ai_base import AIRateLimitError, AITransientError, AIUnavailableError
+from app.core.ai_schema import AIResponseParseError
+from app.core.ai_types import PhotoAnalysisResult
+from app.core.images import dhash
+from app.db import AsyncSessionLocal, User
+from app.services.chat_service import ChatService
+from app.services.health_service import HealthService
+from app.services.meal_service import MealService
+from app.services.nutrition_service import NutritionService
+from app.services.photo_service import PhotoService
+from app.services.workout_service import WorkoutService
 from sqlalchemy import select
 
 router = Router()
 photo_storage: dict[int, bytes] = {}
 
 
+@dataclass
+class DuplicateOffer:
+    """A re-sent photo waiting for the user to reuse or redo its earlier analysis"""
+
+    image_data: bytes
+    image_hash: int
+    analysis: PhotoAnalysisResult
+
+
+duplicate_offers: dict[int, DuplicateOffer] = {}
+
+# Telegram throttles frequent edits of one message; stay around one per second
+STREAM_EDIT_INTERVAL = 1.0
+
+AI_UNAVAILABLE_TEXT = "🤖 AI-аналіз тимчасово недоступний, спробуй за хвилину"
+AI_BUSY_TEXT = "⏳ Забагато запитів, спробуй за хвилину"
+EMPTY_REPLY_TEXT = "😕 Не вдалося отримати відповідь, спробуй ще раз"
+
+
+def photo_type_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🍔 Їжа", callback_data="type:food")],
+        [InlineKeyboardButton(text="🏃 Тренування", callback_data="type:workout")],
+        [InlineKeyboardButton(text="⚖️ Здоров'я", callback_data="type:health")]
+    ])
+
+
 @router.message(CommandStart())
 async def cmd_start(message: Message) -> None:
     if message.from_user is None:
@@ -33,7 +75,8 @@ async def cmd_start(message: Message) -> None:
         "Я твій AI Health Architect. Надішли мені фото їжі, тренування або прогресу, "
         "і я все проаналізую!\n\n"
         "Доступні команди:\n"
-        "/start - Початок роботи"
+        "/start - Початок роботи\n"
+        "/meal - Записати їжу текстом, напр. /meal 2 яйця, тост і кава"
     )
 
 
@@ -52,6 +95,43 @@ async def cmd_webapp(message: Message) -> None:
     )
 
 
+@router.message(Command("meal"))
+async def cmd_meal(message: Message, command: CommandObject) -> None:
+    if message.from_user is None:
+        return
+    if not command.args:
+        await message.answer("🍽 Напиши, що ти з'їв: /meal 2 яйця, тост і кава")
+        return
+
+    try:
+        async with AsyncSessionLocal() as session:
+            _, analysis = await NutritionService(session, get_ai()).log_meal_text(message.from_user.id, command.args)
+    except AIResponseParseError:
+        await message.answer("😕 Не вдалося розпізнати страву, спробуй описати інакше")
+        return
+    except AIRateLimitError:
+        await message.answer(AI_BUSY_TEXT)
+        return
+    except (AIUnavailableError, AITransientError):
+        await message.answer(AI_UNAVAILABLE_TEXT)
+        return
+
+    result = analysis.result
+    skipped = ""
+    if analysis.unresolved and not analysis.used_model:
+        skipped = "\n\n⚠️ Без оцінки: " + ", ".join(item.text for item in analysis.unresolved)
+    await message.answer(
+        f"✅ <b>Прийом їжі записано!</b>\n\n"
+        f"📝 <b>Опис:</b> {result['description']}\n"
+        f"🔥 <b>Калорії:</b> {result['calories']} kcal\n\n"
+        f"<b>Макронутрієнти:</b>\n"
+        f"🥩 Білки: {result['macros']['protein']}g\n"
+        f"🍞 Вуглеводи: {result['macros']['carbs']}g\n"
+        f"🥑 Жири: {result['macros']['fat']}g"
+        f"{skipped}"
+    )
+
+
 @router.message(F.photo)
 async def handle_photo(message: Message) -> None:
     if message.from_user is None or message.bot is None:
@@ -59,8 +139,6 @@ async def handle_photo(message: Message) -> None:
     if not message.photo:
         return
 
-    await message.answer("🔍 Аналізую фото...")
-    
     photo = message.photo[-1]
     file = await message.bot.get_file(photo.file_id)
     if file.file_path is None:
@@ -69,25 +147,94 @@ async def handle_photo(message: Message) -> None:
     if photo_bytes is None:
         return
     image_data = photo_bytes.read()
+    image_hash = await asyncio.to_thread(dhash, image_data)
+
+    if image_hash is not None:
+        async with AsyncSessionLocal() as session:
+            match = await PhotoService(session).find_duplicate(message.from_user.id, image_hash)
+        if match is not None:
+            duplicate_offers[message.from_user.id] = DuplicateOffer(image_data, image_hash, match.analysis)
+            keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="♻️ Записати ще раз", callback_data="dup:reuse")],
+                [InlineKeyboardButton(text="🔍 Проаналізувати заново", callback_data="dup:analyze")],
+            ])
+            await message.answer(
+                f"🔁 Схоже, це фото вже було о {match.timestamp:%H:%M} "
+                f"({describe_analysis(match.analysis)}).\n\n"
+                "Записати ще раз з тим самим аналізом?",
+                reply_markup=keyboard
+            )
+            return
+
+    await analyze_photo(message.from_user.id, image_data, image_hash, message)
+
+
+async def analyze_photo(user_id: int, image_data: bytes, image_hash: int | None, message: Message) -> None:
+    await message.answer("🔍 Аналізую фото...")
+
+    try:
+        analysis = await get_ai().classify_and_analyze(image_data)
+    except AIResponseParseError:
+        await message.answer("😕 Не вдалося розпізнати фото, спробуй надіслати ще раз")
+        return
+    except AIRateLimitError:
+        await message.answer(AI_BUSY_TEXT)
+        return
+    except (AIUnavailableError, AITransientError):
+        # Degrade to manual classification rather than keep the user waiting
+        photo_storage[user_id] = image_data
+        await message.answer(
+            "🤖 AI-аналіз зараз недоступний.\n\nПідкажи, що це за фото?",
+            reply_markup=photo_type_keyboard()
+        )
+        return
     
-    classification = await ai_client.classify_photo(image_data)
-    
-    if classification["confidence"] == "low":
-        photo_storage[message.from_user.id] = image_data
-        
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🍔 Їжа", callback_data="type:food")],
-            [InlineKeyboardButton(text="🏃 Тренування", callback_data="type:workout")],
-            [InlineKeyboardButton(text="⚖️ Здоров'я", callback_data="type:health")]
-        ])
+    if analysis["confidence"] == "low":
+        photo_storage[user_id] = image_data
         
         await message.answer(
-            f"🤔 Я не зовсім впевнений ({classification['reasoning']})\n\n"
+            f"🤔 Я не зовсім впевнений ({analysis['reasoning']})\n\n"
             "Підкажи, що це за фото?",
-            reply_markup=keyboard
+            reply_markup=photo_type_keyboard()
+        )
+    else:
+        await process_photo(user_id, image_data, analysis["type"], message, analysis, image_hash)
+
+
+def describe_analysis(analysis: PhotoAnalysisResult) -> str:
+    if analysis["food"] is not None:
+        return f"{analysis['food']['description']}, {analysis['food']['calories']:.0f} kcal"
+    if analysis["health"] is not None:
+        return analysis["health"]["description"] or analysis["health"]["category"]
+    return analysis["type"]
+
+
+@router.callback_query(F.data.startswith("dup:"))
+async def handle_duplicate_choice(callback: CallbackQuery) -> None:
+    if callback.data is None:
+        return
+
+    offer = duplicate_offers.pop(callback.from_user.id, None)
+    if offer is None:
+        await callback.answer("Фото не знайдено, спробуй ще раз")
+        return
+
+    await callback.answer()
+    if not isinstance(callback.message, Message):
+        return
+
+    if callback.data == "dup:reuse":
+        await callback.message.edit_text("✅ Записую з попереднім аналізом...")
+        await process_photo(
+            callback.from_user.id,
+            offer.image_data,
+            offer.analysis["type"],
+            callback.message,
+            offer.analysis,
+            offer.image_hash,
         )
     else:
-        await process_photo(message.from_user.id, image_data, classification["type"], message)
+        await analyze_photo(callback.from_user.id, offer.image_data, offer.image_hash, callback.message)
 
 
 @router.callback_query(F.data.startswith("type:"))
@@ -111,19 +258,37 @@ async def handle_type_selection(callback: CallbackQuery) -> None:
     del photo_storage[callback.from_user.id]
 
 
-async def process_photo(user_id: int, image_data: bytes, photo_type: str, message: Message) -> None:
+async def process_photo(
+    user_id: int,
+    image_data: bytes,
+    photo_type: str,
+    message: Message,
+    analysis: PhotoAnalysisResult | None = None,
+    image_hash: int | None = None,
+) -> None:
+    if image_hash is None:
+        image_hash = await asyncio.to_thread(dhash, image_data)
+
     if photo_type == "food":
-        result = await ai_client.analyze_food_image(image_data)
+        result = analysis["food"] if analysis else None
+        if result is None:
+            try:
+                result = await get_ai().analyze_food_image(image_data)
+            except (AIUnavailableError, AITransientError):
+                await message.answer(
+                    "🤖 Аналіз фото їжі зараз недоступний.\n\n"
+                    "Опиши страву текстом: /meal 2 яйця, тост і кава"
+                )
+                return
         
         async with AsyncSessionLocal() as session:
-            meal = Meal(
+            await MealService(session).create_meal(
                 user_id=user_id,
                 description=result["description"],
                 calories=result["calories"],
-                macros=result["macros"]
+                macros=result["macros"],
+                image_hash=image_hash,
             )
-            session.add(meal)
-            await session.commit()
         
         response = (
             f"✅ <b>Аналіз їжі завершено!</b>\n\n"
@@ -136,38 +301,103 @@ async def process_photo(user_id: int, image_data: bytes, photo_type: str, messag
         )
     
     elif photo_type == "workout":
+        workout_result = analysis["workout"] if analysis else None
         async with AsyncSessionLocal() as session:
-            workout = Workout(
-                user_id=user_id,
-                description="Workout from photo",
-                duration_minutes=30
-            )
-            session.add(workout)
-            await session.commit()
+            service = WorkoutService(session)
+            if workout_result is None:
+                await service.create_workout(
+                    user_id=user_id,
+                    description="Workout from photo",
+                    duration_minutes=30
+                )
+            else:
+                await service.create_workout(
+                    user_id=user_id,
+                    description=f"{workout_result['activity']} from photo",
+                    duration_minutes=workout_result["duration_minutes"] or 30,
+                    activity_type=workout_result["activity"],
+                    metrics={
+                        **workout_result["metrics"],
+                        "distance_km": workout_result["distance_km"],
+                        "calories": workout_result["calories"],
+                    },
+                )
         
         response = "✅ <b>Тренування зареєстровано!</b>\n\nПродовжуй у тому ж дусі! 💪"
     
     else:
+        health_result = analysis["health"] if analysis else None
         async with AsyncSessionLocal() as session:
-            health_log = HealthLog(
-                user_id=user_id,
-                category="progress_photo",
-                description="Health tracking photo"
-            )
-            session.add(health_log)
-            await session.commit()
+            service = HealthService(session)
+            if health_result is None:
+                await service.log_health_entry(
+                    user_id=user_id,
+                    category="progress_photo",
+                    description="Health tracking photo",
+                    image_hash=image_hash,
+                )
+            else:
+                await service.log_health_entry(
+                    user_id=user_id,
+                    category=health_result["category"],
+                    description=health_result["description"] or "Health tracking photo",
+                    data=health_result["data"] or None,
+                    image_hash=image_hash,
+                )
         
         response = "✅ <b>Прогрес зафіксовано!</b>\n\nСтавай кращою версією себе! 🌟"
     
     await message.answer(response)
 
 
+async def stream_reply(
+    message: Message,
+    chunks: AsyncIterator[str],
+    edit_interval: float = STREAM_EDIT_INTERVAL,
+) -> str:
+    """
+    Sends a placeholder reply and grows it with edit_text as chunks arrive,
+    editing at most once per edit_interval.
+
+    When the provider fails or answers nothing, the placeholder is edited
+    into the notice (after whatever part of the answer arrived) rather
+    than left in the chat next to a second message.
+    """
+    reply = await message.answer("…")
+    text = ""
+    shown = ""
+    last_edit = time.monotonic()
+    
+    notice = ""
+    try:
+        async for chunk in chunks:
+            text += chunk
+            now = time.monotonic()
+            if now - last_edit >= edit_interval and text.strip() and text != shown:
+                await reply.edit_text(text)
+                shown = text
+                last_edit = now
+    except AIRateLimitError:
+        notice = AI_BUSY_TEXT
+    except (AIUnavailableError, AITransientError):
+        notice = AI_UNAVAILABLE_TEXT
+
+    if notice:
+        await reply.edit_text(f"{text.strip()}\n\n{notice}" if text.strip() else notice)
+    elif not text.strip():
+        await reply.edit_text(EMPTY_REPLY_TEXT)
+    elif text != shown:
+        await reply.edit_text(text)
+    return text
+
+
 @router.message(F.text & ~F.text.startswith("/"))
 async def handle_text(message: Message) -> None:
-    if message.text is None:
+    if message.text is None or message.from_user is None:
         return
-    response = await ai_client.chat(message.text)
-    await message.answer(response)
+    async with AsyncSessionLocal() as session:
+        chunks = await ChatService(session, get_ai()).chat_stream(message.from_user.id, message.text)
+    await stream_reply(message, chunks)
 
 
 def register_handlers(dp: Dispatcher) -> None:
@@ -1,25 +1,184 @@
+import threading
+
 from app.core.config import settings
 from app.core.ai_base import AIProvider
+from app.core.ai_cache import AnalysisCache, CachedAIProvider
+from app.core.ai_chat_cache import CachedChatAIProvider, ChatAnswerCache
+from app.core.ai_deadline import DeadlineAIProvider
+from app.core.ai_hedge import HedgedAIProvider
+from app.core.ai_ratelimit import AdaptiveConcurrency, RateLimitedAIProvider, TokenBucket
+from app.core.ai_singleflight import SingleFlight, SingleFlightAIProvider
+from app.core.ai_tiers import TieredAIProvider
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.metrics import metrics, stats_collector
 
 
-def get_ai_client() -> AIProvider:
+def get_ai_client(provider_name: str | None = None, model: str | None = None) -> AIProvider:
     """
     Factory function to get the configured AI provider.
     
+    Args:
+        provider_name: Provider to build, defaults to settings.AI_PROVIDER
+        model: Model to use, defaults to the provider's configured model
+    
     Returns:
-        AIProvider instance (GeminiAI for now)
+        AIProvider instance
     """
-    if settings.AI_PROVIDER == "gemini":
+    provider_name = provider_name or settings.AI_PROVIDER
+    if provider_name == "gemini":
         from app.core.ai_gemini import GeminiAI
-        return GeminiAI()
-    elif settings.AI_PROVIDER == "openai":
+        return GeminiAI(model=model)
+    elif provider_name == "openai":
         from app.core.ai_openai import OpenAIProvider
-        return OpenAIProvider()
+        return OpenAIProvider(model=model)
+    elif provider_name == "mock":
+        from app.core.ai_mock import MockAIProvider
+        return MockAIProvider()
     else:
         raise ValueError(
-            f"Unknown AI provider: {settings.AI_PROVIDER}. "
-            "Must be 'gemini' or 'openai'"
+            f"Unknown AI provider: {provider_name}. "
+            "Must be 'gemini', 'openai' or 'mock'"
+        )
+
+
+def get_fast_ai_client(provider_name: str | None = None) -> AIProvider | None:
+    """The provider's fast-tier model, if tier routing is on and one is configured"""
+    provider_name = provider_name or settings.AI_PROVIDER
+    fast_models = {"gemini": settings.GEMINI_FAST_MODEL, "openai": settings.OPENAI_FAST_MODEL}
+    model = fast_models.get(provider_name)
+    if not settings.AI_TIER_ROUTING_ENABLED or not model:
+        return None
+    return get_ai_client(provider_name, model=model)
+
+
+def with_rate_limit(provider: AIProvider) -> RateLimitedAIProvider:
+    """
+    Paces a provider according to its own quota settings.
+    """
+    return RateLimitedAIProvider(
+        provider,
+        TokenBucket(provider.requests_per_second, settings.AI_RATE_LIMIT_BURST),
+        AdaptiveConcurrency(
+            initial=provider.max_concurrency,
+            maximum=max(provider.max_concurrency, settings.AI_ADAPTIVE_CONCURRENCY_MAX),
+        ),
+        max_retries=settings.AI_MAX_RETRIES,
+        backoff_base=settings.AI_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.AI_BACKOFF_MAX_SECONDS,
+    )
+
+
+def with_provider_layers(provider: AIProvider) -> AIProvider:
+    """
+    Applies the per-provider layers: instrumentation right on the provider,
+    so its metrics see each attempt, then the rate limiter.
+    """
+    if settings.AI_METRICS_ENABLED:
+        from app.core.ai_instrument import InstrumentedAIProvider
+        provider = InstrumentedAIProvider(provider)
+    if settings.AI_RATE_LIMIT_ENABLED:
+        limited = with_rate_limit(provider)
+        metrics.add_collector(stats_collector("ai_ratelimit", limited.stats, {"model": provider.model_name}))
+        provider = limited
+    return provider
+
+
+def build_ai_client(provider: AIProvider, fast: AIProvider | None = None) -> AIProvider:
+    """
+    Wraps a provider with the layers enabled in settings.
+
+    Layers are applied innermost first, so the cache sees the raw upload
+    and a hit skips preprocessing as well as the model call. The chat
+    answer cache is outermost, so a repeated question skips every layer. The rate
+    limiter sits directly on each provider so retries do not redo preprocessing,
+    and a hedged secondary provider gets its own limiter.
+
+    With a fast model the provider is tier-routed: each model gets its own
+    limiter, and the hedged secondary backs up both tiers.
+
+    Deadlines wrap everything that talks to a provider (retries, hedging,
+    escalation), so a hung provider costs a caller at most the task's
+    deadline, and once its circuit opens, nothing.
+
+    The API and the bot both build their client here, so every handler in
+    a process shares one limiter per provider. Each layer's stats are
+    registered with the metrics registry as it is built.
+    """
+    provider = with_provider_layers(provider)
+    if fast is not None:
+        tiered = TieredAIProvider(with_provider_layers(fast), provider, settings.AI_TASK_TIERS)
+        metrics.add_collector(stats_collector("ai_tier", tiered.stats))
+        provider = tiered
+    if settings.AI_SECONDARY_PROVIDER:
+        secondary = with_provider_layers(get_ai_client(settings.AI_SECONDARY_PROVIDER))
+        hedged = HedgedAIProvider(
+            provider,
+            secondary,
+            hedge_delay=settings.AI_HEDGE_DELAY_SECONDS,
+            failure_threshold=settings.AI_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.AI_CIRCUIT_RESET_SECONDS,
+        )
+        metrics.add_collector(stats_collector("ai_hedge", hedged.stats))
+        provider = hedged
+    if settings.AI_DEADLINES_ENABLED:
+        bounded = DeadlineAIProvider(
+            provider,
+            settings.AI_TASK_DEADLINES,
+            default_deadline=settings.AI_DEADLINE_DEFAULT_SECONDS,
+            breaker=CircuitBreaker(settings.AI_CIRCUIT_FAILURE_THRESHOLD, settings.AI_CIRCUIT_RESET_SECONDS),
+        )
+        metrics.add_collector(stats_collector("ai_deadline", bounded.stats))
+        provider = bounded
+    if settings.IMAGE_PREPROCESS_ENABLED:
+        from app.core.ai_preprocess import PreprocessingAIProvider
+        from app.core.images import ImagePreprocessor
+        preprocessor = ImagePreprocessor(
+            max_edge=settings.IMAGE_MAX_EDGE,
+            quality=settings.IMAGE_JPEG_QUALITY,
+            workers=settings.IMAGE_PREPROCESS_WORKERS,
         )
+        provider = PreprocessingAIProvider(provider, preprocessor)
+    if settings.AI_SINGLEFLIGHT_ENABLED:
+        flights = SingleFlight()
+        metrics.add_collector(stats_collector("ai_singleflight", flights.stats))
+        provider = SingleFlightAIProvider(provider, flights)
+    if settings.AI_CACHE_ENABLED:
+        cache = AnalysisCache(
+            max_memory_entries=settings.AI_CACHE_MEMORY_ENTRIES,
+            max_memory_bytes=settings.AI_CACHE_MEMORY_BYTES,
+            db_path=settings.AI_CACHE_DB_PATH,
+            max_db_bytes=settings.AI_CACHE_DB_MAX_BYTES,
+        )
+        metrics.add_collector(stats_collector("ai_cache", cache.stats))
+        provider = CachedAIProvider(provider, cache)
+    if settings.AI_CHAT_CACHE_ENABLED:
+        answers = ChatAnswerCache(
+            max_entries=settings.AI_CHAT_CACHE_ENTRIES,
+            ttl=settings.AI_CHAT_CACHE_TTL_SECONDS,
+            threshold=settings.AI_CHAT_CACHE_SIMILARITY,
+        )
+        metrics.add_collector(stats_collector("ai_chat_cache", answers.stats))
+        provider = CachedChatAIProvider(provider, answers, min_chars=settings.AI_CHAT_CACHE_MIN_CHARS)
+    return provider
+
+
+_ai_client: AIProvider | None = None
+_ai_client_lock = threading.Lock()
 
 
-ai_client = get_ai_client()
+def get_ai() -> AIProvider:
+    """
+    Returns the process-wide AI client, building it on first use.
+
+    Provider SDKs (google-genai, openai) are only imported here, so importing
+    the API or the bot stays cheap and a process that never calls the model
+    never pays for them. FastAPI resolves this sync dependency in its thread
+    pool, so the first build does not stall the event loop; the lock keeps
+    concurrent first requests from building two clients.
+    """
+    global _ai_client
+    if _ai_client is None:
+        with _ai_client_lock:
+            if _ai_client is None:
+                _ai_client = build_ai_client(get_ai_client(), get_fast_ai_client())
+    return _ai_client
@@ -1,16 +1,59 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 
 from app.core.ai_types import (
     ClassificationResult,
     FoodAnalysisResult,
     HealthAnalysisResult,
+    PhotoAnalysisResult,
     WorkoutAnalysisResult,
 )
 
 
+class AIProviderError(Exception):
+    """Provider-neutral failure raised by AIProvider implementations"""
+
+
+class AIRateLimitError(AIProviderError):
+    """The provider throttled the request (HTTP 429 or equivalent)"""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AITransientError(AIProviderError):
+    """A failure worth retrying: 5xx responses, dropped connections, timeouts"""
+
+
+class AIUnavailableError(AIProviderError):
+    """No provider can take the request right now (e.g. every circuit is open)"""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AITimeoutError(AIUnavailableError):
+    """The provider did not answer within the task's deadline"""
+
+
+# Failures that say a provider is unhealthy and count against its circuit
+# breaker; anything else (an unreadable answer, a rejected request) means
+# it did respond
+PROVIDER_FAILURES = (AITransientError, AIRateLimitError, AITimeoutError)
+
+
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
 
+    model_name: str = "unknown"
+    # Bump when prompts change so cached results from older prompts are not reused
+    prompt_version: str = "1"
+    # Provider quota, used to size the rate limiter (0 disables the token bucket)
+    requests_per_second: float = 0.0
+    max_concurrency: int = 8
+
     @abstractmethod
     async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
         pass
@@ -19,6 +62,11 @@ class AIProvider(ABC):
     async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
         pass
 
+    @abstractmethod
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        """Estimates nutrition for a meal described in words"""
+        pass
+
     @abstractmethod
     async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
         pass
@@ -30,3 +78,95 @@ class AIProvider(ABC):
     @abstractmethod
     async def chat(self, user_message: str, context: str | None = None) -> str:
         pass
+
+    @abstractmethod
+    async def summarize(self, prompt: str) -> str:
+        """
+        Answers a summarization prompt as plain text: without the chat
+        persona, and never from a cache shared between users.
+        """
+        pass
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        """
+        Yields the chat answer in chunks as they are generated.
+
+        Providers with a streaming API override this; the default yields
+        the complete chat() answer as a single chunk.
+        """
+        yield await self.chat(user_message, context)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        """
+        Classifies a photo and extracts the category-specific data.
+
+        Providers that can do both in a single request override this; the
+        default is the two-step path (classify, then the matching analyze_*).
+        Low-confidence photos are not analyzed, the caller asks the user instead.
+        """
+        classification = await self.classify_photo(image_bytes)
+        result: PhotoAnalysisResult = {
+            **classification,
+            "food": None,
+            "workout": None,
+            "health": None,
+        }
+        if classification["confidence"] != "low":
+            await self.fill_analysis(result, image_bytes)
+        return result
+
+    async def complete_analysis(self, result: PhotoAnalysisResult, image_bytes: bytes) -> PhotoAnalysisResult:
+        """Falls back to the dedicated analyze_* call when a single-call answer skipped the details"""
+        if result["confidence"] == "low" or result["type"] == "other":
+            return result
+        if result[result["type"]] is None:
+            await self.fill_analysis(result, image_bytes)
+        return result
+
+    async def fill_analysis(self, result: PhotoAnalysisResult, image_bytes: bytes) -> None:
+        """Runs the analyze_* call matching result["type"] and stores its output"""
+        if result["type"] == "food":
+            result["food"] = await self.analyze_food_image(image_bytes)
+        elif result["type"] == "workout":
+            result["workout"] = await self.analyze_workout_image(image_bytes)
+        elif result["type"] == "health":
+            result["health"] = await self.analyze_health_image(image_bytes)
+
+
+class DelegatingAIProvider(AIProvider):
+    """Base for wrappers that add behaviour around another provider"""
+
+    def __init__(self, inner: AIProvider):
+        self.inner = inner
+        self.model_name = inner.model_name
+        self.prompt_version = inner.prompt_version
+        self.requests_per_second = inner.requests_per_second
+        self.max_concurrency = inner.max_concurrency
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self.inner.classify_photo(image_bytes)
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self.inner.analyze_food_image(image_bytes)
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self.inner.analyze_food_text(description)
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self.inner.analyze_workout_image(image_bytes)
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self.inner.analyze_health_image(image_bytes)
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        return await self.inner.chat(user_message, context)
+
+    async def summarize(self, prompt: str) -> str:
+        return await self.inner.summarize(prompt)
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        async for chunk in self.inner.chat_stream(user_message, context):
+            yield chunk
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self.inner.classify_and_analyze(image_bytes)
@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar, cast
+
+from app.core.ai_base import AIProvider, DelegatingAIProvider
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+from app.core.hashed_image import HashedImage
+
+T = TypeVar("T")
+
+
+def image_digest(image_bytes: bytes) -> str:
+    # Uploads are hashed while they stream in; reuse that digest
+    if isinstance(image_bytes, HashedImage):
+        return image_bytes.sha256
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier result cache: a bounded in-memory LRU in front of a
+    size-capped SQLite table that survives restarts.
+
+    Values are stored as JSON text, so every hit returns a fresh copy
+    and entry sizes are known for byte-based eviction. SQLite work runs
+    on a single dedicated thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        max_memory_entries: int = 1024,
+        max_memory_bytes: int = 16 * 1024 * 1024,
+        db_path: str | None = None,
+        max_db_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.db_path = db_path
+        self.max_db_bytes = max_db_bytes
+
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._memory_bytes = 0
+        self._db: sqlite3.Connection | None = None
+        self._db_bytes = 0
+        self._disk: ThreadPoolExecutor | None = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._db_bytes,
+        }
+
+    async def get(self, key: str) -> Any | None:
+        raw = self._memory.get(key)
+        if raw is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return json.loads(raw)
+
+        if self.db_path is not None:
+            raw = await self._on_disk(lambda: self._read(key))
+            if raw is not None:
+                self._remember(key, raw)
+                self.disk_hits += 1
+                return json.loads(raw)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        raw = json.dumps(value, separators=(",", ":"))
+        self._remember(key, raw)
+
+        if self.db_path is None or len(raw.encode()) > self.max_db_bytes:
+            return
+        self.evictions += await self._on_disk(lambda: self._write(key, raw))
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.shutdown(wait=True)
+            self._disk = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _on_disk(self, call: Callable[[], T]) -> T:
+        # One thread, so the connection is never used by two threads at once
+        if self._disk is None:
+            self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-cache")
+        return await asyncio.get_running_loop().run_in_executor(self._disk, call)
+
+    def _read(self, key: str) -> str | None:
+        db = self._connect()
+        row = db.execute("SELECT value FROM ai_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        db.execute("UPDATE ai_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        db.commit()
+        return cast(str, row[0])
+
+    def _write(self, key: str, raw: str) -> int:
+        db = self._connect()
+        size = len(raw.encode())
+        previous = db.execute("SELECT size FROM ai_cache WHERE key = ?", (key,)).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO ai_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, raw, size, time.time()),
+        )
+        self._db_bytes += size - (cast(int, previous[0]) if previous else 0)
+        evicted = self._evict_disk(db)
+        db.commit()
+        return evicted
+
+    def _remember(self, key: str, raw: str) -> None:
+        size = len(raw)
+        if size > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = raw
+        self._memory_bytes += size
+
+        while len(self._memory) > self.max_memory_entries or self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _evict_disk(self, db: sqlite3.Connection) -> int:
+        evicted = 0
+        while self._db_bytes > self.max_db_bytes:
+            rows = db.execute(
+                "SELECT key, size FROM ai_cache ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._db_bytes = 0
+                break
+            for key, size in rows:
+                if self._db_bytes <= self.max_db_bytes:
+                    break
+                db.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                self._db_bytes -= cast(int, size)
+                evicted += 1
+        return evicted
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so importing the app never touches the filesystem
+        assert self.db_path is not None
+        if self._db is None:
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS ix_ai_cache_last_access ON ai_cache (last_access)")
+            self._db_bytes = cast(int, db.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0])
+            self._db = db
+        return self._db
+
+
+class CachedAIProvider(DelegatingAIProvider):
+    """Serves repeated image analyses from an AnalysisCache"""
+
+    def __init__(self, inner: AIProvider, cache: AnalysisCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    def cache_key(self, task: str, image_bytes: bytes) -> str:
+        return f"{task}:{self.model_name}:{self.prompt_version}:{image_digest(image_bytes)}"
+
+    async def _cached(self, task: str, image_bytes: bytes, call: Callable[[bytes], Awaitable[T]]) -> T:
+        key = self.cache_key(task, image_bytes)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cast(T, cached)
+        result = await call(image_bytes)
+        await self.cache.set(key, result)
+        return result
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._cached("classify", image_bytes, self.inner.classify_photo)
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._cached("food", image_bytes, self.inner.analyze_food_image)
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self._cached(
+            "food_text", description.encode(), lambda data: self.inner.analyze_food_text(data.decode())
+        )
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._cached("workout", image_bytes, self.inner.analyze_workout_image)
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._cached("health", image_bytes, self.inner.analyze_health_image)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._cached("auto", image_bytes, self.inner.classify_and_analyze)
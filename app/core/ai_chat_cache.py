@@ -0,0 +1,279 @@
+import hashlib
+import random
+import re
+import time
+from collections import Counter, OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from app.core.ai_base import AIProvider, DelegatingAIProvider
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"[^\w\s]+")
+# Near-duplicate candidates compared in full per lookup
+MAX_CANDIDATES = 8
+# Words that tie a question to the conversation ("is that enough?") or to
+# the user's logs ("did I eat enough today?"), in English and Ukrainian
+_CONTEXTUAL_WORDS = frozenset({
+    "it", "its", "this", "that", "these", "those", "they", "them", "there",
+    "too", "else", "again", "previous", "recent",
+    "today", "tonight", "yesterday", "tomorrow", "week", "did", "ate", "eaten", "logged",
+    "це", "цей", "ця", "ці", "той", "те", "ті", "воно", "вони", "їх", "його", "її",
+    "теж", "також", "знову", "сьогодні", "вчора", "завтра", "тиждень", "їв", "їла",
+})
+# Openers of a follow-up ("and for dinner?")
+_FOLLOW_UP_OPENERS = frozenset({"and", "but", "so", "then", "also", "а", "і", "й", "та", "ще", "тоді"})
+
+
+def normalize_question(text: str) -> str:
+    """Lowercases, drops punctuation and collapses whitespace"""
+    return " ".join(_WORD.sub(" ", text.lower()).split())
+
+
+def is_standalone(message: str, min_chars: int = 12) -> bool:
+    """
+    Whether a question can be answered from the user's profile alone: long
+    enough to stand on its own ("why?" is not) and with no words pointing
+    back at the conversation or at logged meals and days.
+    """
+    words = normalize_question(message).split()
+    if not words or len(" ".join(words)) < min_chars or words[0] in _FOLLOW_UP_OPENERS:
+        return False
+    return _CONTEXTUAL_WORDS.isdisjoint(words)
+
+
+def context_fingerprint(context: str | None) -> str:
+    """Hashes the chat context an answer was given with"""
+    return hashlib.sha256((context or "").strip().encode()).hexdigest()[:16]
+
+
+def shingles(text: str, size: int = 4) -> set[str]:
+    if len(text) <= size:
+        return {text}
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over character shingles, for estimating Jaccard similarity"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+            for shingle in shingles(text)
+        ]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+        return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+@dataclass
+class _Answer:
+    question: str
+    fingerprint: str
+    signature: tuple[int, ...]
+    answer: str
+    expires_at: float
+    hits: int = 0
+
+
+class ChatAnswerCache:
+    """
+    Bounded LRU of chat answers keyed on the normalized question plus a
+    fingerprint of the chat context (user snapshot and history).
+
+    An exact key match is a dict lookup. Otherwise the question's MinHash
+    signature is split into bands (locality-sensitive hashing), and answers
+    for the same fingerprint sharing a band are compared; the best one
+    whose estimated similarity reaches `threshold` is reused. Entries
+    expire after `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 86400.0,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+
+        self._answers: OrderedDict[str, _Answer] = OrderedDict()
+        self._buckets: dict[tuple[str, int, tuple[int, ...]], set[str]] = {}
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._answers),
+        }
+
+    def top_questions(self, limit: int = 10) -> list[tuple[str, int]]:
+        """The most reused cached questions with their hit counts"""
+        ranked = sorted(self._answers.values(), key=lambda entry: entry.hits, reverse=True)
+        return [(entry.question, entry.hits) for entry in ranked[:limit]]
+
+    def get(self, message: str, context: str | None = None, namespace: str = "") -> str | None:
+        question = normalize_question(message)
+        fingerprint = f"{namespace}:{context_fingerprint(context)}"
+        now = time.monotonic()
+
+        key = f"{fingerprint}:{question}"
+        entry = self._live(key, now)
+        if entry is not None:
+            self.exact_hits += 1
+        else:
+            entry = self._nearest(question, fingerprint, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            key = f"{fingerprint}:{entry.question}"
+            self.near_hits += 1
+
+        self._answers.move_to_end(key)
+        entry.hits += 1
+        return entry.answer
+
+    def set(self, message: str, answer: str, context: str | None = None, namespace: str = "") -> None:
+        question = normalize_question(message)
+        fingerprint = f"{namespace}:{context_fingerprint(context)}"
+        key = f"{fingerprint}:{question}"
+        self._drop(key)
+
+        entry = _Answer(
+            question=question,
+            fingerprint=fingerprint,
+            signature=self.hasher.signature(question),
+            answer=answer,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._answers[key] = entry
+        for band in self._bands(fingerprint, entry.signature):
+            self._buckets.setdefault(band, set()).add(key)
+
+        while len(self._answers) > self.max_entries:
+            self._drop(next(iter(self._answers)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._answers.clear()
+        self._buckets.clear()
+
+    def _live(self, key: str, now: float) -> _Answer | None:
+        entry = self._answers.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._drop(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _nearest(self, question: str, fingerprint: str, now: float) -> _Answer | None:
+        signature = self.hasher.signature(question)
+        shared: Counter[str] = Counter()
+        for band in self._bands(fingerprint, signature):
+            shared.update(self._buckets.get(band, ()))
+
+        # Questions sharing the most bands are the likeliest matches; comparing
+        # only those keeps a lookup cheap when many similar questions are cached
+        best: _Answer | None = None
+        best_score = self.threshold
+        for key, _ in shared.most_common(MAX_CANDIDATES):
+            entry = self._live(key, now)
+            if entry is None:
+                continue
+            score = MinHasher.similarity(signature, entry.signature)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _bands(self, fingerprint: str, signature: tuple[int, ...]) -> list[tuple[str, int, tuple[int, ...]]]:
+        return [
+            (fingerprint, band, signature[band * self.rows : (band + 1) * self.rows]) for band in range(self.bands)
+        ]
+
+    def _drop(self, key: str) -> None:
+        entry = self._answers.pop(key, None)
+        if entry is None:
+            return
+        for band in self._bands(entry.fingerprint, entry.signature):
+            keys = self._buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[band]
+
+
+class CachedChatAIProvider(DelegatingAIProvider):
+    """
+    Answers repeated chat questions from a ChatAnswerCache.
+
+    Only standalone questions (is_standalone) are cached. ChatService sends
+    those with the profile line as their only context, so an answer is
+    shared by every user with the same profile, or none filled in, however
+    their logs and conversations differ. Anything else is sent with the
+    user's logs and history, which practically never repeat, so it always
+    goes to the model.
+    """
+
+    def __init__(self, inner: AIProvider, cache: ChatAnswerCache, min_chars: int = 12):
+        super().__init__(inner)
+        self.cache = cache
+        self.min_chars = min_chars
+
+    @property
+    def namespace(self) -> str:
+        return f"{self.model_name}:{self.prompt_version}"
+
+    def _cacheable(self, user_message: str) -> bool:
+        return is_standalone(user_message, self.min_chars)
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        if not self._cacheable(user_message):
+            return await self.inner.chat(user_message, context)
+        cached = self.cache.get(user_message, context, self.namespace)
+        if cached is not None:
+            return cached
+        answer = await self.inner.chat(user_message, context)
+        self.cache.set(user_message, answer, context, self.namespace)
+        return answer
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        if not self._cacheable(user_message):
+            async for chunk in self.inner.chat_stream(user_message, context):
+                yield chunk
+            return
+        cached = self.cache.get(user_message, context, self.namespace)
+        if cached is not None:
+            yield cached
+            return
+        parts: list[str] = []
+        async for chunk in self.inner.chat_stream(user_message, context):
+            parts.append(chunk)
+            yield chunk
+        # Only complete answers are stored
+        self.cache.set(user_message, "".join(parts), context, self.namespace)
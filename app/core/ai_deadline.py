@@ -0,0 +1,144 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from typing import TypeVar
+
+from app.core.ai_base import (
+    AIProvider,
+    AITimeoutError,
+    AIUnavailableError,
+    DelegatingAIProvider,
+    PROVIDER_FAILURES,
+)
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+from app.core.circuit_breaker import CircuitBreaker
+
+T = TypeVar("T")
+
+
+class DeadlineAIProvider(DelegatingAIProvider):
+    """
+    Bounds every task by a deadline and fails fast while the provider is down.
+
+    A call that outlives its task's deadline is cancelled and raises
+    AITimeoutError. Timeouts and transient failures feed a circuit breaker;
+    while it is open calls raise AIUnavailableError at once, with the time
+    until the next probe as retry_after, instead of queueing behind a
+    provider that is not answering.
+
+    A chat stream gets the chat deadline for each chunk, so a long answer
+    that keeps streaming is not cut off.
+    """
+
+    def __init__(
+        self,
+        inner: AIProvider,
+        deadlines: Mapping[str, float],
+        default_deadline: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        super().__init__(inner)
+        self.deadlines = dict(deadlines)
+        self.default_deadline = default_deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.timeouts = 0
+        self.rejected = 0
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "circuit_open": int(self.breaker.state == "open"),
+            "circuit": self.breaker.state,
+        }
+
+    def deadline(self, task: str) -> float:
+        return self.deadlines.get(task, self.default_deadline)
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise AIUnavailableError("AI provider circuit is open", retry_after=self.breaker.retry_after())
+
+    def _record(self, error: BaseException | None) -> None:
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, PROVIDER_FAILURES):
+            self.breaker.record_failure()
+        elif isinstance(error, Exception):
+            self.breaker.record_success()
+        else:
+            # Cancelled by the caller: no verdict on the provider
+            self.breaker.release()
+
+    def _timed_out(self, task: str) -> AITimeoutError:
+        self.timeouts += 1
+        error = AITimeoutError(f"AI {task} request exceeded {self.deadline(task):g}s")
+        self.breaker.record_failure()
+        error.retry_after = self.breaker.retry_after()
+        return error
+
+    async def _bounded(self, task: str, call: Callable[[], Awaitable[T]]) -> T:
+        self._admit()
+        try:
+            async with asyncio.timeout(self.deadline(task)):
+                result = await call()
+        except TimeoutError:
+            raise self._timed_out(task) from None
+        except BaseException as error:
+            self._record(error)
+            raise
+        self._record(None)
+        return result
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._bounded("classify", lambda: self.inner.classify_photo(image_bytes))
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._bounded("auto", lambda: self.inner.classify_and_analyze(image_bytes))
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._bounded("food", lambda: self.inner.analyze_food_image(image_bytes))
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self._bounded("food_text", lambda: self.inner.analyze_food_text(description))
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._bounded("workout", lambda: self.inner.analyze_workout_image(image_bytes))
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._bounded("health", lambda: self.inner.analyze_health_image(image_bytes))
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        return await self._bounded("chat", lambda: self.inner.chat(user_message, context))
+
+    async def summarize(self, prompt: str) -> str:
+        return await self._bounded("summarize", lambda: self.inner.summarize(prompt))
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        self._admit()
+        chunks = aiter(self.inner.chat_stream(user_message, context))
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(self.deadline("chat")):
+                        chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    break
+                except TimeoutError:
+                    raise self._timed_out("chat") from None
+                yield chunk
+        except BaseException as error:
+            if not isinstance(error, AITimeoutError):
+                self._record(error)
+            raise
+        finally:
+            close = getattr(chunks, "aclose", None)
+            if close is not None:
+                await close()
+        self._record(None)
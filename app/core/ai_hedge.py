@@ -0,0 +1,171 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
+
+from app.core.ai_base import AIProvider, AIUnavailableError, DelegatingAIProvider, PROVIDER_FAILURES
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+from app.core.circuit_breaker import CircuitBreaker
+
+T = TypeVar("T")
+
+
+def _record(breaker: CircuitBreaker, error: BaseException) -> None:
+    if isinstance(error, PROVIDER_FAILURES):
+        breaker.record_failure()
+    else:
+        # A bad answer is still an answer
+        breaker.record_success()
+
+
+class HedgedAIProvider(DelegatingAIProvider):
+    """
+    Sends each request to the primary provider and, if it has not answered
+    within `hedge_delay` seconds, to the secondary as well. The first
+    successful result wins and the other request is cancelled.
+
+    A failure from one provider immediately fails over to the other, and a
+    circuit breaker per provider keeps a provider that keeps failing out
+    of rotation until it recovers.
+    """
+
+    def __init__(
+        self,
+        primary: AIProvider,
+        secondary: AIProvider,
+        hedge_delay: float = 1.5,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        super().__init__(primary)
+        self.providers = [primary, secondary]
+        self.breakers = {
+            id(provider): CircuitBreaker(failure_threshold, reset_timeout)
+            for provider in self.providers
+        }
+        self.hedge_delay = hedge_delay
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "circuits": [self.breakers[id(provider)].state for provider in self.providers],
+        }
+
+    async def _hedged(self, call: Callable[[AIProvider], Awaitable[T]]) -> T:
+        waiting = list(self.providers)
+        running: dict[asyncio.Task[T], AIProvider] = {}
+
+        def launch() -> bool:
+            # Breakers are consulted only when a provider is actually used,
+            # so an unused secondary never holds a half-open probe slot
+            while waiting:
+                provider = waiting.pop(0)
+                if self.breakers[id(provider)].allow():
+                    running[asyncio.ensure_future(call(provider))] = provider
+                    return True
+            return False
+
+        if not launch():
+            retry_after = min(self.breakers[id(provider)].retry_after() for provider in self.providers)
+            raise AIUnavailableError("All AI providers are failing", retry_after=retry_after)
+
+        last_error: BaseException | None = None
+        try:
+            while running:
+                timeout = self.hedge_delay if waiting and len(running) == 1 else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        self.hedges += 1
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    breaker = self.breakers[id(provider)]
+                    error = task.exception()
+                    if error is None:
+                        breaker.record_success()
+                        if provider is not self.providers[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    _record(breaker, error)
+                    last_error = error
+
+                if not running and launch():
+                    self.failovers += 1
+        finally:
+            for task, provider in running.items():
+                task.cancel()
+                # Lost the race: no verdict on the provider, but a half-open
+                # probe has to give its slot back
+                self.breakers[id(provider)].release()
+
+        assert last_error is not None
+        raise last_error
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._hedged(lambda provider: provider.classify_photo(image_bytes))
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._hedged(lambda provider: provider.analyze_food_image(image_bytes))
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self._hedged(lambda provider: provider.analyze_food_text(description))
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._hedged(lambda provider: provider.analyze_workout_image(image_bytes))
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._hedged(lambda provider: provider.analyze_health_image(image_bytes))
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        return await self._hedged(lambda provider: provider.chat(user_message, context))
+
+    async def summarize(self, prompt: str) -> str:
+        return await self._hedged(lambda provider: provider.summarize(prompt))
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._hedged(lambda provider: provider.classify_and_analyze(image_bytes))
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        # Streams are not hedged (two half-read streams cannot be merged), but
+        # a provider failing before its first chunk fails over to the next one
+        last_error: Exception | None = None
+        for provider in self.providers:
+            breaker = self.breakers[id(provider)]
+            if not breaker.allow():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+            started = False
+            try:
+                async for chunk in provider.chat_stream(user_message, context):
+                    started = True
+                    yield chunk
+            except Exception as error:
+                _record(breaker, error)
+                if started:
+                    raise
+                last_error = error
+                continue
+            except BaseException:
+                # Cancelled or closed by the caller: no verdict on the provider
+                breaker.release()
+                raise
+            breaker.record_success()
+            return
+
+        if last_error is not None:
+            raise last_error
+        retry_after = min(self.breakers[id(provider)].retry_after() for provider in self.providers)
+        raise AIUnavailableError("All AI providers are failing", retry_after=retry_after)
@@ -0,0 +1,169 @@
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Generator, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TypeVar
+
+from app.core.ai_base import AIProvider, DelegatingAIProvider
+from app.core.ai_schema import parse_failures, parse_repairs
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+from app.core.metrics import MetricsRegistry, Sample, metrics
+
+T = TypeVar("T")
+
+# USD per million input and output tokens, for the cost estimate only
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+IMAGE_BYTES_BUCKETS = (16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216)
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+_usage_sink: ContextVar[TokenUsage | None] = ContextVar("ai_usage_sink", default=None)
+
+
+def record_usage(input_tokens: int, output_tokens: int) -> None:
+    """
+    Called by providers with the token counts a response reports.
+
+    Counts go to the sink of the instrumented call in progress, so repair
+    requests and follow-up calls add up to one total per method call.
+    """
+    usage = _usage_sink.get()
+    if usage is not None:
+        usage.input_tokens += input_tokens
+        usage.output_tokens += output_tokens
+
+
+@contextmanager
+def collect_usage() -> Generator[TokenUsage]:
+    usage = TokenUsage()
+    token = _usage_sink.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage_sink.reset(token)
+
+
+class InstrumentedAIProvider(DelegatingAIProvider):
+    """
+    Records latency, outcome, token usage, estimated cost and image size
+    for every call, labelled by task and model.
+
+    It wraps each provider directly, so latency is the provider's own and
+    every retry or hedged attempt is a separate observation.
+    """
+
+    def __init__(self, inner: AIProvider, registry: MetricsRegistry = metrics):
+        super().__init__(inner)
+        labels = ("task", "model")
+        self.requests = registry.counter(
+            "ai_requests", "AI provider calls by outcome", (*labels, "outcome")
+        )
+        self.latency = registry.histogram(
+            "ai_request_duration_seconds", "AI provider call latency", LATENCY_BUCKETS, labels
+        )
+        self.first_chunk = registry.histogram(
+            "ai_stream_first_chunk_seconds", "Time to the first streamed chunk", LATENCY_BUCKETS, labels
+        )
+        self.tokens = registry.counter("ai_tokens", "Tokens reported by the provider", (*labels, "direction"))
+        self.cost = registry.counter("ai_cost_usd", "Estimated provider cost in USD", labels)
+        self.image_bytes = registry.histogram(
+            "ai_image_bytes", "Size of images sent to the provider", IMAGE_BYTES_BUCKETS, labels
+        )
+
+    def _record(self, task: str, started: float, outcome: str, usage: TokenUsage) -> None:
+        model = self.model_name
+        self.requests.inc(task=task, model=model, outcome=outcome)
+        self.latency.observe(time.perf_counter() - started, task=task, model=model)
+        if usage.input_tokens or usage.output_tokens:
+            self.tokens.inc(usage.input_tokens, task=task, model=model, direction="input")
+            self.tokens.inc(usage.output_tokens, task=task, model=model, direction="output")
+            price = MODEL_PRICES.get(model)
+            if price is not None:
+                cost = (usage.input_tokens * price[0] + usage.output_tokens * price[1]) / 1_000_000
+                self.cost.inc(cost, task=task, model=model)
+
+    async def _observed(self, task: str, call: Callable[[], Awaitable[T]], image_bytes: bytes | None = None) -> T:
+        if image_bytes is not None:
+            self.image_bytes.observe(len(image_bytes), task=task, model=self.model_name)
+        started = time.perf_counter()
+        outcome = "ok"
+        with collect_usage() as usage:
+            try:
+                return await call()
+            except BaseException as error:
+                outcome = type(error).__name__
+                raise
+            finally:
+                self._record(task, started, outcome, usage)
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._observed("classify", lambda: self.inner.classify_photo(image_bytes), image_bytes)
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._observed("food", lambda: self.inner.analyze_food_image(image_bytes), image_bytes)
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self._observed("food_text", lambda: self.inner.analyze_food_text(description))
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._observed("workout", lambda: self.inner.analyze_workout_image(image_bytes), image_bytes)
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._observed("health", lambda: self.inner.analyze_health_image(image_bytes), image_bytes)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._observed("auto", lambda: self.inner.classify_and_analyze(image_bytes), image_bytes)
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        return await self._observed("chat", lambda: self.inner.chat(user_message, context))
+
+    async def summarize(self, prompt: str) -> str:
+        return await self._observed("summarize", lambda: self.inner.summarize(prompt))
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        outcome = "ok"
+        first = True
+        with collect_usage() as usage:
+            try:
+                async for chunk in self.inner.chat_stream(user_message, context):
+                    if first:
+                        self.first_chunk.observe(time.perf_counter() - started, task="chat", model=self.model_name)
+                        first = False
+                    yield chunk
+            except BaseException as error:
+                outcome = type(error).__name__
+                raise
+            finally:
+                self._record("chat", started, outcome, usage)
+
+
+def collect_parse_stats() -> Iterable[Sample]:
+    """Exports failed decodes of structured answers and the repairs that fixed them"""
+    for task, count in parse_repairs.items():
+        yield "ai_parse_repairs_total", {"task": task}, float(count)
+    for task, count in parse_failures.items():
+        yield "ai_parse_failures_total", {"task": task}, float(count)
+
+
+metrics.add_collector(collect_parse_stats)
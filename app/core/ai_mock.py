@@ -0,0 +1,198 @@
+import asyncio
+import copy
+import hashlib
+import math
+import random
+from collections.abc import AsyncIterator, Sequence
+from typing import Literal, TypeVar
+
+from app.core.ai_base import AIProvider, AIRateLimitError, AITransientError
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z_P99 = 2.326
+
+PHOTO_TYPES: tuple[Literal["food", "workout", "health"], ...] = ("food", "workout", "health")
+
+FOODS: list[FoodAnalysisResult] = [
+    {
+        "description": "Grilled chicken breast with rice and broccoli",
+        "calories": 520.0,
+        "macros": {"protein": 45, "carbs": 55, "fat": 12},
+    },
+    {
+        "description": "Oatmeal with banana and peanut butter",
+        "calories": 430.0,
+        "macros": {"protein": 14, "carbs": 62, "fat": 15},
+    },
+    {
+        "description": "Margherita pizza, two slices",
+        "calories": 560.0,
+        "macros": {"protein": 22, "carbs": 68, "fat": 21},
+    },
+    {
+        "description": "Greek salad with feta",
+        "calories": 310.0,
+        "macros": {"protein": 9, "carbs": 14, "fat": 25},
+    },
+]
+
+WORKOUTS: list[WorkoutAnalysisResult] = [
+    {
+        "activity": "Running",
+        "duration_minutes": 42,
+        "distance_km": 7.5,
+        "calories": 480.0,
+        "metrics": {"pace": "5:36 min/km", "avg_hr": 152},
+    },
+    {
+        "activity": "Cycling",
+        "duration_minutes": 75,
+        "distance_km": 28.3,
+        "calories": 690.0,
+        "metrics": {"avg_speed_kmh": 22.6, "elevation_m": 310},
+    },
+    {
+        "activity": "Strength training",
+        "duration_minutes": 55,
+        "distance_km": 0.0,
+        "calories": 320.0,
+        "metrics": {"sets": 18},
+    },
+]
+
+HEALTH: list[HealthAnalysisResult] = [
+    {"category": "weight", "data": {"weight": 78.4, "body_fat": 18.2}, "description": "Smart scale reading"},
+    {"category": "sleep", "data": {"duration_hours": 7.3, "deep_sleep_hours": 1.6}, "description": "Sleep tracker summary"},
+    {"category": "blood_pressure", "data": {"systolic": 121, "diastolic": 79, "pulse": 64}, "description": "Blood pressure monitor"},
+]
+
+CHAT_REPLIES = [
+    "Great progress! Keep your protein around 1.6 g per kg of body weight and stay hydrated.",
+    "A short walk after meals helps with blood sugar. Try 10 minutes after dinner today.",
+    "Consistency beats intensity: three workouts a week you actually do beat six you skip.",
+]
+
+
+class MockAIProvider(AIProvider):
+    """
+    Offline provider with canned, realistic results for load testing.
+
+    Answers are chosen by a hash of the input, so the same photo always gets
+    the same analysis. Latency follows a log-normal distribution fitted to
+    the configured median and p99, and failures are drawn from a seeded RNG,
+    so a run is reproducible for a given request order.
+
+    With `rate_limit_rate` > 0 a request starts a burst of 429s of length
+    `rate_limit_burst`, the way a real quota window runs out for everyone
+    at once rather than for single requests.
+    """
+
+    model_name = "mock"
+
+    def __init__(
+        self,
+        latency_median: float | None = None,
+        latency_p99: float | None = None,
+        error_rate: float | None = None,
+        rate_limit_rate: float | None = None,
+        rate_limit_burst: int | None = None,
+        seed: int | None = None,
+    ):
+        median = settings.MOCK_LATENCY_MEDIAN_SECONDS if latency_median is None else latency_median
+        p99 = settings.MOCK_LATENCY_P99_SECONDS if latency_p99 is None else latency_p99
+        self.latency_median = median
+        self.latency_sigma = math.log(p99 / median) / _Z_P99 if median > 0 and p99 > median else 0.0
+        self.error_rate = settings.MOCK_ERROR_RATE if error_rate is None else error_rate
+        self.rate_limit_rate = settings.MOCK_RATE_LIMIT_RATE if rate_limit_rate is None else rate_limit_rate
+        self.rate_limit_burst = settings.MOCK_RATE_LIMIT_BURST if rate_limit_burst is None else rate_limit_burst
+        self._random = random.Random(settings.MOCK_SEED if seed is None else seed)
+        self._burst_left = 0
+
+    def _latency(self) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        return self.latency_median * math.exp(self._random.gauss(0.0, self.latency_sigma))
+
+    async def _respond(self) -> None:
+        """Sleeps for a sampled latency, then fails if this request is unlucky"""
+        latency = self._latency()
+        # Draw the outcome before sleeping so the sequence does not depend on timing
+        throttled = self._burst_left > 0 or self._random.random() < self.rate_limit_rate
+        failed = not throttled and self._random.random() < self.error_rate
+        if throttled:
+            self._burst_left = (self._burst_left or self.rate_limit_burst) - 1
+        await asyncio.sleep(latency)
+        if throttled:
+            raise AIRateLimitError("Mock quota exhausted", retry_after=1.0)
+        if failed:
+            raise AITransientError("Mock provider error")
+
+    @staticmethod
+    def _pick(data: bytes | str, choices: Sequence[T]) -> T:
+        """Picks a choice by content hash; results are copies, as from a real call"""
+        raw = data.encode() if isinstance(data, str) else data
+        index = int.from_bytes(hashlib.blake2b(raw, digest_size=4).digest()) % len(choices)
+        return copy.deepcopy(choices[index])
+
+    def _classification(self, image_bytes: bytes) -> ClassificationResult:
+        photo_type = self._pick(image_bytes, PHOTO_TYPES)
+        return {"type": photo_type, "confidence": "high", "reasoning": f"Mock {photo_type} photo"}
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        await self._respond()
+        return self._classification(image_bytes)
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        await self._respond()
+        return self._pick(image_bytes, FOODS)
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        await self._respond()
+        return self._pick(description, FOODS)
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        await self._respond()
+        return self._pick(image_bytes, WORKOUTS)
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        await self._respond()
+        return self._pick(image_bytes, HEALTH)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        # One simulated call, like the single-request path of the real providers
+        await self._respond()
+        classification = self._classification(image_bytes)
+        result: PhotoAnalysisResult = {**classification, "food": None, "workout": None, "health": None}
+        if classification["type"] == "food":
+            result["food"] = self._pick(image_bytes, FOODS)
+        elif classification["type"] == "workout":
+            result["workout"] = self._pick(image_bytes, WORKOUTS)
+        else:
+            result["health"] = self._pick(image_bytes, HEALTH)
+        return result
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        await self._respond()
+        return self._pick(user_message, CHAT_REPLIES)
+
+    async def summarize(self, prompt: str) -> str:
+        await self._respond()
+        return "The user is working on their nutrition and training goals."
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        await self._respond()
+        reply = self._pick(user_message, CHAT_REPLIES)
+        words = reply.split(" ")
+        for index, word in enumerate(words):
+            yield word if index == len(words) - 1 else word + " "
+            await asyncio.sleep(0)
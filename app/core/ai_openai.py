@@ -1,29 +1,195 @@
-from app.core.ai_base import AIProvider
+import asyncio
+import base64
+from collections.abc import AsyncIterator, Generator
+from contextlib import contextmanager
+from functools import cache
+from typing import Any, TypeVar, cast
+
+import openai
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.core.ai_base import AIProvider, AIRateLimitError, AITransientError
+from app.core.ai_instrument import record_usage
+from app.core.ai_prompts import (
+    CHAT_SYSTEM_INSTRUCTION,
+    CLASSIFY_AND_ANALYZE_PROMPT,
+    CLASSIFY_PROMPT,
+    FOOD_PROMPT,
+    FOOD_TEXT_PROMPT,
+    HEALTH_PROMPT,
+    WORKOUT_PROMPT,
+    chat_prompt,
+)
+from app.core.ai_schema import decode_with_repair, response_schema
 from app.core.ai_types import (
     ClassificationResult,
     FoodAnalysisResult,
     HealthAnalysisResult,
+    PhotoAnalysisResult,
     WorkoutAnalysisResult,
 )
 from app.core.config import settings
+from app.core.images import detect_mime_type
+
+T = TypeVar("T")
+
+
+@cache
+def shared_async_client(
+    api_key: str,
+    base_url: str | None,
+    timeout: float,
+    connect_timeout: float,
+) -> AsyncOpenAI:
+    """
+    One AsyncOpenAI client (and so one keep-alive connection pool) per
+    credentials, shared by every OpenAIProvider in the process.
+
+    SDK retries are disabled: RateLimitedAIProvider owns retry policy.
+    """
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=openai.Timeout(timeout, connect=connect_timeout),
+        max_retries=0,
+    )
+
+
+def _retry_after(error: openai.APIStatusError) -> float | None:
+    value = error.response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
 
 
 class OpenAIProvider(AIProvider):
-    def __init__(self) -> None:
+    prompt_version = "2"
+
+    def __init__(self, max_concurrency: int | None = None, model: str | None = None) -> None:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not configured")
 
+        self.client = shared_async_client(
+            settings.OPENAI_API_KEY.get_secret_value(),
+            settings.OPENAI_BASE_URL,
+            settings.OPENAI_TIMEOUT_SECONDS,
+            settings.OPENAI_CONNECT_TIMEOUT_SECONDS,
+        )
+        self.model_name = model or settings.OPENAI_MODEL
+        self.max_concurrency = max_concurrency or settings.OPENAI_MAX_CONCURRENCY
+        self.requests_per_second = settings.OPENAI_RATE_LIMIT_RPS
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _create_completion(
+        self,
+        messages: list[dict[str, Any]],
+        response_format: dict[str, Any] | None = None,
+    ) -> str:
+        """Run a chat completion, bounded by the provider's concurrency limit"""
+        kwargs: dict[str, Any] = {"model": self.model_name, "messages": messages}
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+
+        async with self._semaphore:
+            with self._provider_errors():
+                completion = cast(ChatCompletion, await self.client.chat.completions.create(**kwargs))
+
+        if completion.usage is not None:
+            record_usage(completion.usage.prompt_tokens, completion.usage.completion_tokens)
+        return completion.choices[0].message.content or ""
+
+    @contextmanager
+    def _provider_errors(self) -> Generator[None]:
+        """Translates SDK failures into the provider-neutral error types"""
+        try:
+            yield
+        except openai.RateLimitError as error:
+            raise AIRateLimitError(str(error), retry_after=_retry_after(error)) from error
+        except (openai.APIConnectionError, openai.InternalServerError) as error:
+            raise AITransientError(str(error)) from error
+
+    def _image_part(self, image_bytes: bytes) -> dict[str, Any]:
+        # The API only accepts inline images as a base64 data URL; encode once
+        # and build the URL in a single join
+        mime_type = detect_mime_type(image_bytes) or "image/jpeg"
+        url = "".join(("data:", mime_type, ";base64,", base64.b64encode(image_bytes).decode("ascii")))
+        return {"type": "image_url", "image_url": {"url": url}}
+
+    async def _generate_structured(
+        self,
+        task: str,
+        result_type: type[T],
+        prompt: str,
+        image_bytes: bytes | None,
+    ) -> T:
+        """Requests JSON constrained to the result type's schema and validates it"""
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {"name": task, "schema": response_schema(result_type)},
+        }
+        content: list[dict[str, Any]] = [{"type": "text", "text": prompt}]
+        if image_bytes is not None:
+            content.append(self._image_part(image_bytes))
+        answer = await self._create_completion([{"role": "user", "content": content}], response_format)
+
+        async def repair(repair_request: str) -> str:
+            return await self._create_completion(
+                [{"role": "user", "content": repair_request}], response_format
+            )
+
+        return await decode_with_repair(task, result_type, answer, repair)
+
     async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
-        raise NotImplementedError("OpenAIProvider.classify_photo is not implemented")
+        return await self._generate_structured("classify", ClassificationResult, CLASSIFY_PROMPT, image_bytes)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        result = await self._generate_structured(
+            "auto", PhotoAnalysisResult, CLASSIFY_AND_ANALYZE_PROMPT, image_bytes
+        )
+        return await self.complete_analysis(result, image_bytes)
 
     async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
-        raise NotImplementedError("OpenAIProvider.analyze_food_image is not implemented")
+        return await self._generate_structured("food", FoodAnalysisResult, FOOD_PROMPT, image_bytes)
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        prompt = FOOD_TEXT_PROMPT.format(description=description)
+        return await self._generate_structured("food_text", FoodAnalysisResult, prompt, None)
 
     async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
-        raise NotImplementedError("OpenAIProvider.analyze_workout_image is not implemented")
+        return await self._generate_structured("workout", WorkoutAnalysisResult, WORKOUT_PROMPT, image_bytes)
 
     async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
-        raise NotImplementedError("OpenAIProvider.analyze_health_image is not implemented")
+        return await self._generate_structured("health", HealthAnalysisResult, HEALTH_PROMPT, image_bytes)
+
+    def _chat_messages(self, user_message: str, context: str | None) -> list[dict[str, Any]]:
+        return [
+            {"role": "system", "content": CHAT_SYSTEM_INSTRUCTION},
+            {"role": "user", "content": chat_prompt(user_message, context)},
+        ]
 
     async def chat(self, user_message: str, context: str | None = None) -> str:
-        raise NotImplementedError("OpenAIProvider.chat is not implemented")
+        return await self._create_completion(self._chat_messages(user_message, context))
+
+    async def summarize(self, prompt: str) -> str:
+        return await self._create_completion([{"role": "user", "content": prompt}])
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        async with self._semaphore:
+            with self._provider_errors():
+                stream = cast(
+                    AsyncIterator[ChatCompletionChunk],
+                    await self.client.chat.completions.create(
+                        model=self.model_name,
+                        messages=cast(Any, self._chat_messages(user_message, context)),
+                        stream=True,
+                        # The last chunk then carries usage for the whole stream
+                        stream_options={"include_usage": True},
+                    ),
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        record_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
@@ -0,0 +1,36 @@
+from app.core.ai_base import AIProvider, DelegatingAIProvider
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+from app.core.images import ImagePreprocessor
+
+
+class PreprocessingAIProvider(DelegatingAIProvider):
+    """Downscales and re-encodes images before they are uploaded to the model"""
+
+    def __init__(self, inner: AIProvider, preprocessor: ImagePreprocessor):
+        super().__init__(inner)
+        self.preprocessor = preprocessor
+
+    async def _prepare(self, image_bytes: bytes) -> bytes:
+        prepared = await self.preprocessor.prepare(image_bytes)
+        return prepared.data
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self.inner.classify_photo(await self._prepare(image_bytes))
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self.inner.analyze_food_image(await self._prepare(image_bytes))
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self.inner.analyze_workout_image(await self._prepare(image_bytes))
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self.inner.analyze_health_image(await self._prepare(image_bytes))
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self.inner.classify_and_analyze(await self._prepare(image_bytes))
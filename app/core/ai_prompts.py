@@ -0,0 +1,81 @@
+CLASSIFY_PROMPT = """
+Classify this image into ONE of these categories:
+1. food - any meal, snack, beverage, or food item
+2. workout - workout results, exercise screenshots (from apps like Strava, Nike Run Club, etc), gym equipment, exercise demonstration
+3. health - body measurements, progress photos, weight scale, health metrics
+4. other - anything else
+
+Give your confidence (high/medium/low) and a brief reasoning.
+"""
+
+FOOD_PROMPT = """
+Analyze this food image and provide:
+1. Description of the food items
+2. Estimated total calories
+3. Macronutrients breakdown (protein, carbs, fat in grams)
+"""
+
+FOOD_TEXT_PROMPT = """
+Estimate the nutrition of this meal, described by the user:
+{description}
+
+Provide:
+1. Description of the food items with estimated portions
+2. Estimated total calories
+3. Macronutrients breakdown (protein, carbs, fat in grams)
+"""
+
+WORKOUT_PROMPT = """
+Analyze this workout-related image:
+1. Activity type (running, cycling, gym, yoga, etc.)
+2. Duration (in minutes)
+3. Distance (in km, 0 if not applicable)
+4. Calories burned
+5. Other metrics (pace, heart rate, etc.)
+"""
+
+HEALTH_PROMPT = """
+Analyze this health/progress image:
+1. Category (weight, body measurements, progress photo, etc.)
+2. Extract any visible numbers/metrics (e.g. {"weight": 78.4})
+3. Provide description
+"""
+
+CLASSIFY_AND_ANALYZE_PROMPT = CLASSIFY_PROMPT + """
+Then, unless the confidence is low or the category is other, fill in ONLY the
+section matching the category (food, workout or health) and set the other
+sections to null.
+
+Food: description, estimated total calories, macros (protein, carbs, fat in grams).
+Workout: activity type, duration in minutes, distance in km, calories burned, other metrics.
+Health: category (weight, body measurements, progress photo, etc.), visible numbers, description.
+"""
+
+CHAT_SYSTEM_INSTRUCTION = """
+You are a professional fitness and nutrition advisor.
+Provide helpful, evidence-based advice about health, nutrition, and fitness.
+Be encouraging and supportive. Keep responses concise (2-3 sentences).
+"""
+
+SUMMARIZE_CONVERSATION_PROMPT = """
+Update the running summary of a conversation between a user and their
+fitness and nutrition advisor. Keep facts the advisor should remember
+(goals, preferences, injuries, plans, advice already given) and drop small
+talk. Write at most {max_chars} characters of plain text, no preamble.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+# Headers of the conversation history that follows the user snapshot in chat context
+CHAT_SUMMARY_HEADER = "Earlier conversation (summary):"
+CHAT_RECENT_HEADER = "Recent conversation:"
+
+
+def chat_prompt(user_message: str, context: str | None = None) -> str:
+    if context:
+        return f"User context: {context}\n\n{user_message}"
+    return user_message
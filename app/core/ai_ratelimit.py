@@ -0,0 +1,211 @@
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import TypeVar
+
+from app.core.ai_base import AIProvider, AIRateLimitError, AITransientError, DelegatingAIProvider
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Admits `rate` requests per second on average with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency window: grows by roughly one slot per window of
+    successes and is cut multiplicatively on throttling.
+
+    Requests that started before the last cut do not cut it again, so a
+    burst of 429s from one overloaded window only halves it once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease_factor: float = 0.5,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._epoch: int = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> int:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self._epoch
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+    def on_throttle(self, epoch: int) -> None:
+        if epoch != self._epoch:
+            return
+        self._epoch += 1
+        self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: float | None = None) -> float:
+    """Exponential backoff with full jitter, never shorter than the provider's Retry-After"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class RateLimitedAIProvider(DelegatingAIProvider):
+    """
+    Paces requests to one provider: a token bucket caps the request rate,
+    an AIMD window caps concurrency, and rate-limit or transient errors are
+    retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        inner: AIProvider,
+        bucket: TokenBucket,
+        window: AdaptiveConcurrency,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        super().__init__(inner)
+        self.bucket = bucket
+        self.window = window
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttled = 0
+        self.retries = 0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "concurrency_limit": self.window.limit,
+            "in_flight": self.window.in_flight,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+    async def _paced(self, call: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            epoch = await self.window.acquire()
+            retry_after: float | None = None
+            try:
+                result = await call()
+            except AIRateLimitError as error:
+                self.throttled += 1
+                self.window.on_throttle(epoch)
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = error.retry_after
+            except AITransientError:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                self.window.on_success()
+                return result
+            finally:
+                await self.window.release()
+
+            self.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+            attempt += 1
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._paced(lambda: self.inner.classify_photo(image_bytes))
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._paced(lambda: self.inner.analyze_food_image(image_bytes))
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self._paced(lambda: self.inner.analyze_food_text(description))
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._paced(lambda: self.inner.analyze_workout_image(image_bytes))
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._paced(lambda: self.inner.analyze_health_image(image_bytes))
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        return await self._paced(lambda: self.inner.chat(user_message, context))
+
+    async def summarize(self, prompt: str) -> str:
+        return await self._paced(lambda: self.inner.summarize(prompt))
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._paced(lambda: self.inner.classify_and_analyze(image_bytes))
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        # Same pacing as _paced, but a stream can only be retried before its
+        # first chunk has reached the caller
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            epoch = await self.window.acquire()
+            started = False
+            retry_after: float | None = None
+            try:
+                async for chunk in self.inner.chat_stream(user_message, context):
+                    started = True
+                    yield chunk
+            except AIRateLimitError as error:
+                self.throttled += 1
+                self.window.on_throttle(epoch)
+                if started or attempt >= self.max_retries:
+                    raise
+                retry_after = error.retry_after
+            except AITransientError:
+                if started or attempt >= self.max_retries:
+                    raise
+            else:
+                self.window.on_success()
+                return
+            finally:
+                await self.window.release()
+
+            self.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
+            attempt += 1
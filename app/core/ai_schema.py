@@ -0,0 +1,78 @@
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from functools import cache
+from typing import Any, TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+T = TypeVar("T")
+
+# Per-task counts of model answers that failed validation, and of those
+# rescued by the repair retry
+parse_failures: Counter[str] = Counter()
+parse_repairs: Counter[str] = Counter()
+
+
+class AIResponseParseError(ValueError):
+    """Raised when a model answer does not validate against the expected schema"""
+
+    def __init__(self, task: str, response_text: str, reason: str):
+        super().__init__(f"Unparseable {task} response: {reason}")
+        self.task = task
+        self.response_text = response_text
+        self.reason = reason
+
+
+@cache
+def _adapter(result_type: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(result_type)
+
+
+def response_schema(result_type: type[T]) -> dict[str, Any]:
+    """JSON schema for a result TypedDict, as sent to providers for constrained decoding"""
+    return _adapter(result_type).json_schema()
+
+
+def decode_response(task: str, result_type: type[T], response_text: str) -> T:
+    """Validates a JSON model answer in a single step"""
+    text = response_text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        return _adapter(result_type).validate_json(text)
+    except ValidationError as error:
+        raise AIResponseParseError(task, response_text, str(error)) from error
+
+
+def repair_prompt(error: AIResponseParseError) -> str:
+    return (
+        "Your previous answer did not match the required JSON schema.\n"
+        f"Previous answer:\n{error.response_text}\n\n"
+        f"Validation errors:\n{error.reason}\n\n"
+        "Return only the corrected JSON object."
+    )
+
+
+async def decode_with_repair(
+    task: str,
+    result_type: type[T],
+    response_text: str,
+    repair: Callable[[str], Awaitable[str]],
+) -> T:
+    """
+    Decodes a model answer; if it does not validate, sends one repair
+    request through `repair` before giving up with AIResponseParseError.
+    """
+    try:
+        return decode_response(task, result_type, response_text)
+    except AIResponseParseError as error:
+        parse_failures[task] += 1
+        repaired_text = await repair(repair_prompt(error))
+
+    try:
+        result = decode_response(task, result_type, repaired_text)
+    except AIResponseParseError:
+        parse_failures[task] += 1
+        raise
+    parse_repairs[task] += 1
+    return result
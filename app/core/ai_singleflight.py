@@ -0,0 +1,93 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar, cast
+
+from app.core.ai_base import AIProvider, DelegatingAIProvider
+from app.core.ai_cache import image_digest
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one underlying call.
+
+    Every caller awaits the same task through asyncio.shield, so one caller
+    being cancelled does not cancel the work for the others; the task is
+    only cancelled once its last waiter has gone. Exceptions propagate to
+    every waiter.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight[Any]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        flight = cast("_Flight[T] | None", self._flights.get(key))
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+class SingleFlightAIProvider(DelegatingAIProvider):
+    """Shares one model call between concurrent identical image requests"""
+
+    def __init__(self, inner: AIProvider, flights: SingleFlight | None = None):
+        super().__init__(inner)
+        self.flights = flights or SingleFlight()
+
+    async def _coalesced(self, task: str, image_bytes: bytes, call: Callable[[bytes], Awaitable[T]]) -> T:
+        return await self.flights.do(f"{task}:{image_digest(image_bytes)}", lambda: call(image_bytes))
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._coalesced("classify", image_bytes, self.inner.classify_photo)
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._coalesced("food", image_bytes, self.inner.analyze_food_image)
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._coalesced("workout", image_bytes, self.inner.analyze_workout_image)
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._coalesced("health", image_bytes, self.inner.analyze_health_image)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._coalesced("auto", image_bytes, self.inner.classify_and_analyze)
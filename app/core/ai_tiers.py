@@ -0,0 +1,102 @@
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from typing import TypeVar
+
+from app.core.ai_base import AIProvider, DelegatingAIProvider
+from app.core.ai_schema import AIResponseParseError
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    PhotoAnalysisResult,
+    WorkoutAnalysisResult,
+)
+
+T = TypeVar("T")
+
+
+def _low_confidence(result: ClassificationResult | PhotoAnalysisResult) -> bool:
+    return result["confidence"] == "low"
+
+
+class TieredAIProvider(DelegatingAIProvider):
+    """
+    Routes each task to a fast or an accurate model.
+
+    Tasks mapped to "fast" run on the fast model first and escalate to the
+    accurate one when the answer cannot be parsed or, for classification,
+    comes back with low confidence. Unmapped tasks use the accurate model.
+    Chat is never escalated, there is nothing to judge it by.
+    """
+
+    def __init__(self, fast: AIProvider, accurate: AIProvider, tiers: Mapping[str, str]):
+        super().__init__(accurate)
+        self.fast = fast
+        self.accurate = accurate
+        self.tiers = dict(tiers)
+        # Result caches key on the model name, so it names both tiers
+        self.model_name = f"{fast.model_name}+{accurate.model_name}"
+        self.calls: Counter[str] = Counter()
+        self.escalations: Counter[str] = Counter()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "fast_calls": self.calls["fast"],
+            "accurate_calls": self.calls["accurate"],
+            "escalations": sum(self.escalations.values()),
+        }
+
+    def _provider(self, task: str) -> AIProvider:
+        tier = "fast" if self.tiers.get(task) == "fast" else "accurate"
+        self.calls[tier] += 1
+        return self.fast if tier == "fast" else self.accurate
+
+    async def _routed(
+        self,
+        task: str,
+        call: Callable[[AIProvider], Awaitable[T]],
+        escalate: Callable[[T], bool] | None = None,
+    ) -> T:
+        provider = self._provider(task)
+        if provider is self.accurate:
+            return await call(provider)
+        try:
+            result = await call(provider)
+        except AIResponseParseError:
+            pass
+        else:
+            if escalate is None or not escalate(result):
+                return result
+        self.escalations[task] += 1
+        self.calls["accurate"] += 1
+        return await call(self.accurate)
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        return await self._routed("classify", lambda provider: provider.classify_photo(image_bytes), _low_confidence)
+
+    async def classify_and_analyze(self, image_bytes: bytes) -> PhotoAnalysisResult:
+        return await self._routed(
+            "auto", lambda provider: provider.classify_and_analyze(image_bytes), _low_confidence
+        )
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        return await self._routed("food", lambda provider: provider.analyze_food_image(image_bytes))
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        return await self._routed("food_text", lambda provider: provider.analyze_food_text(description))
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        return await self._routed("workout", lambda provider: provider.analyze_workout_image(image_bytes))
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        return await self._routed("health", lambda provider: provider.analyze_health_image(image_bytes))
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        return await self._provider("chat").chat(user_message, context)
+
+    async def summarize(self, prompt: str) -> str:
+        return await self._provider("summarize").summarize(prompt)
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        async for chunk in self._provider("chat").chat_stream(user_message, context):
+            yield chunk
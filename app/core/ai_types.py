@@ -1,4 +1,26 @@
-from typing import Any, Literal, TypedDict
+from typing import Annotated, Any, Literal, TypedDict
+
+from pydantic import AfterValidator, WithJsonSchema
+
+MACRO_KEYS = ("protein", "carbs", "fat")
+
+
+def _require_macros(macros: dict[str, int]) -> dict[str, int]:
+    missing = [key for key in MACRO_KEYS if key not in macros]
+    if missing:
+        raise ValueError(f"missing macros: {', '.join(missing)}")
+    return macros
+
+
+Macros = Annotated[
+    dict[str, int],
+    AfterValidator(_require_macros),
+    WithJsonSchema({
+        "type": "object",
+        "properties": {key: {"type": "integer"} for key in MACRO_KEYS},
+        "required": list(MACRO_KEYS),
+    }),
+]
 
 
 class ClassificationResult(TypedDict):
@@ -10,7 +32,7 @@ class ClassificationResult(TypedDict):
 class FoodAnalysisResult(TypedDict):
     description: str
     calories: float
-    macros: dict[str, int]
+    macros: Macros
 
 
 class WorkoutAnalysisResult(TypedDict):
@@ -25,3 +47,12 @@ class HealthAnalysisResult(TypedDict):
     category: str
     data: dict[str, Any]
     description: str
+
+
+class PhotoAnalysisResult(TypedDict):
+    type: Literal["food", "workout", "health", "other"]
+    confidence: Literal["high", "medium", "low"]
+    reasoning: str
+    food: FoodAnalysisResult | None
+    workout: WorkoutAnalysisResult | None
+    health: HealthAnalysisResult | None
@@ -10,15 +10,136 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-    BOT_TOKEN: SecretStr
+    # Only the bot process needs it, the API starts without
+    BOT_TOKEN: SecretStr | None = None
     
-    AI_PROVIDER: Literal["gemini", "openai"] = "gemini"
+    # "mock" answers offline with canned results, for load testing
+    AI_PROVIDER: Literal["gemini", "openai", "mock"] = "gemini"
+    # Optional second provider for hedged requests and failover
+    AI_SECONDARY_PROVIDER: Literal["gemini", "openai", "mock"] | None = None
+    AI_HEDGE_DELAY_SECONDS: float = 1.5
+    
+    # Task -> model tier. Tasks on the fast tier are retried on the accurate
+    # model when the answer is low confidence or cannot be parsed; a
+    # provider without a fast model runs everything on its main model
+    AI_TIER_ROUTING_ENABLED: bool = True
+    AI_TASK_TIERS: dict[str, Literal["fast", "accurate"]] = {
+        "classify": "fast",
+        "chat": "fast",
+        "summarize": "fast",
+        "food_text": "fast",
+        "workout": "fast",
+        "food": "accurate",
+        "health": "accurate",
+        "auto": "accurate",
+    }
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    AI_CIRCUIT_RESET_SECONDS: float = 30.0
+    # End-to-end deadline per task, in seconds, including queueing and
+    # retries; a chat stream gets the chat deadline per chunk. Timeouts and
+    # transient failures open a circuit (AI_CIRCUIT_*) that fails calls at once
+    AI_DEADLINES_ENABLED: bool = True
+    AI_DEADLINE_DEFAULT_SECONDS: float = 30.0
+    AI_TASK_DEADLINES: dict[str, float] = {
+        "classify": 10.0,
+        "food_text": 15.0,
+        "chat": 20.0,
+        "summarize": 30.0,
+        "food": 25.0,
+        "workout": 25.0,
+        "health": 25.0,
+        "auto": 30.0,
+    }
     
     GEMINI_API_KEY: SecretStr | None = None
+    GEMINI_MODEL: str = "gemini-2.0-flash-exp"
+    GEMINI_FAST_MODEL: str | None = "gemini-2.0-flash-lite"
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_RATE_LIMIT_RPS: float = 5.0
+    GEMINI_TIMEOUT_SECONDS: float = 30.0
     
     OPENAI_API_KEY: SecretStr | None = None
     OPENAI_MODEL: str = "gpt-4o"
+    OPENAI_FAST_MODEL: str | None = "gpt-4o-mini"
+    OPENAI_BASE_URL: str | None = None
+    OPENAI_MAX_CONCURRENCY: int = 8
+    OPENAI_RATE_LIMIT_RPS: float = 8.0
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    
+    MOCK_LATENCY_MEDIAN_SECONDS: float = 0.8
+    MOCK_LATENCY_P99_SECONDS: float = 3.0
+    MOCK_ERROR_RATE: float = 0.0
+    # Chance that a request starts a run of MOCK_RATE_LIMIT_BURST 429s
+    MOCK_RATE_LIMIT_RATE: float = 0.0
+    MOCK_RATE_LIMIT_BURST: int = 5
+    MOCK_SEED: int = 0
     
     DATABASE_URL: str = "sqlite+aiosqlite:///./health.db"
+
+    # Rows per page of the meal, workout and health history endpoints when
+    # the client sends no limit, and the largest limit accepted
+    PAGE_SIZE_DEFAULT: int = 20
+    PAGE_SIZE_MAX: int = 100
+
+    # Background analysis jobs (/api/jobs): workers per API process, how often
+    # idle workers check for jobs queued by other processes, runs per job
+    # while the provider is unavailable, and when a running job is presumed
+    # abandoned by a crashed process
+    JOBS_ENABLED: bool = True
+    JOB_WORKERS: int = 4
+    JOB_MAX_QUEUED: int = 1000
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_STALE_SECONDS: float = 300.0
+
+    AI_METRICS_ENABLED: bool = True
+
+    # Per-user chat context snapshots; writes from the other process are
+    # picked up after the TTL
+    USER_CONTEXT_CACHE_ENTRIES: int = 1024
+    USER_CONTEXT_TTL_SECONDS: float = 300.0
+
+    # Conversation memory: recent turns up to the token budget are sent with
+    # each message, older ones are folded into a running summary
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_HISTORY_RETENTION_DAYS: int = 30
+    CHAT_SUMMARY_MAX_CHARS: int = 2000
+
+    AI_SINGLEFLIGHT_ENABLED: bool = True
+
+    AI_RATE_LIMIT_ENABLED: bool = True
+    AI_RATE_LIMIT_BURST: int = 10
+    AI_ADAPTIVE_CONCURRENCY_MAX: int = 32
+    AI_MAX_RETRIES: int = 3
+    AI_BACKOFF_BASE_SECONDS: float = 0.5
+    AI_BACKOFF_MAX_SECONDS: float = 8.0
+
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MEMORY_ENTRIES: int = 1024
+    AI_CACHE_MEMORY_BYTES: int = 16 * 1024 * 1024
+    AI_CACHE_DB_PATH: str | None = "./ai_cache.db"
+    AI_CACHE_DB_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Chat answers reused for repeated questions from the same user snapshot;
+    # near-duplicates match above the MinHash similarity threshold
+    AI_CHAT_CACHE_ENABLED: bool = True
+    AI_CHAT_CACHE_ENTRIES: int = 2048
+    AI_CHAT_CACHE_TTL_SECONDS: float = 86400.0
+    AI_CHAT_CACHE_SIMILARITY: float = 0.8
+    AI_CHAT_CACHE_MIN_CHARS: int = 12
+
+    # Largest accepted photo upload; bigger ones get 413 before being read
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+
+    IMAGE_PREPROCESS_ENABLED: bool = True
+    IMAGE_MAX_EDGE: int = 1536
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_PREPROCESS_WORKERS: int = 2
+
+    # A photo whose dHash is within this many bits of one the user logged
+    # inside the window is offered for reuse instead of a new analysis
+    PHOTO_DUPLICATE_MAX_DISTANCE: int = 8
+    PHOTO_DUPLICATE_WINDOW_HOURS: float = 24.0
     
 settings = Settings()  # pyright: ignore[reportCallIssue]
@@ -0,0 +1,13 @@
+class HashedImage(bytes):
+    """Image bytes carrying the SHA-256 hex digest computed while they were received"""
+
+    sha256: str
+
+    def __new__(cls, data: bytes, sha256: str) -> "HashedImage":
+        image = super().__new__(cls, data)
+        image.sha256 = sha256
+        return image
+
+    def __reduce__(self) -> tuple[type["HashedImage"], tuple[bytes, str]]:
+        # Preprocessing pickles uploads into its process pool
+        return (HashedImage, (bytes(self), self.sha256))
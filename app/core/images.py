@@ -0,0 +1,155 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+_SIGNATURES: list[tuple[bytes, str]] = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+_HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"heim", b"heis", b"mif1", b"msf1"}
+
+
+def detect_mime_type(data: bytes) -> str | None:
+    """Detects the image format from magic bytes, ignoring what the client claimed"""
+    for signature, mime_type in _SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:8] == b"ftyp" and data[8:12] in _HEIF_BRANDS:
+        return "image/heic"
+    return None
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    original_size: int
+
+
+def preprocess_image(data: bytes, max_edge: int, quality: int) -> PreparedImage:
+    """
+    Decodes, downscales to max_edge and re-encodes an image as JPEG
+    (or as an optimized PNG when that is smaller for PNG sources).
+
+    EXIF orientation is applied before re-encoding and no metadata is
+    written, so location and device tags never leave the server. Bytes
+    Pillow cannot decode are returned untouched with their sniffed type.
+    """
+    # Imported here so the API (uploads, the job worker) starts without Pillow
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            encoded, mime_type = buffer.getvalue(), "image/jpeg"
+
+            # Flat-colour PNGs (charts, small crops) can grow as JPEG
+            if len(encoded) > len(data) and opened.format == "PNG":
+                buffer = io.BytesIO()
+                image.save(buffer, format="PNG", optimize=True)
+                if len(buffer.getvalue()) < len(encoded):
+                    encoded, mime_type = buffer.getvalue(), "image/png"
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        return PreparedImage(data, detect_mime_type(data) or "image/jpeg", len(data))
+
+    return PreparedImage(encoded, mime_type, len(data))
+
+
+def dhash(data: bytes, size: int = 8) -> int | None:
+    """
+    Difference hash: one bit per horizontally adjacent pixel pair of a
+    (size + 1) x size grayscale thumbnail. Recompressions and resizes of
+    the same photo land a few bits apart.
+
+    Returned as a signed 64-bit integer (for size 8) so it fits a BIGINT
+    column; None for bytes Pillow cannot decode.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as opened:
+            # JPEG decodes at a fraction of full size, which is most of the cost
+            opened.draft("L", (size * 8, size * 8))
+            image = ImageOps.exif_transpose(opened).convert("L")
+            thumbnail = image.resize((size + 1, size), Image.Resampling.BILINEAR)  # pyright: ignore[reportUnknownMemberType]
+            pixels = thumbnail.tobytes()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        return None
+
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    width = size * size
+    return bits - (1 << width) if bits >> (width - 1) else bits
+
+
+def hamming_distance(left: int, right: int) -> int:
+    """Number of differing bits between two 64-bit hashes, signed or not"""
+    return ((left ^ right) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+
+class ImagePreprocessor:
+    """
+    Runs preprocess_image off the event loop.
+
+    With workers > 0 decoding happens in a process pool (created on first
+    use), otherwise in the default thread pool.
+    """
+
+    def __init__(self, max_edge: int = 1536, quality: int = 85, workers: int = 2):
+        self.max_edge = max_edge
+        self.quality = quality
+        self.workers = workers
+        self._pool: Executor | None = None
+
+    async def prepare(self, data: bytes) -> PreparedImage:
+        """Bytes pass through untouched if a pool worker dies; the next call gets a new pool"""
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        try:
+            return await loop.run_in_executor(executor, preprocess_image, data, self.max_edge, self.quality)
+        except BrokenProcessPool:
+            logger.warning("Image preprocessing pool broke; sending the image unprocessed")
+            if self._pool is executor:
+                self.shutdown()
+            return PreparedImage(data, detect_mime_type(data) or "image/jpeg", len(data))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _executor(self) -> Executor | None:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
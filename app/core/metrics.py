@@ -0,0 +1,174 @@
+import bisect
+import math
+from collections.abc import Callable, Iterable, Mapping, Sequence
+
+# (metric name, labels, value) produced by a collector at scrape time
+Sample = tuple[str, Mapping[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: Mapping[str, str]) -> tuple[str, ...]:
+        return tuple(labels[name] for name in self.label_names)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield self.name + "_total", dict(zip(self.label_names, key)), value
+
+
+class Histogram:
+    """Cumulative bucket histogram with a fixed set of label names"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labels: Sequence[str] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count per bucket (last one is +Inf), then the sum
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: Mapping[str, str]) -> tuple[str, ...]:
+        return tuple(labels[name] for name in self.label_names)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def sum(self, **labels: str) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, counts in self._counts.items():
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", labels, self._sums[key]
+            yield self.name + "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text
+    exposition format.
+
+    Components that already keep their own counters (cache, rate limiter,
+    single-flight) register a collector instead, which is only called when
+    the metrics are scraped.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Counter(name, documentation, labels)
+        assert isinstance(metric, Counter)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labels: Sequence[str] = (),
+    ) -> Histogram:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Histogram(name, documentation, buckets, labels)
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        # Collected values are reported as gauges, grouped by name so each
+        # name gets a single TYPE line even with several label sets
+        collected: dict[str, list[tuple[Mapping[str, str], float]]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                collected.setdefault(name, []).append((labels, value))
+        for name, samples in collected.items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def stats_collector(
+    prefix: str,
+    stats: Callable[[], Mapping[str, object]],
+    labels: Mapping[str, str] | None = None,
+) -> Callable[[], Iterable[Sample]]:
+    """Adapts a component's stats() dict into samples named `prefix_key`"""
+
+    def collect() -> Iterable[Sample]:
+        for key, value in stats().items():
+            # bool is an int subclass but not a meaningful gauge; lists are skipped too
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}_{key}", labels or {}, float(value)
+
+    return collect
+
+
+metrics = MetricsRegistry()
@@ -1,4 +1,7 @@
-from app.db.models import Base, User, Meal, Workout, HealthLog
+from app.db.models import Base, User, Meal, Workout, HealthLog, ChatMessage, ChatSummary, AnalysisJob
 from app.db.database import engine, get_db, AsyncSessionLocal
 
-__all__ = ["Base", "User", "Meal", "Workout", "HealthLog", "engine", "get_db", "AsyncSessionLocal"]
+__all__ = [
+    "Base", "User", "Meal", "Workout", "HealthLog", "ChatMessage", "ChatSummary", "AnalysisJob",
+    "engine", "get_db", "AsyncSessionLocal",
+]
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import BigInteger, DateTime, Float, Integer, JSON, String, Text
+from sqlalchemy import BigInteger, DateTime, Float, Index, Integer, JSON, LargeBinary, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -28,6 +28,12 @@ class User(Base):
 
 class Meal(Base):
     __tablename__ = "meals"
+    # Near-duplicate photo lookups scan one user's hashed rows; history
+    # pages are keyset scans in (timestamp, id) order
+    __table_args__ = (
+        Index("ix_meals_user_id_image_hash", "user_id", "image_hash"),
+        Index("ix_meals_user_id_timestamp_id", "user_id", "timestamp", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
@@ -36,10 +42,13 @@ class Meal(Base):
     calories: Mapped[float | None] = mapped_column(Float, nullable=True)
     macros: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
     photo_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    # dHash of the analyzed photo, see app.core.images.dhash
+    image_hash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
 
 
 class Workout(Base):
     __tablename__ = "workouts"
+    __table_args__ = (Index("ix_workouts_user_id_timestamp_id", "user_id", "timestamp", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
@@ -53,6 +62,10 @@ class Workout(Base):
 
 class HealthLog(Base):
     __tablename__ = "health_logs"
+    __table_args__ = (
+        Index("ix_health_logs_user_id_image_hash", "user_id", "image_hash"),
+        Index("ix_health_logs_user_id_timestamp_id", "user_id", "timestamp", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
@@ -61,3 +74,50 @@ class HealthLog(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     data: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
     photo_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    image_hash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    # Windows are read newest-first per user
+    __table_args__ = (Index("ix_chat_messages_user_id_timestamp", "user_id", "timestamp"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    role: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    tokens: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ChatSummary(Base):
+    __tablename__ = "chat_summaries"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    # Messages up to this id are folded into the summary
+    through_message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    # Workers claim the oldest queued job
+    __table_args__ = (Index("ix_analysis_jobs_status_id", "status", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Set when the result should be logged for the user
+    user_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    task: Mapped[str] = mapped_column(String(16), nullable=False)
+    # queued -> running -> done | failed
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    # Dropped once the job finishes
+    image: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    result: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Id of the Meal, Workout or HealthLog row the result was saved as
+    record_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,26 +1,95 @@
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.routes import router as api_router
+from app.api.uploads import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
+from app.core.ai_base import AIRateLimitError, AITransientError, AIUnavailableError
+from app.core.ai_schema import AIResponseParseError
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.job_worker import get_job_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if not settings.JOBS_ENABLED:
+        yield
+        return
+    pool = get_job_pool()
+    await pool.start()
+    try:
+        yield
+    finally:
+        await pool.stop()
 
-app = FastAPI(title="AI Health Architect")
+app = FastAPI(title="AI Health Architect", lifespan=lifespan)
 
 app.include_router(api_router)
 
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES,
+    paths=("/api/analyze/", "/api/jobs/"),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.exception_handler(AIResponseParseError)
+async def ai_parse_error_handler(request: Request, exc: AIResponseParseError) -> JSONResponse:
+    return JSONResponse(
+        status_code=502,
+        content={"detail": f"AI provider returned an unreadable {exc.task} analysis"},
+    )
+
+@app.exception_handler(AIRateLimitError)
+async def ai_rate_limit_handler(request: Request, exc: AIRateLimitError) -> JSONResponse:
+    retry_after = max(1, round(exc.retry_after or 0))
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "AI provider is busy, try again shortly"},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+@app.exception_handler(AIUnavailableError)
+async def ai_unavailable_handler(request: Request, exc: AIUnavailableError) -> JSONResponse:
+    retry_after = max(1, round(exc.retry_after or 0))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI analysis is temporarily unavailable"},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+@app.exception_handler(AITransientError)
+async def ai_transient_handler(request: Request, exc: AITransientError) -> JSONResponse:
+    # The provider kept failing through the limiter's retries; until its
+    # circuit opens, answer like it already had
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI analysis is temporarily unavailable"},
+        headers={"Retry-After": str(max(1, round(settings.AI_BACKOFF_MAX_SECONDS)))},
+    )
+
 @app.get("/api/health")
 async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus scrape endpoint for AI provider and pipeline metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
     app.mount("/assets", StaticFiles(directory=static_dir / "assets"), name="assets")
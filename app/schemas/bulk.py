@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel
+
+# Largest batch accepted by the bulk endpoints
+BULK_MAX_ITEMS = 1000
+
+
+def _to_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC; SQLite would drop an offset as is
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# A client-supplied timestamp, naive values being read as UTC already
+UTCDateTime = Annotated[datetime, AfterValidator(_to_utc)]
+
+
+class BulkCreateResponse(BaseModel):
+    # In the order the items were sent
+    ids: list[int]
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.bulk import UTCDateTime
+
 
 class HealthLogBase(BaseModel):
     category: str
@@ -14,6 +16,11 @@ class HealthLogCreate(HealthLogBase):
     user_id: int
 
 
+class HealthLogBulkItem(HealthLogCreate):
+    # When the entry was recorded, for backfilled history; defaults to now
+    timestamp: UTCDateTime | None = None
+
+
 class HealthLogResponse(HealthLogBase):
     id: int
     user_id: int
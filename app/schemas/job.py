@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JobResponse(BaseModel):
+    id: int
+    task: str
+    status: str
+    user_id: int | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    # Meal, Workout or HealthLog row the result was logged as
+    record_id: int | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
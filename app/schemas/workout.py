@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.bulk import UTCDateTime
+
 
 class WorkoutBase(BaseModel):
     user_id: int
@@ -16,6 +18,11 @@ class WorkoutCreate(WorkoutBase):
     pass
 
 
+class WorkoutBulkItem(WorkoutCreate):
+    # When the workout happened, for backfilled history; defaults to now
+    timestamp: UTCDateTime | None = None
+
+
 class WorkoutUpdate(BaseModel):
     description: str | None = None
     duration_minutes: int | None = None
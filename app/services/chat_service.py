@@ -1,12 +1,66 @@
+from collections.abc import AsyncIterator
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.ai_base import AIProvider
+from app.core.ai_chat_cache import is_standalone
+from app.core.config import settings
+from app.services.context_service import ContextService
+from app.services.conversation_service import (
+    ConversationMemory,
+    ConversationService,
+    conversation_memory,
+)
 
 class ChatService:
-    def __init__(self, db: AsyncSession, ai: AIProvider):
+    def __init__(self, db: AsyncSession, ai: AIProvider, memory: ConversationMemory = conversation_memory):
         self.db = db
         self.ai = ai
+        self.memory = memory
+
+    async def _build_context(self, user_id: int, message: str) -> tuple[str, bool]:
+        """
+        Returns the user snapshot plus conversation history, and whether
+        the unsummarized history has outgrown the token budget.
+
+        With the chat answer cache on, a standalone question gets only the
+        profile line, so its answer can be shared.
+        """
+        if settings.AI_CHAT_CACHE_ENABLED and is_standalone(message, settings.AI_CHAT_CACHE_MIN_CHARS):
+            return await ContextService(self.db).get_profile(user_id), False
+        snapshot = await ContextService(self.db).get_context(user_id)
+        conversation = ConversationService(self.db)
+        window = await conversation.get_window(user_id)
+        context = "\n\n".join(part for part in (snapshot, window.render()) if part)
+        return context, window.pending_tokens > conversation.token_budget
 
     async def chat(self, user_id: int, message: str) -> str:
-        # Future: Fetch user context/history from DB
-        context = "User is 25 years old, distinct goal: weight loss." 
-        return await self.ai.chat(message, context=context)
+        context, needs_compaction = await self._build_context(user_id, message)
+        reply = await self.ai.chat(message, context=context)
+        await ConversationService(self.db).add_turn(user_id, message, reply)
+        if needs_compaction:
+            self.memory.schedule_compaction(user_id, self.ai)
+        return reply
+
+    async def chat_stream(self, user_id: int, message: str) -> AsyncIterator[str]:
+        """
+        Builds the context up front and returns the provider's chunk stream,
+        so callers can release the DB session before streaming starts. The
+        turn is stored with its own session once the stream completes.
+        """
+        context, needs_compaction = await self._build_context(user_id, message)
+        return self._remembered(user_id, message, self.ai.chat_stream(message, context=context), needs_compaction)
+
+    async def _remembered(
+        self,
+        user_id: int,
+        message: str,
+        chunks: AsyncIterator[str],
+        needs_compaction: bool,
+    ) -> AsyncIterator[str]:
+        parts: list[str] = []
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        await self.memory.record_turn(user_id, message, "".join(parts))
+        if needs_compaction:
+            self.memory.schedule_compaction(user_id, self.ai)
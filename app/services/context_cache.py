@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.metrics import metrics, stats_collector
+
+SECTIONS = ("profile", "meals", "workouts", "health", "today")
+
+
+@dataclass
+class UserSnapshot:
+    """Rendered context lines per section; a missing section is rebuilt on the next read"""
+
+    sections: dict[str, str] = field(default_factory=lambda: {})
+    day: str = ""
+    built_at: float = field(default_factory=time.monotonic)
+
+
+class UserContextCache:
+    """
+    Bounded LRU of per-user context snapshots.
+
+    Writes invalidate only the sections they affect, so after logging a meal
+    the next chat turn re-runs the meal and daily-total queries and reuses
+    the profile, workouts and health lines. Snapshots also expire after
+    `ttl` seconds, which bounds staleness from writes made by the other
+    process (the API and the bot each keep their own cache).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._snapshots: OrderedDict[int, UserSnapshot] = OrderedDict()
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict[str, float]:
+        reads = self.hits + self.partial_hits + self.misses
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._snapshots),
+            "hit_rate": self.hits / reads if reads else 0.0,
+        }
+
+    def get(self, user_id: int) -> UserSnapshot:
+        """Returns the user's snapshot, stale sections already dropped"""
+        today = datetime.now().date().isoformat()
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None or time.monotonic() - snapshot.built_at > self.ttl:
+            self.misses += 1
+            snapshot = UserSnapshot(day=today)
+            self._snapshots[user_id] = snapshot
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._snapshots.move_to_end(user_id)
+            if snapshot.day != today:
+                # Daily totals roll over at midnight
+                snapshot.sections.pop("today", None)
+                snapshot.day = today
+            if len(snapshot.sections) == len(SECTIONS):
+                self.hits += 1
+            else:
+                self.partial_hits += 1
+        return snapshot
+
+    def invalidate(self, user_id: int, *sections: str) -> None:
+        """Drops the given sections of a user's snapshot, or all of it if none are given"""
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None:
+            return
+        if not sections:
+            del self._snapshots[user_id]
+            return
+        for section in sections:
+            snapshot.sections.pop(section, None)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+
+user_context_cache = UserContextCache(
+    max_entries=settings.USER_CONTEXT_CACHE_ENTRIES,
+    ttl=settings.USER_CONTEXT_TTL_SECONDS,
+)
+metrics.add_collector(stats_collector("user_context_cache", user_context_cache.stats))
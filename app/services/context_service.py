@@ -0,0 +1,77 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import HealthLog, User
+from app.services.context_cache import SECTIONS, UserContextCache, user_context_cache
+from app.services.health_service import HealthService
+from app.services.meal_service import MealService
+from app.services.stats_service import StatsService
+from app.services.workout_service import WorkoutService
+
+
+def _describe_health(entry: HealthLog) -> str:
+    if entry.data:
+        return f"{entry.category} " + ", ".join(f"{key} {value}" for key, value in entry.data.items())
+    return f"{entry.category} {entry.description or ''}".strip()
+
+
+class ContextService:
+    """Builds the compact user snapshot passed to the model as chat context"""
+
+    def __init__(self, db: AsyncSession, cache: UserContextCache = user_context_cache):
+        self.db = db
+        self.cache = cache
+
+    async def get_context(self, user_id: int) -> str:
+        snapshot = self.cache.get(user_id)
+        for section in SECTIONS:
+            if section not in snapshot.sections:
+                snapshot.sections[section] = await self._build_section(section, user_id)
+        return "\n".join(line for line in (snapshot.sections[s] for s in SECTIONS) if line)
+
+    async def get_profile(self, user_id: int) -> str:
+        """The profile line alone, for questions that do not need the user's logs"""
+        snapshot = self.cache.get(user_id)
+        if "profile" not in snapshot.sections:
+            snapshot.sections["profile"] = await self._profile(user_id)
+        return snapshot.sections["profile"]
+
+    async def _build_section(self, section: str, user_id: int) -> str:
+        if section == "profile":
+            return await self._profile(user_id)
+        if section == "meals":
+            meals = await MealService(self.db).get_user_meals(user_id, limit=5)
+            items = [f"{meal.description} ({meal.calories or 0:.0f} kcal)" for meal in meals]
+            return "Recent meals: " + "; ".join(items) if items else ""
+        if section == "workouts":
+            workouts = await WorkoutService(self.db).get_workouts(user_id, limit=3)
+            items = [
+                f"{workout.activity_type or workout.description}"
+                + (f" {workout.duration_minutes} min" if workout.duration_minutes else "")
+                for workout in workouts
+            ]
+            return "Recent workouts: " + "; ".join(items) if items else ""
+        if section == "health":
+            entries = await HealthService(self.db).get_health_entries(user_id, limit=3)
+            items = [_describe_health(entry) for entry in entries]
+            return "Recent health logs: " + "; ".join(items) if items else ""
+        summary = await StatsService(self.db).get_daily_summary(user_id)
+        return (
+            f"Today: {summary['calories']} kcal eaten, "
+            f"{summary['workout_count']} workouts ({summary['workout_duration']} min)"
+        )
+
+    async def _profile(self, user_id: int) -> str:
+        # Activity rows store the Telegram id as user_id
+        result = await self.db.execute(select(User).where(User.telegram_id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return ""
+        facts = [
+            f"{user.age} years old" if user.age else None,
+            f"weight {user.weight:g} kg" if user.weight else None,
+            f"height {user.height} cm" if user.height else None,
+            f"goal: {user.goal}" if user.goal else None,
+        ]
+        known = [fact for fact in facts if fact]
+        return "User: " + ", ".join(known) if known else ""
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ai_base import AIProvider
+from app.core.ai_prompts import CHAT_RECENT_HEADER, CHAT_SUMMARY_HEADER, SUMMARIZE_CONVERSATION_PROMPT
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import ChatMessage, ChatSummary
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on rows read per window; the token budget normally stops earlier
+MAX_WINDOW_MESSAGES = 100
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token plus role overhead)"""
+    return len(text) // 4 + 4
+
+
+@dataclass
+class ConversationWindow:
+    summary: str
+    messages: list[ChatMessage]
+    # Unsummarized tokens, including turns that no longer fit the budget
+    pending_tokens: int
+
+    def render(self) -> str:
+        parts: list[str] = []
+        if self.summary:
+            parts.append(f"{CHAT_SUMMARY_HEADER} {self.summary}")
+        if self.messages:
+            lines = [f"{message.role.capitalize()}: {message.content}" for message in self.messages]
+            parts.append(f"{CHAT_RECENT_HEADER}\n" + "\n".join(lines))
+        return "\n\n".join(parts)
+
+
+class ConversationService:
+    def __init__(self, db: AsyncSession, token_budget: int | None = None):
+        self.db = db
+        self.token_budget = token_budget or settings.CHAT_HISTORY_TOKEN_BUDGET
+
+    async def add_turn(self, user_id: int, user_message: str, reply: str) -> None:
+        self.db.add_all([
+            ChatMessage(user_id=user_id, role="user", content=user_message, tokens=estimate_tokens(user_message)),
+            ChatMessage(user_id=user_id, role="assistant", content=reply, tokens=estimate_tokens(reply)),
+        ])
+        await self.db.commit()
+
+    async def _unsummarized(
+        self,
+        user_id: int,
+        through_message_id: int,
+        limit: int | None = MAX_WINDOW_MESSAGES,
+    ) -> list[ChatMessage]:
+        """Newest first"""
+        stmt = (
+            select(ChatMessage)
+            .where(ChatMessage.user_id == user_id, ChatMessage.id > through_message_id)
+            .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_window(self, user_id: int) -> ConversationWindow:
+        """
+        Returns the summary plus the newest turns that fit the token budget,
+        in chronological order. Older unsummarized turns are left out of the
+        prompt until compaction folds them into the summary.
+        """
+        summary = await self.db.get(ChatSummary, user_id)
+        recent = await self._unsummarized(user_id, summary.through_message_id if summary else 0)
+
+        window: list[ChatMessage] = []
+        used = 0
+        for message in recent:
+            if used + message.tokens > self.token_budget:
+                break
+            window.append(message)
+            used += message.tokens
+
+        return ConversationWindow(
+            summary=summary.summary if summary else "",
+            messages=window[::-1],
+            pending_tokens=sum(message.tokens for message in recent),
+        )
+
+    async def compact(self, user_id: int, ai: AIProvider) -> bool:
+        """
+        Folds the oldest unsummarized turns into the running summary, keeping
+        the newest half of the token budget verbatim so compaction does not
+        run again on the very next turn. Returns whether anything was folded.
+        """
+        summary = await self.db.get(ChatSummary, user_id)
+        # Unbounded, so a backlog left by failed compactions is folded in one go
+        recent = await self._unsummarized(user_id, summary.through_message_id if summary else 0, limit=None)
+
+        kept = 0
+        used = 0
+        for message in recent:
+            if used + message.tokens > self.token_budget // 2:
+                break
+            kept += 1
+            used += message.tokens
+        folded = recent[kept:][::-1]
+        if not folded:
+            return False
+
+        prompt = SUMMARIZE_CONVERSATION_PROMPT.format(
+            max_chars=settings.CHAT_SUMMARY_MAX_CHARS,
+            summary=summary.summary if summary else "(none)",
+            messages="\n".join(f"{message.role.capitalize()}: {message.content}" for message in folded),
+        )
+        # Not ai.chat: that answers in the coach persona, through the shared answer cache
+        text = (await ai.summarize(prompt)).strip()[: settings.CHAT_SUMMARY_MAX_CHARS]
+
+        through_message_id = max(message.id for message in folded)
+        if summary is None:
+            self.db.add(ChatSummary(user_id=user_id, summary=text, through_message_id=through_message_id))
+        else:
+            summary.summary = text
+            summary.through_message_id = through_message_id
+        await self.db.commit()
+        await self.trim(user_id, through_message_id)
+        return True
+
+    async def trim(self, user_id: int, through_message_id: int) -> None:
+        """Deletes turns already folded into the summary once they are past retention"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.CHAT_HISTORY_RETENTION_DAYS)
+        await self.db.execute(
+            delete(ChatMessage).where(
+                ChatMessage.user_id == user_id,
+                ChatMessage.id <= through_message_id,
+                ChatMessage.timestamp < cutoff,
+            ).execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+
+class ConversationMemory:
+    """
+    Runs conversation writes and compaction off the request path.
+
+    Compaction makes a model call, so it runs in a background task with its
+    own session; at most one compaction per user is in flight.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._compacting: set[int] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def record_turn(self, user_id: int, user_message: str, reply: str) -> None:
+        """Stores a turn with a fresh session, for callers whose session is already closed"""
+        async with self.session_factory() as session:
+            await ConversationService(session).add_turn(user_id, user_message, reply)
+
+    def schedule_compaction(self, user_id: int, ai: AIProvider) -> None:
+        if user_id in self._compacting:
+            return
+        self._compacting.add(user_id)
+        task = asyncio.create_task(self._compact(user_id, ai))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, user_id: int, ai: AIProvider) -> None:
+        try:
+            async with self.session_factory() as session:
+                await ConversationService(session).compact(user_id, ai)
+        except Exception:
+            # The turns stay unsummarized and are picked up by the next compaction
+            logger.exception("Conversation compaction failed for user %s", user_id)
+        finally:
+            self._compacting.discard(user_id)
+
+    async def drain(self) -> None:
+        """Waits for scheduled compactions, for shutdown and tests"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+conversation_memory = ConversationMemory()
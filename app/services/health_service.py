@@ -1,8 +1,13 @@
-from sqlalchemy import select
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import HealthLog
-from app.services.types import WeightHistoryItemData
+from app.services.context_cache import user_context_cache
+from app.services.pagination import Cursor, before
+from app.services.types import HealthLogRowData, WeightHistoryItemData
 
 class HealthService:
     def __init__(self, db: AsyncSession):
@@ -15,31 +20,60 @@ class HealthService:
         description: str | None = None,
         data: dict[str, object] | None = None,
         photo_url: str | None = None,
+        image_hash: int | None = None,
     ) -> HealthLog:
         entry = HealthLog(
             user_id=user_id,
             category=category,
             description=description,
             data=data,
-            photo_url=photo_url
+            photo_url=photo_url,
+            image_hash=image_hash,
         )
         self.db.add(entry)
         await self.db.commit()
         await self.db.refresh(entry)
+        user_context_cache.invalidate(user_id, "health")
         return entry
 
+    async def log_health_entries(self, entries: Sequence[HealthLogRowData]) -> list[int]:
+        """Batched insert in one transaction, see MealService.create_meals"""
+        if not entries:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "user_id": entry["user_id"],
+                "category": entry["category"],
+                "description": entry.get("description"),
+                "data": entry.get("data"),
+                "photo_url": entry.get("photo_url"),
+                "timestamp": entry.get("timestamp") or now,
+            }
+            for entry in entries
+        ]
+        result = await self.db.execute(insert(HealthLog).returning(HealthLog.id, sort_by_parameter_order=True), rows)
+        ids = list(result.scalars())
+        await self.db.commit()
+        for user_id in {entry["user_id"] for entry in entries}:
+            user_context_cache.invalidate(user_id, "health")
+        return ids
+
     async def get_health_entries(
         self,
         user_id: int,
         category: str | None = None,
         limit: int = 50,
+        after: Cursor | None = None,
     ) -> list[HealthLog]:
         stmt = select(HealthLog).where(HealthLog.user_id == user_id)
         
         if category:
             stmt = stmt.where(HealthLog.category == category)
+        if after is not None:
+            stmt = stmt.where(before(HealthLog.timestamp, HealthLog.id, after))
             
-        stmt = stmt.order_by(HealthLog.timestamp.desc()).limit(limit)
+        stmt = stmt.order_by(HealthLog.timestamp.desc(), HealthLog.id.desc()).limit(limit)
         
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
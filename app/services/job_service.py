@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from typing import Any, Literal, get_args
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import AnalysisJob
+
+JobTask = Literal["classify", "auto", "food", "workout", "health"]
+JOB_TASKS: tuple[str, ...] = get_args(JobTask)
+FINISHED_STATUSES = ("done", "failed")
+
+
+class JobService:
+    """
+    Analysis jobs persisted in the database, which makes it the queue:
+    jobs survive a restart and any process can pick them up.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(self, task: str, image: bytes, user_id: int | None = None) -> AnalysisJob:
+        if task not in JOB_TASKS:
+            raise ValueError(f"Unknown analysis task: {task}")
+        job = AnalysisJob(
+            user_id=user_id,
+            task=task,
+            status="queued",
+            image=image,
+            attempts=0,
+            created_at=datetime.now(timezone.utc),
+        )
+        self.db.add(job)
+        await self.db.commit()
+        await self.db.refresh(job)
+        return job
+
+    async def get_job(self, job_id: int) -> AnalysisJob | None:
+        # Pollers read the same job repeatedly; always take the stored state
+        result = await self.db.execute(
+            select(AnalysisJob).where(AnalysisJob.id == job_id).execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def claim(self) -> AnalysisJob | None:
+        """
+        Marks the oldest queued job as running and returns it. The claim is
+        a single UPDATE, so two workers (or processes) never get the same job.
+        """
+        oldest = (
+            select(AnalysisJob.id)
+            .where(AnalysisJob.status == "queued")
+            .order_by(AnalysisJob.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(AnalysisJob)
+            .where(AnalysisJob.id == oldest, AnalysisJob.status == "queued")
+            .values(status="running", started_at=datetime.now(timezone.utc), attempts=AnalysisJob.attempts + 1)
+            .returning(AnalysisJob)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        job = result.scalar_one_or_none()
+        await self.db.commit()
+        return job
+
+    async def complete(self, job: AnalysisJob, result: dict[str, Any], record_id: int | None = None) -> None:
+        await self._finish(job, "done", result=result, record_id=record_id)
+
+    async def fail(self, job: AnalysisJob, error: str) -> None:
+        await self._finish(job, "failed", error=error)
+
+    async def _finish(self, job: AnalysisJob, status: str, **values: Any) -> None:
+        # The image is only needed to run the job
+        await self.db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job.id)
+            .values(status=status, image=None, finished_at=datetime.now(timezone.utc), **values)
+        )
+        await self.db.commit()
+
+    async def queued_count(self) -> int:
+        result = await self.db.execute(
+            select(func.count()).select_from(AnalysisJob).where(AnalysisJob.status == "queued")
+        )
+        return result.scalar_one()
+
+    async def requeue(self, job_ids: list[int]) -> None:
+        await self.db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id.in_(job_ids), AnalysisJob.status == "running")
+            .values(status="queued")
+        )
+        await self.db.commit()
+
+    async def requeue_stale(self, started_before: datetime) -> int:
+        """Puts back jobs left running by a worker that died before finishing them"""
+        result = await self.db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.status == "running", AnalysisJob.started_at < started_before)
+            .values(status="queued")
+            .returning(AnalysisJob.id)
+        )
+        requeued = len(result.all())
+        await self.db.commit()
+        return requeued
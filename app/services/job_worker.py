@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any, cast
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.ai import get_ai
+from app.core.ai_base import AIProvider, AIUnavailableError
+from app.core.ai_schema import AIResponseParseError
+from app.core.ai_types import FoodAnalysisResult, HealthAnalysisResult, PhotoAnalysisResult, WorkoutAnalysisResult
+from app.core.config import settings
+from app.core.images import dhash
+from app.core.metrics import MetricsRegistry, metrics, stats_collector
+from app.db.database import AsyncSessionLocal
+from app.db.models import AnalysisJob
+from app.services.health_service import HealthService
+from app.services.job_service import JobService
+from app.services.meal_service import MealService
+from app.services.workout_service import WorkoutService
+
+logger = logging.getLogger(__name__)
+
+JOB_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back without their zone; they are stored in UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+async def _analyze(ai: AIProvider, task: str, image: bytes) -> dict[str, Any]:
+    if task == "classify":
+        return dict(await ai.classify_photo(image))
+    if task == "food":
+        return dict(await ai.analyze_food_image(image))
+    if task == "workout":
+        return dict(await ai.analyze_workout_image(image))
+    if task == "health":
+        return dict(await ai.analyze_health_image(image))
+    return dict(await ai.classify_and_analyze(image))
+
+
+async def _save_food(db: AsyncSession, user_id: int, food: FoodAnalysisResult, image_hash: int | None) -> int:
+    meal = await MealService(db).create_meal(
+        user_id=user_id,
+        description=food["description"],
+        calories=food["calories"],
+        macros=food["macros"],
+        image_hash=image_hash,
+    )
+    return meal.id
+
+
+async def _save_workout(db: AsyncSession, user_id: int, workout: WorkoutAnalysisResult) -> int:
+    saved = await WorkoutService(db).create_workout(
+        user_id=user_id,
+        description=f"{workout['activity']} from photo",
+        duration_minutes=workout["duration_minutes"] or 30,
+        activity_type=workout["activity"],
+        metrics={**workout["metrics"], "distance_km": workout["distance_km"], "calories": workout["calories"]},
+    )
+    return saved.id
+
+
+async def _save_health(db: AsyncSession, user_id: int, health: HealthAnalysisResult, image_hash: int | None) -> int:
+    entry = await HealthService(db).log_health_entry(
+        user_id=user_id,
+        category=health["category"],
+        description=health["description"] or "Health tracking photo",
+        data=health["data"] or None,
+        image_hash=image_hash,
+    )
+    return entry.id
+
+
+async def save_result(
+    db: AsyncSession, user_id: int, task: str, result: dict[str, Any], image_hash: int | None
+) -> int | None:
+    """Logs an analysis as the user's Meal, Workout or HealthLog; returns the row id"""
+    if task == "food":
+        return await _save_food(db, user_id, cast(FoodAnalysisResult, result), image_hash)
+    if task == "workout":
+        return await _save_workout(db, user_id, cast(WorkoutAnalysisResult, result))
+    if task == "health":
+        return await _save_health(db, user_id, cast(HealthAnalysisResult, result), image_hash)
+    if task != "auto":
+        return None
+    # A low-confidence guess is not logged; the client asks the user instead
+    analysis = cast(PhotoAnalysisResult, result)
+    if analysis["confidence"] == "low":
+        return None
+    if analysis["food"] is not None:
+        return await _save_food(db, user_id, analysis["food"], image_hash)
+    if analysis["workout"] is not None:
+        return await _save_workout(db, user_id, analysis["workout"])
+    if analysis["health"] is not None:
+        return await _save_health(db, user_id, analysis["health"], image_hash)
+    return None
+
+
+class JobWorkerPool:
+    """
+    A fixed number of worker tasks running queued analysis jobs.
+
+    Workers claim jobs from the database queue, wake as soon as a job is
+    submitted in this process, and otherwise poll every `poll_interval`
+    seconds for jobs queued elsewhere. A job the provider cannot take
+    right now (open circuit) is retried after its retry_after, up to
+    `max_attempts` runs. Jobs with a user_id log their result for that user.
+    """
+
+    def __init__(
+        self,
+        ai: Callable[[], AIProvider] = get_ai,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        stale_after: float = 300.0,
+        registry: MetricsRegistry = metrics,
+    ):
+        self.ai = ai
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+
+        self.depth = 0
+        self.busy = 0
+        self._busy_seconds = 0.0
+        self._running_since: dict[int, float] = {}
+        # Worker -> id of the job it is running
+        self._current: dict[int, int] = {}
+        self._started_at: float | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._wake = asyncio.Event()
+        self._finished = asyncio.Condition()
+
+        self.wait_time = registry.histogram(
+            "analysis_job_wait_seconds", "Time analysis jobs spend queued", JOB_SECONDS_BUCKETS, ("task",)
+        )
+        self.run_time = registry.histogram(
+            "analysis_job_duration_seconds", "Time spent running analysis jobs", JOB_SECONDS_BUCKETS, ("task",)
+        )
+        self.outcomes = registry.counter("analysis_jobs", "Finished analysis jobs by outcome", ("task", "outcome"))
+
+    def stats(self) -> dict[str, float]:
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        now = time.monotonic()
+        busy_seconds = self._busy_seconds + sum(now - since for since in self._running_since.values())
+        return {
+            "depth": self.depth,
+            "workers": len(self._tasks),
+            "busy": self.busy,
+            # Share of worker time spent on jobs since the pool started
+            "utilization": busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0,
+        }
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        async with self.session_factory() as session:
+            service = JobService(session)
+            stale = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+            requeued = await service.requeue_stale(stale)
+            self.depth = await service.queued_count()
+        if requeued:
+            logger.warning("Requeued %s analysis jobs left running", requeued)
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._work(worker)) for worker in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancels the workers and puts the jobs they were running back in the queue"""
+        for task in self._tasks:
+            task.cancel()
+        # Workers finish a claim in flight before exiting, so every job
+        # they took is in _current once they are done
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.busy = 0
+        self._running_since.clear()
+        running = list(self._current.values())
+        self._current.clear()
+        if running:
+            async with self.session_factory() as session:
+                await JobService(session).requeue(running)
+
+    def notify(self) -> None:
+        """Wakes idle workers after a job was submitted"""
+        self.depth += 1
+        self._wake.set()
+
+    async def wait_finished(self, timeout: float) -> None:
+        """Returns when any job finishes, or after `timeout` seconds"""
+        async with self._finished:
+            try:
+                await asyncio.wait_for(self._finished.wait(), timeout)
+            except TimeoutError:
+                pass
+
+    async def _claim(self, worker: int) -> AnalysisJob | None:
+        async with self.session_factory() as session:
+            service = JobService(session)
+            job = await service.claim()
+            if job is not None:
+                self.busy += 1
+                self._running_since[worker] = time.monotonic()
+                self._current[worker] = job.id
+            self.depth = await service.queued_count()
+        return job
+
+    async def _work(self, worker: int) -> None:
+        while True:
+            self._wake.clear()
+            claiming = asyncio.ensure_future(self._claim(worker))
+            try:
+                job = await asyncio.shield(claiming)
+            except asyncio.CancelledError:
+                # The claim may already be committed; let it record the job
+                # so stop() can put it back in the queue
+                await asyncio.gather(claiming, return_exceptions=True)
+                raise
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Analysis job %s crashed", job.id)
+            finally:
+                self.busy -= 1
+                self._busy_seconds += time.monotonic() - self._running_since.pop(worker)
+            # Left in place when cancelled, so stop() can requeue the job
+            del self._current[worker]
+            async with self._finished:
+                self._finished.notify_all()
+
+    async def _run(self, job: AnalysisJob) -> None:
+        if job.started_at is not None:
+            self.wait_time.observe(
+                (_utc(job.started_at) - _utc(job.created_at)).total_seconds(), task=job.task
+            )
+        started = time.perf_counter()
+        outcome = "done"
+        async with self.session_factory() as session:
+            service = JobService(session)
+            try:
+                result = await self._analyze(job)
+                record_id = None
+                if job.user_id is not None:
+                    image_hash = await asyncio.to_thread(dhash, job.image or b"")
+                    record_id = await save_result(session, job.user_id, job.task, result, image_hash)
+                await service.complete(job, result, record_id)
+            except AIResponseParseError:
+                outcome = "failed"
+                await service.fail(job, f"AI provider returned an unreadable {job.task} analysis")
+            except AIUnavailableError:
+                outcome = "failed"
+                await service.fail(job, "AI analysis is temporarily unavailable")
+            except Exception as error:
+                outcome = "failed"
+                await service.fail(job, str(error) or type(error).__name__)
+                raise
+            finally:
+                self.run_time.observe(time.perf_counter() - started, task=job.task)
+                self.outcomes.inc(task=job.task, outcome=outcome)
+
+    async def _analyze(self, job: AnalysisJob) -> dict[str, Any]:
+        attempts = job.attempts
+        while True:
+            try:
+                return await _analyze(self.ai(), job.task, job.image or b"")
+            except AIUnavailableError as error:
+                attempts += 1
+                if attempts > self.max_attempts:
+                    raise
+                # Every worker would hit the same open circuit; wait it out
+                await asyncio.sleep(min(error.retry_after or self.poll_interval, 60.0))
+
+
+_job_pool: JobWorkerPool | None = None
+
+
+def get_job_pool() -> JobWorkerPool:
+    """The process-wide worker pool, built on first use"""
+    global _job_pool
+    if _job_pool is None:
+        _job_pool = JobWorkerPool(
+            workers=settings.JOB_WORKERS,
+            poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            stale_after=settings.JOB_STALE_SECONDS,
+        )
+        metrics.add_collector(stats_collector("analysis_jobs", _job_pool.stats))
+    return _job_pool
+
+
+async def run_workers() -> None:
+    """Runs a worker pool on its own, next to API processes started with JOBS_ENABLED=false"""
+    pool = get_job_pool()
+    await pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_workers())
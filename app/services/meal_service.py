@@ -1,7 +1,13 @@
-from sqlalchemy import select
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Meal
+from app.services.context_cache import user_context_cache
+from app.services.pagination import Cursor, before
+from app.services.types import MealRowData
 
 class MealService:
     def __init__(self, db: AsyncSession):
@@ -14,20 +20,53 @@ class MealService:
         calories: float,
         macros: dict[str, int],
         photo_url: str | None = None,
+        image_hash: int | None = None,
     ) -> Meal:
         meal = Meal(
             user_id=user_id,
             description=description,
             calories=calories,
             macros=macros,
-            photo_url=photo_url
+            photo_url=photo_url,
+            image_hash=image_hash,
         )
         self.db.add(meal)
         await self.db.commit()
         await self.db.refresh(meal)
+        user_context_cache.invalidate(user_id, "meals", "today")
         return meal
 
-    async def get_user_meals(self, user_id: int, limit: int = 10) -> list[Meal]:
-        stmt = select(Meal).where(Meal.user_id == user_id).order_by(Meal.timestamp.desc()).limit(limit)
+    async def create_meals(self, meals: Sequence[MealRowData]) -> list[int]:
+        """
+        Inserts meals in one transaction as a batched INSERT and returns
+        their ids in input order, without loading the rows back.
+        """
+        if not meals:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "user_id": meal["user_id"],
+                "description": meal["description"],
+                "calories": meal["calories"],
+                "macros": meal["macros"],
+                "photo_url": meal.get("photo_url"),
+                "timestamp": meal.get("timestamp") or now,
+            }
+            for meal in meals
+        ]
+        result = await self.db.execute(insert(Meal).returning(Meal.id, sort_by_parameter_order=True), rows)
+        ids = list(result.scalars())
+        await self.db.commit()
+        for user_id in {meal["user_id"] for meal in meals}:
+            user_context_cache.invalidate(user_id, "meals", "today")
+        return ids
+
+    async def get_user_meals(self, user_id: int, limit: int = 10, after: Cursor | None = None) -> list[Meal]:
+        """Newest meals first, continuing past `after` when given"""
+        stmt = select(Meal).where(Meal.user_id == user_id)
+        if after is not None:
+            stmt = stmt.where(before(Meal.timestamp, Meal.id, after))
+        stmt = stmt.order_by(Meal.timestamp.desc(), Meal.id.desc()).limit(limit)
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
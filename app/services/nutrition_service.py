@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ai_base import AIProvider, AIUnavailableError
+from app.core.ai_types import MACRO_KEYS, FoodAnalysisResult
+from app.db.models import Meal
+from app.services.meal_service import MealService
+from app.services.nutrition_table import FoodItem, MealItem, NutritionTable, get_nutrition_table, parse_meal_text
+
+
+@dataclass(frozen=True)
+class ResolvedItem:
+    item: MealItem
+    food: FoodItem
+    grams: float
+
+    @property
+    def calories(self) -> float:
+        return self.food.kcal * self.grams / 100
+
+    def macro(self, key: str) -> float:
+        return float(getattr(self.food, key)) * self.grams / 100
+
+
+@dataclass
+class MealTextAnalysis:
+    result: FoodAnalysisResult
+    resolved: list[ResolvedItem] = field(default_factory=lambda: [])
+    # Items the table could not resolve; estimated by the model when one is given
+    unresolved: list[MealItem] = field(default_factory=lambda: [])
+    used_model: bool = False
+
+
+def _grams(item: MealItem, food: FoodItem) -> float:
+    if item.quantity is None:
+        return food.portion_grams
+    if item.unit_grams is None:
+        return item.quantity * food.portion_grams
+    return item.quantity * item.unit_grams
+
+
+class NutritionService:
+    """
+    Logs meals described in text. Foods are resolved against the bundled
+    nutrition table; only the items it cannot resolve go to the model, in
+    a single request. While the model is unavailable those items are
+    logged without an estimate.
+    """
+
+    def __init__(self, db: AsyncSession, ai: AIProvider | None = None, table: NutritionTable | None = None):
+        self.db = db
+        self.ai = ai
+        self.table = table or get_nutrition_table()
+
+    async def analyze_text(self, text: str) -> MealTextAnalysis:
+        resolved: list[ResolvedItem] = []
+        unresolved: list[MealItem] = []
+        for item in parse_meal_text(text):
+            food = self.table.lookup(item.name)
+            if food is None:
+                unresolved.append(item)
+            else:
+                resolved.append(ResolvedItem(item, food, _grams(item, food)))
+
+        calories = sum(entry.calories for entry in resolved)
+        macros = {key: sum(entry.macro(key) for entry in resolved) for key in MACRO_KEYS}
+        descriptions = [f"{entry.food.name} {entry.grams:g} g" for entry in resolved]
+
+        estimate: FoodAnalysisResult | None = None
+        if unresolved and self.ai is not None:
+            try:
+                estimate = await self.ai.analyze_food_text(", ".join(item.text for item in unresolved))
+            except AIUnavailableError:
+                # Log what the table resolved, the rest unestimated; with
+                # nothing resolved there is no meal worth logging
+                if not resolved:
+                    raise
+        if estimate is not None:
+            calories += estimate["calories"]
+            for key in MACRO_KEYS:
+                macros[key] += estimate["macros"].get(key, 0)
+            descriptions.append(estimate["description"])
+        else:
+            descriptions.extend(item.text for item in unresolved)
+
+        return MealTextAnalysis(
+            result={
+                "description": ", ".join(descriptions),
+                "calories": round(calories),
+                "macros": {key: round(value) for key, value in macros.items()},
+            },
+            resolved=resolved,
+            unresolved=unresolved,
+            used_model=estimate is not None,
+        )
+
+    async def log_meal_text(self, user_id: int, text: str) -> tuple[Meal, MealTextAnalysis]:
+        analysis = await self.analyze_text(text)
+        meal = await MealService(self.db).create_meal(
+            user_id=user_id,
+            description=analysis.result["description"],
+            calories=analysis.result["calories"],
+            macros=analysis.result["macros"],
+        )
+        return meal, analysis
@@ -0,0 +1,212 @@
+import bisect
+import csv
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+FOODS_PATH = Path(__file__).resolve().parent.parent / "data" / "foods.csv"
+
+_UNITS: dict[str, float | None] = {
+    # Grams per unit; None means one portion of the food
+    "g": 1, "gr": 1, "gram": 1, "grams": 1, "г": 1, "гр": 1,
+    "kg": 1000, "кг": 1000,
+    "ml": 1, "мл": 1,
+    "l": 1000, "л": 1000,
+    "pc": None, "pcs": None, "x": None, "шт": None,
+}
+_UNIT = "|".join(sorted(map(re.escape, _UNITS), key=len, reverse=True))
+_NUMBER = r"\d+(?:[.,]\d+)?"
+_LEADING = re.compile(rf"^(?P<qty>{_NUMBER})\s*(?:(?P<unit>{_UNIT})\.?(?=\s|$))?\s*(?P<name>.+)$")
+_TRAILING = re.compile(rf"^(?P<name>.+?)\s+(?P<qty>{_NUMBER})\s*(?:(?P<unit>{_UNIT})\.?)?$")
+# A comma between digits is a decimal point ("0,5 л")
+_SEPARATORS = re.compile(r"[;+\n]|(?<!\d),|,(?!\d)|\s(?:and|with|і|й|та|з)\s")
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_food(name: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", name.lower()).split())
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(left: set[str], right: set[str]) -> float:
+    return 2 * len(left & right) / (len(left) + len(right))
+
+
+def covers(key: str, query: str, similarity: float) -> bool:
+    """
+    Whether every word of the query matches a word of the key, allowing
+    typos: "chiken breast" is covered by "chicken breast", "chicken soup"
+    is not.
+    """
+    key_words = [trigrams(word) for word in key.split()]
+    return all(
+        any(dice(trigrams(word), other) >= similarity for other in key_words)
+        for word in query.split()
+    )
+
+
+@dataclass(frozen=True)
+class FoodItem:
+    """Nutrients per 100 g, plus the weight of one typical portion"""
+
+    name: str
+    kcal: float
+    protein: float
+    carbs: float
+    fat: float
+    portion_grams: float
+
+
+@dataclass(frozen=True)
+class MealItem:
+    """One food mentioned in a meal description, before it is resolved"""
+
+    text: str
+    name: str
+    quantity: float | None
+    # Grams per unit of quantity; None means portions of the food
+    unit_grams: float | None
+
+
+def parse_meal_text(text: str) -> list[MealItem]:
+    """
+    Splits a meal description into foods with quantities:
+    "2 eggs, 200 g buckwheat and coffee", "гречка 200г + кефір".
+    """
+    items: list[MealItem] = []
+    for part in _SEPARATORS.split(text.lower()):
+        part = part.strip(" .")
+        if not part:
+            continue
+        match = _LEADING.match(part) or _TRAILING.match(part)
+        if match is None:
+            items.append(MealItem(part, normalize_food(part), None, None))
+            continue
+        unit = match.group("unit")
+        items.append(MealItem(
+            text=part,
+            name=normalize_food(match.group("name")),
+            quantity=float(match.group("qty").replace(",", ".")),
+            unit_grams=_UNITS[unit] if unit else None,
+        ))
+    return [item for item in items if item.name]
+
+
+class NutritionTable:
+    """
+    In-memory food table with exact, prefix and fuzzy name lookup.
+
+    Names and aliases are normalized into one sorted key list: exact
+    matches are a dict lookup, prefixes a binary search. Fuzzy matches use
+    a trigram index scored by Dice similarity, counting shared trigrams
+    only over keys whose size can reach the threshold, and must match
+    every word of the query: a name that only shares some words ("apple"
+    for "apple pie") is left unresolved for the model to estimate.
+    """
+
+    def __init__(self, foods: Iterable[tuple[FoodItem, Iterable[str]]], min_similarity: float = 0.6):
+        self.min_similarity = min_similarity
+        self.foods: list[FoodItem] = []
+        keys: dict[str, int] = {}
+        for food, aliases in foods:
+            index = len(self.foods)
+            self.foods.append(food)
+            for name in (food.name, *aliases):
+                keys.setdefault(normalize_food(name), index)
+
+        self._exact = keys
+        self._keys = sorted(keys)
+        # Fuzzy ids are ordered by trigram count, so each posting list is too
+        # and the candidates of a plausible size are one slice of it
+        self._fuzzy_keys = sorted(keys, key=lambda key: (len(trigrams(key)), key))
+        self._fuzzy_sizes = [len(trigrams(key)) for key in self._fuzzy_keys]
+        postings: defaultdict[str, list[int]] = defaultdict(list)
+        for position, key in enumerate(self._fuzzy_keys):
+            for gram in trigrams(key):
+                postings[gram].append(position)
+        self._postings = dict(postings)
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+    def lookup(self, name: str) -> FoodItem | None:
+        query = normalize_food(name)
+        if not query:
+            return None
+        index = self._exact.get(query)
+        if index is not None:
+            return self.foods[index]
+        return self._by_prefix(query) or self._fuzzy(query)
+
+    def _by_prefix(self, query: str) -> FoodItem | None:
+        """The shortest name starting with a query of at least four characters"""
+        if len(query) < 4:
+            return None
+        start = bisect.bisect_left(self._keys, query)
+        best: str | None = None
+        for key in self._keys[start : start + 32]:
+            if not key.startswith(query):
+                break
+            if best is None or len(key) < len(best):
+                best = key
+        return self.foods[self._exact[best]] if best is not None else None
+
+    def _fuzzy(self, query: str) -> FoodItem | None:
+        grams = trigrams(query)
+        similarity = self.min_similarity
+        # Dice >= s bounds both the shared trigram count and the key's own
+        # trigram count; keys outside those sizes are never counted
+        needed = similarity * len(grams) / (2 - similarity)
+        first = bisect.bisect_left(self._fuzzy_sizes, math.ceil(needed - 1e-9))
+        last = bisect.bisect_right(self._fuzzy_sizes, math.floor((2 - similarity) * len(grams) / similarity + 1e-9))
+
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting:
+                shared.update(posting[bisect.bisect_left(posting, first) : bisect.bisect_left(posting, last)])
+
+        candidates: list[tuple[float, int]] = []
+        for position, count in shared.items():
+            if count < needed:
+                continue
+            score = 2 * count / (len(grams) + self._fuzzy_sizes[position])
+            if score >= similarity:
+                candidates.append((-score, position))
+        for _, position in sorted(candidates):
+            key = self._fuzzy_keys[position]
+            if covers(key, query, similarity):
+                return self.foods[self._exact[key]]
+        return None
+
+
+def load_foods(path: Path = FOODS_PATH) -> list[tuple[FoodItem, list[str]]]:
+    with path.open(encoding="utf-8", newline="") as file:
+        return [
+            (
+                FoodItem(
+                    name=row["name"],
+                    kcal=float(row["kcal"]),
+                    protein=float(row["protein"]),
+                    carbs=float(row["carbs"]),
+                    fat=float(row["fat"]),
+                    portion_grams=float(row["portion_grams"]),
+                ),
+                [alias for alias in row["aliases"].split("|") if alias],
+            )
+            for row in csv.DictReader(file)
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_nutrition_table() -> NutritionTable:
+    """The bundled food table, loaded on first use"""
+    return NutritionTable(load_foods())
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ai_types import MACRO_KEYS, PhotoAnalysisResult
+from app.core.config import settings
+from app.core.images import hamming_distance
+from app.db.models import HealthLog, Meal
+
+
+@dataclass
+class PhotoMatch:
+    """A previously logged photo close enough to reuse its analysis"""
+
+    analysis: PhotoAnalysisResult
+    timestamp: datetime
+    distance: int
+
+
+def _meal_analysis(meal: Meal) -> PhotoAnalysisResult:
+    macros = meal.macros or {}
+    return {
+        "type": "food",
+        "confidence": "high",
+        "reasoning": "Same photo as an earlier meal",
+        "food": {
+            "description": meal.description or "",
+            "calories": meal.calories or 0.0,
+            "macros": {key: int(macros.get(key, 0)) for key in MACRO_KEYS},
+        },
+        "workout": None,
+        "health": None,
+    }
+
+
+def _health_analysis(entry: HealthLog) -> PhotoAnalysisResult:
+    return {
+        "type": "health",
+        "confidence": "high",
+        "reasoning": "Same photo as an earlier health log",
+        "food": None,
+        "workout": None,
+        "health": {
+            "category": entry.category,
+            "data": entry.data or {},
+            "description": entry.description or "",
+        },
+    }
+
+
+class PhotoService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def find_duplicate(
+        self,
+        user_id: int,
+        image_hash: int,
+        max_distance: int | None = None,
+        window: timedelta | None = None,
+    ) -> PhotoMatch | None:
+        """
+        Finds the closest photo the user logged within the window, by
+        Hamming distance between dHashes. A user logs a handful of photos
+        a day, so the hashed rows in the window are compared in Python.
+        """
+        if max_distance is None:
+            max_distance = settings.PHOTO_DUPLICATE_MAX_DISTANCE
+        since = datetime.now(timezone.utc) - (window or timedelta(hours=settings.PHOTO_DUPLICATE_WINDOW_HOURS))
+
+        meals = await self.db.execute(
+            select(Meal).where(Meal.user_id == user_id, Meal.image_hash.is_not(None), Meal.timestamp >= since)
+        )
+        health = await self.db.execute(
+            select(HealthLog).where(
+                HealthLog.user_id == user_id,
+                HealthLog.image_hash.is_not(None),
+                HealthLog.timestamp >= since,
+            )
+        )
+        candidates = [
+            *((meal.image_hash, meal.timestamp, _meal_analysis(meal)) for meal in meals.scalars()),
+            *((entry.image_hash, entry.timestamp, _health_analysis(entry)) for entry in health.scalars()),
+        ]
+
+        best: PhotoMatch | None = None
+        for candidate_hash, timestamp, analysis in candidates:
+            if candidate_hash is None:
+                continue
+            distance = hamming_distance(image_hash, candidate_hash)
+            if distance > max_distance:
+                continue
+            # Closest wins, then the most recent
+            if best is None or (distance, -timestamp.timestamp()) < (best.distance, -best.timestamp.timestamp()):
+                best = PhotoMatch(analysis, timestamp, distance)
+        return best
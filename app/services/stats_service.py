@@ -1,6 +1,6 @@
 from datetime import date, datetime, timedelta
 
-from sqlalchemy import func, select
+from sqlalchemy import Date, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Meal, Workout
@@ -43,17 +43,44 @@ class StatsService:
         }
 
     async def get_history(self, user_id: int, days: int = 7) -> list[StatsSummaryItem]:
-        # This approach is inefficient (N+1 queries), but simple for MVP.
-        # Better: Group by date in SQL.
-        # SQLite support for date grouping can be tricky with timezone aware datetimes, 
-        # but let's try a loop for the last N days for simplicity and reliability now.
-        
-        history: list[StatsSummaryItem] = []
+        """
+        Daily summaries for the last `days` days, newest first. One grouped
+        query per table covers the whole range, bucketed on the same
+        calendar day get_daily_summary matches; days without entries are
+        filled with zeros here.
+        """
+        if days <= 0:
+            return []
         today = datetime.now().date()
-        
+        start = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+        end = datetime.combine(today, datetime.max.time())
+
+        meal_day = func.date(Meal.timestamp, type_=Date)
+        meal_result = await self.db.execute(
+            select(meal_day, func.sum(Meal.calories))
+            .where(Meal.user_id == user_id, Meal.timestamp >= start, Meal.timestamp <= end)
+            .group_by(meal_day)
+        )
+        calories: dict[date, float] = {day: total or 0 for day, total in meal_result}
+
+        workout_day = func.date(Workout.timestamp, type_=Date)
+        workout_result = await self.db.execute(
+            select(workout_day, func.count(Workout.id), func.sum(Workout.duration_minutes))
+            .where(Workout.user_id == user_id, Workout.timestamp >= start, Workout.timestamp <= end)
+            .group_by(workout_day)
+        )
+        workouts: dict[date, tuple[int, int]] = {
+            day: (count, duration or 0) for day, count, duration in workout_result
+        }
+
+        history: list[StatsSummaryItem] = []
         for i in range(days):
             day = today - timedelta(days=i)
-            stats = await self.get_daily_summary(user_id, day)
-            history.append(stats)
-            
+            count, duration = workouts.get(day, (0, 0))
+            history.append({
+                "date": day.isoformat(),
+                "calories": int(calories.get(day, 0)),
+                "workout_count": count,
+                "workout_duration": duration,
+            })
         return history
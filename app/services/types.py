@@ -1,4 +1,5 @@
-from typing import TypedDict
+from datetime import datetime
+from typing import Any, NotRequired, TypedDict
 
 
 class StatsSummaryItem(TypedDict):
@@ -11,3 +12,32 @@ class StatsSummaryItem(TypedDict):
 class WeightHistoryItemData(TypedDict):
     date: str
     weight: float
+
+
+# Rows for the bulk inserts; a missing timestamp means now
+class MealRowData(TypedDict):
+    user_id: int
+    description: str
+    calories: float
+    macros: dict[str, int]
+    photo_url: NotRequired[str | None]
+    timestamp: NotRequired[datetime | None]
+
+
+class WorkoutRowData(TypedDict):
+    user_id: int
+    description: str
+    duration_minutes: NotRequired[int | None]
+    intensity: NotRequired[str | None]
+    activity_type: NotRequired[str | None]
+    metrics: NotRequired[dict[str, Any] | None]
+    timestamp: NotRequired[datetime | None]
+
+
+class HealthLogRowData(TypedDict):
+    user_id: int
+    category: str
+    description: NotRequired[str | None]
+    data: NotRequired[dict[str, object] | None]
+    photo_url: NotRequired[str | None]
+    timestamp: NotRequired[datetime | None]
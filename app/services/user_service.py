@@ -2,6 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import User
+from app.services.context_cache import user_context_cache
 
 class UserService:
     def __init__(self, db: AsyncSession):
@@ -30,6 +31,7 @@ class UserService:
         self.db.add(new_user)
         await self.db.commit()
         await self.db.refresh(new_user)
+        user_context_cache.invalidate(telegram_id, "profile")
         return new_user
 
     async def update_user(
@@ -52,5 +54,6 @@ class UserService:
             
             await self.db.commit()
             await self.db.refresh(user)
+            user_context_cache.invalidate(telegram_id, "profile")
             return user
         return None
@@ -1,9 +1,14 @@
+from collections.abc import Sequence
+from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Workout
+from app.services.context_cache import user_context_cache
+from app.services.pagination import Cursor, before
+from app.services.types import WorkoutRowData
 
 class WorkoutService:
     def __init__(self, db: AsyncSession):
@@ -29,10 +34,39 @@ class WorkoutService:
         self.db.add(workout)
         await self.db.commit()
         await self.db.refresh(workout)
+        user_context_cache.invalidate(user_id, "workouts", "today")
         return workout
 
-    async def get_workouts(self, user_id: int, limit: int = 10) -> list[Workout]:
-        stmt = select(Workout).where(Workout.user_id == user_id).order_by(Workout.timestamp.desc()).limit(limit)
+    async def create_workouts(self, workouts: Sequence[WorkoutRowData]) -> list[int]:
+        """Batched insert in one transaction, see MealService.create_meals"""
+        if not workouts:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "user_id": workout["user_id"],
+                "description": workout["description"],
+                "duration_minutes": workout.get("duration_minutes"),
+                "intensity": workout.get("intensity"),
+                "activity_type": workout.get("activity_type"),
+                "metrics": workout.get("metrics"),
+                "timestamp": workout.get("timestamp") or now,
+            }
+            for workout in workouts
+        ]
+        result = await self.db.execute(insert(Workout).returning(Workout.id, sort_by_parameter_order=True), rows)
+        ids = list(result.scalars())
+        await self.db.commit()
+        for user_id in {workout["user_id"] for workout in workouts}:
+            user_context_cache.invalidate(user_id, "workouts", "today")
+        return ids
+
+    async def get_workouts(self, user_id: int, limit: int = 10, after: Cursor | None = None) -> list[Workout]:
+        """Newest workouts first, continuing past `after` when given"""
+        stmt = select(Workout).where(Workout.user_id == user_id)
+        if after is not None:
+            stmt = stmt.where(before(Workout.timestamp, Workout.id, after))
+        stmt = stmt.order_by(Workout.timestamp.desc(), Workout.id.desc()).limit(limit)
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
@@ -0,0 +1,70 @@
+"""
+Compares logging N meals one POST /api/meals at a time against sending
+them to POST /api/meals/bulk in batches, on a fresh SQLite file database.
+
+The per-row path commits and refreshes every meal; the bulk path inserts
+each batch with one executemany-style INSERT ... RETURNING and one commit.
+
+Run with: python -m benchmarks.bench_bulk_insert --meals 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_directory.name}/bench.db"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.db.database import engine  # noqa: E402
+from app.db.models import Base  # noqa: E402
+from app.main import app  # noqa: E402
+from app.schemas.bulk import BULK_MAX_ITEMS  # noqa: E402
+
+
+def meal(user_id: int, index: int) -> dict[str, object]:
+    return {
+        "user_id": user_id,
+        "description": f"Meal {index}",
+        "calories": 300 + index % 500,
+        "macros": {"protein": 20, "carbs": 40, "fat": 10},
+    }
+
+
+async def run(meals: int, batch: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        for index in range(meals):
+            response = await client.post("/api/meals", json=meal(1, index))
+            response.raise_for_status()
+        per_row = time.perf_counter() - start
+
+        payload = [meal(2, index) for index in range(meals)]
+        start = time.perf_counter()
+        for offset in range(0, meals, batch):
+            response = await client.post("/api/meals/bulk", json=payload[offset:offset + batch])
+            response.raise_for_status()
+        bulk = time.perf_counter() - start
+    await engine.dispose()
+
+    print(f"per-row  {meals} meals  {per_row:7.3f}s  {meals / per_row:9.0f} rows/s")
+    print(f"bulk     {meals} meals  {bulk:7.3f}s  {meals / bulk:9.0f} rows/s  (batches of {batch})")
+    print(f"speedup  {per_row / bulk:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meals", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=BULK_MAX_ITEMS)
+    args = parser.parse_args()
+    asyncio.run(run(args.meals, min(args.batch, BULK_MAX_ITEMS)))
+
+
+if __name__ == "__main__":
+    main()
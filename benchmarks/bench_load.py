@@ -0,0 +1,72 @@
+"""
+Load-tests /api/analyze/auto through the full wrapper stack against the
+mock AI provider and reports throughput, tail latency and status codes.
+
+Mock latency, error and 429 settings come from the MOCK_* environment
+variables, so runs are reproducible and cost no provider quota, e.g.:
+
+    MOCK_RATE_LIMIT_RATE=0.01 python -m benchmarks.bench_load --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+
+os.environ["AI_PROVIDER"] = "mock"
+# Every upload is unique, so the cache would only add disk writes
+os.environ.setdefault("AI_CACHE_ENABLED", "false")
+# Payloads are not real images
+os.environ.setdefault("IMAGE_PREPROCESS_ENABLED", "false")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+async def run(requests: int, concurrency: int) -> None:
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(index)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                index = queue.get_nowait()
+                # A JPEG signature gets past the upload check; the mock never decodes it
+                files = {"file": (f"{index}.jpg", b"\xff\xd8\xff\xe0" + f"photo-{index}".encode(), "image/jpeg")}
+                start = time.perf_counter()
+                response = await client.post("/api/analyze/auto", files=files)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{requests} requests, concurrency {concurrency}, {elapsed:.1f}s")
+    print(f"throughput  {requests / elapsed:8.1f} req/s")
+    print(f"p50         {quantiles[49] * 1000:8.0f} ms")
+    print(f"p95         {quantiles[94] * 1000:8.0f} ms")
+    print(f"p99         {quantiles[98] * 1000:8.0f} ms")
+    print(f"max         {latencies[-1] * 1000:8.0f} ms")
+    print("statuses    " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Reports lookup latency of the nutrition table on a synthetic 100k-item
+table (the bundled foods plus generated variants like "smoked chicken
+breast with herbs"), by query class, and the cost of resolving a whole
+meal description.
+
+Run with: python -m benchmarks.bench_nutrition_lookup [--items 100000]
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from app.services.nutrition_table import FoodItem, NutritionTable, load_foods, parse_meal_text
+
+PREPARATIONS = ["", "boiled", "baked", "grilled", "fried", "smoked", "steamed", "raw", "roasted", "stewed",
+                "homemade", "organic", "frozen", "canned", "dried", "low fat", "spicy", "sweet", "salted", "fresh"]
+EXTRAS = ["", "with herbs", "with garlic", "with cheese", "with sauce", "with butter", "with honey",
+          "in tomato sauce", "with lemon", "with pepper", "brand a", "brand b", "brand c", "light", "classic",
+          "premium", "mini", "family pack", "kids", "extra"]
+
+
+def build_foods(count: int) -> list[tuple[FoodItem, list[str]]]:
+    bundled = load_foods()
+    foods = list(bundled)
+    combinations = itertools.product(PREPARATIONS, [food for food, _ in bundled], EXTRAS)
+    # The product has ~39k names; numbered series ("... 2") make up the rest
+    for index, (preparation, base, extra) in enumerate(itertools.islice(itertools.cycle(combinations), count)):
+        if len(foods) >= count:
+            break
+        series = index // (len(PREPARATIONS) * len(bundled) * len(EXTRAS))
+        suffix = f" {series + 1}" if series else ""
+        name = " ".join(part for part in (preparation, base.name, extra) if part) + suffix
+        foods.append((FoodItem(name, base.kcal, base.protein, base.carbs, base.fat, base.portion_grams), []))
+    return foods
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    position = rng.randrange(1, len(name))
+    return name[:position] + name[position + 1 :]
+
+
+def timed(table: NutritionTable, queries: list[str]) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        result = table.lookup(query)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+        found += result is not None
+    return latencies, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    bundled = len(load_foods())
+    foods = build_foods(args.items)
+    start = time.perf_counter()
+    table = NutritionTable(foods)
+    print(f"items={len(table):,} build={time.perf_counter() - start:.2f}s")
+
+    common = [food.name for food, _ in foods[:bundled]] + [alias for _, aliases in foods[:bundled] for alias in aliases]
+    names = [food.name for food, _ in foods]
+    classes = {
+        "exact (common)": [rng.choice(common) for _ in range(args.queries)],
+        "exact (variant)": [rng.choice(names) for _ in range(args.queries)],
+        "prefix": [rng.choice(names)[:6] for _ in range(args.queries)],
+        "misspelled": [misspell(rng.choice(common), rng) for _ in range(args.queries)],
+        "unknown": [f"xq{rng.randrange(10**6)}zv" for _ in range(args.queries)],
+    }
+    print(f"{'query':<18}{'found':>8}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for label, queries in classes.items():
+        latencies, found = timed(table, queries)
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"{label:<18}{found / len(queries):>8.0%}{statistics.median(latencies):>10.1f}{p99:>10.1f}{max(latencies):>10.1f}")
+
+    meal = "2 eggs, 200 g buckwheat, toast with butter and coffee"
+    start = time.perf_counter()
+    for _ in range(1_000):
+        for item in parse_meal_text(meal):
+            table.lookup(item.name)
+    print(f"full meal: {(time.perf_counter() - start) * 1000:.1f} us per description ({meal!r})")
+
+
+if __name__ == "__main__":
+    main()
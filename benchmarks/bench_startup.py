@@ -0,0 +1,78 @@
+"""
+Reports cold-start cost of the API process: import time of app.main, time to
+the first answered request, and the one-off cost of building the AI client.
+
+Each run is a fresh interpreter, as for a new worker or autoscaled replica.
+
+Run with: python -m benchmarks.bench_startup
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+RUNS = 5
+
+PROBE = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from httpx import ASGITransport, AsyncClient
+
+async def first_request():
+    transport = ASGITransport(app=app.main.app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/api/health")
+        response.raise_for_status()
+
+asyncio.run(first_request())
+answered = time.perf_counter()
+
+loaded = [name for name in ("google.genai", "openai", "aiogram", "PIL") if name in sys.modules]
+
+from app.core.ai import get_ai
+get_ai()
+built = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - start,
+    "first_request": answered - start,
+    "ai_client": built - answered,
+    "loaded": loaded,
+}))
+"""
+
+
+def run_probe() -> dict[str, Any]:
+    env = dict(os.environ)
+    # Building the client only needs a key to be present, no request is sent
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    samples = [run_probe() for _ in range(RUNS)]
+
+    print(f"{'phase':<28}{'median ms':>12}{'max ms':>10}")
+    for key, label in [
+        ("import", "import app.main"),
+        ("first_request", "first /api/health answered"),
+        ("ai_client", "first get_ai() (lazy)"),
+    ]:
+        values = [float(sample[key]) * 1000 for sample in samples]
+        print(f"{label:<28}{statistics.median(values):>12.1f}{max(values):>10.1f}")
+
+    print(f"\nSDKs loaded before first AI use: {samples[0]['loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
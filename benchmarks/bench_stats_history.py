@@ -0,0 +1,80 @@
+"""
+Times StatsService.get_history against the previous per-day loop (one
+get_daily_summary, i.e. two queries, per day) on a SQLite file database
+seeded with a year of meals and workouts for several users.
+
+Run with: python -m benchmarks.bench_stats_history --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_directory.name}/bench.db"
+
+from app.db.database import AsyncSessionLocal, engine  # noqa: E402
+from app.db.models import Base, Meal, Workout  # noqa: E402
+from app.services.stats_service import StatsService  # noqa: E402
+from app.services.types import StatsSummaryItem  # noqa: E402
+
+USERS = 20
+SEEDED_DAYS = 400
+
+
+async def seed() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.now()
+    async with AsyncSessionLocal() as session:
+        for user_id in range(1, USERS + 1):
+            for days_ago in range(SEEDED_DAYS):
+                day = now - timedelta(days=days_ago)
+                session.add_all(
+                    Meal(user_id=user_id, timestamp=day.replace(hour=hour), calories=400 + hour, macros={})
+                    for hour in (8, 13, 19)
+                )
+                session.add(Workout(user_id=user_id, timestamp=day.replace(hour=7), description="Run", duration_minutes=30))
+        await session.commit()
+
+
+async def per_day(service: StatsService, days: int) -> list[StatsSummaryItem]:
+    today = datetime.now().date()
+    return [await service.get_daily_summary(1, today - timedelta(days=i)) for i in range(days)]
+
+
+async def time_ms(call: Callable[[], Awaitable[object]], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def run(repeat: int) -> None:
+    await seed()
+    print(f"{'days':>5} {'per-day loop':>14} {'grouped':>10}")
+    async with AsyncSessionLocal() as session:
+        service = StatsService(session)
+        for days in (7, 30, 90, 365):
+            assert await service.get_history(1, days) == await per_day(service, days)
+            loop = await time_ms(lambda: per_day(service, days), repeat)
+            grouped = await time_ms(lambda: service.get_history(1, days), repeat)
+            print(f"{days:>5} {loop:>11.2f} ms {grouped:>7.2f} ms")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measures peak RSS while a burst of large photo uploads hits the API.
+
+Each scenario runs in a fresh process so its peak is its own:
+
+    buffered   the previous handler: `await file.read()` of the whole upload
+    capped     /api/analyze/food, uploads within UPLOAD_MAX_BYTES
+    oversized  /api/analyze/food, uploads over the cap (413 from the declared Content-Length)
+    chunked    /api/analyze/food, uploads over the cap with no Content-Length
+               (413 once the body received passes the cap)
+
+Run with: python -m benchmarks.bench_upload_memory --uploads 16 --size-mb 40
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+
+os.environ["AI_PROVIDER"] = "mock"
+os.environ.setdefault("MOCK_LATENCY_MEDIAN_SECONDS", "0.05")
+os.environ.setdefault("MOCK_LATENCY_P99_SECONDS", "0.1")
+os.environ.setdefault("AI_CACHE_ENABLED", "false")
+# Payloads are not decodable images
+os.environ.setdefault("IMAGE_PREPROCESS_ENABLED", "false")
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0"
+# Chunk size of the streamed bodies sent without a Content-Length
+CHUNK_BYTES = 64 * 1024
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_scenario(scenario: str, uploads: int, size: int, results: "multiprocessing.Queue[str]") -> None:
+    from fastapi import UploadFile
+    from httpx import ASGITransport, AsyncClient
+
+    from app.main import app
+
+    @app.post("/bench/buffered")
+    async def buffered(file: UploadFile) -> dict[str, int]:
+        content = await file.read()
+        # Keep the upload alive for as long as a model call would
+        await asyncio.sleep(0.05)
+        return {"size": len(content)}
+
+    path = "/bench/buffered" if scenario == "buffered" else "/api/analyze/food"
+    # One payload object shared by every request, so the client adds no copies
+    payload = JPEG_HEADER + os.urandom(size - len(JPEG_HEADER))
+
+    async def chunked_body(index: int) -> AsyncIterator[bytes]:
+        yield (
+            f'--bench\r\nContent-Disposition: form-data; name="file"; filename="{index}.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode()
+        for offset in range(0, len(payload), CHUNK_BYTES):
+            yield payload[offset:offset + CHUNK_BYTES]
+        yield b"\r\n--bench--\r\n"
+
+    async def burst() -> Counter[int]:
+        statuses: Counter[int] = Counter()
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            async def upload(index: int) -> None:
+                if scenario == "chunked":
+                    response = await client.post(
+                        path,
+                        content=chunked_body(index),
+                        headers={"Content-Type": "multipart/form-data; boundary=bench"},
+                    )
+                else:
+                    files = {"file": (f"{index}.jpg", payload, "image/jpeg")}
+                    response = await client.post(path, files=files)
+                statuses[response.status_code] += 1
+
+            await asyncio.gather(*(upload(index) for index in range(uploads)))
+        return statuses
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    statuses = asyncio.run(burst())
+    elapsed = time.perf_counter() - start
+    codes = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+    results.put(
+        f"{scenario:<10} {size / 2**20:6.1f} MB x {uploads:<3} peak RSS +{peak_rss_mb() - before:7.1f} MB"
+        f"  {elapsed:5.2f}s  ({codes})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--size-mb", type=float, default=40.0, help="size of each oversized upload")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+
+    oversized = int(args.size_mb * 2**20)
+    # Within the cap, leaving room for the multipart framing
+    capped = settings.UPLOAD_MAX_BYTES - 4096
+    context = multiprocessing.get_context("spawn")
+    results: multiprocessing.Queue[str] = context.Queue()
+    scenarios = (("buffered", oversized), ("capped", capped), ("oversized", oversized), ("chunked", oversized))
+    for scenario, size in scenarios:
+        process = context.Process(target=run_scenario, args=(scenario, args.uploads, size, results))
+        process.start()
+        process.join()
+        print(results.get())
+
+
+if __name__ == "__main__":
+    main()
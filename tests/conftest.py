@@ -3,6 +3,9 @@ import pytest_asyncio
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
+from app.db.models import Base
+from app.services.context_cache import user_context_cache
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -28,3 +31,18 @@ async def test_db_session(test_db_engine):
     )
     async with async_session() as session:
         yield session
+
+
+@pytest_asyncio.fixture
+async def test_db_with_tables(test_db_engine, test_db_session):
+    async with test_db_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield test_db_session
+
+
+@pytest.fixture(autouse=True)
+def clear_user_context_cache():
+    # Snapshots are per process; keep one test's users out of the next
+    user_context_cache.clear()
+    yield
+    user_context_cache.clear()
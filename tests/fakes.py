@@ -0,0 +1,77 @@
+import asyncio
+from collections import Counter
+
+from app.core.ai_base import AIProvider
+from app.core.ai_types import (
+    ClassificationResult,
+    FoodAnalysisResult,
+    HealthAnalysisResult,
+    WorkoutAnalysisResult,
+)
+
+
+class FakeAIProvider(AIProvider):
+    """In-process provider with canned results, call counting and optional latency"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        model_name: str = "fake-model",
+        error: Exception | None = None,
+    ):
+        self.latency = latency
+        self.model_name = model_name
+        self.error = error
+        self.calls: Counter[str] = Counter()
+        self.cancelled = 0
+        self.started = asyncio.Event()
+
+    async def _call(self, task: str) -> None:
+        self.calls[task] += 1
+        self.started.set()
+        if self.latency:
+            try:
+                await asyncio.sleep(self.latency)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        if self.error is not None:
+            raise self.error
+
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        await self._call("classify")
+        return {"type": "food", "confidence": "high", "reasoning": "a plate"}
+
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        await self._call("food")
+        return {
+            "description": "Pasta",
+            "calories": 550.0,
+            "macros": {"protein": 20, "carbs": 80, "fat": 15},
+        }
+
+    async def analyze_food_text(self, description: str) -> FoodAnalysisResult:
+        await self._call("food_text")
+        return {"description": description, "calories": 250.0, "macros": {"protein": 10, "carbs": 30, "fat": 8}}
+
+    async def analyze_workout_image(self, image_bytes: bytes) -> WorkoutAnalysisResult:
+        await self._call("workout")
+        return {
+            "activity": "Running",
+            "duration_minutes": 30,
+            "distance_km": 5.0,
+            "calories": 300.0,
+            "metrics": {},
+        }
+
+    async def analyze_health_image(self, image_bytes: bytes) -> HealthAnalysisResult:
+        await self._call("health")
+        return {"category": "weight", "data": {"weight": 80.0}, "description": "Scale"}
+
+    async def chat(self, user_message: str, context: str | None = None) -> str:
+        await self._call("chat")
+        return f"echo: {user_message}"
+
+    async def summarize(self, prompt: str) -> str:
+        await self._call("summarize")
+        return "summary"
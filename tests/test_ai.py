@@ -1,6 +1,11 @@
+import os
+import subprocess
+import sys
+
 import pytest
-from app.core.ai import get_ai_client
+from app.core.ai import get_ai, get_ai_client
 from app.core.config import settings
+from tests.fakes import FakeAIProvider
 
 
 def test_ai_factory_returns_gemini():
@@ -11,3 +16,33 @@ def test_ai_factory_returns_gemini():
     if settings.AI_PROVIDER == "gemini":
         from app.core.ai_gemini import GeminiAI
         assert isinstance(ai, GeminiAI)
+
+
+def test_importing_the_api_does_not_build_an_ai_client():
+    """The API imports without BOT_TOKEN and leaves provider SDKs and Pillow unloaded"""
+    code = (
+        "import sys, app.main, app.core.ai as ai; "
+        "assert ai._ai_client is None; "
+        "assert 'google.genai' not in sys.modules and 'openai' not in sys.modules; "
+        "assert 'aiogram' not in sys.modules and 'PIL' not in sys.modules"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "BOT_TOKEN"}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+
+def test_get_ai_builds_client_once(monkeypatch):
+    monkeypatch.setattr("app.core.ai._ai_client", None)
+    monkeypatch.setattr(settings, "AI_PROVIDER", "gemini")
+    monkeypatch.setattr(settings, "GEMINI_FAST_MODEL", "fast-model")
+    monkeypatch.setattr(settings, "AI_TIER_ROUTING_ENABLED", True)
+    built: list[FakeAIProvider] = []
+
+    def build(provider_name: str | None = None, model: str | None = None) -> FakeAIProvider:
+        built.append(FakeAIProvider(model_name=model or "main-model"))
+        return built[-1]
+
+    monkeypatch.setattr("app.core.ai.get_ai_client", build)
+
+    assert get_ai() is get_ai()
+    # One client per model tier
+    assert [provider.model_name for provider in built] == ["main-model", "fast-model"]
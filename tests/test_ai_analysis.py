@@ -1,6 +1,6 @@
 import pytest
 from app.core.ai_gemini import GeminiAI
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 @pytest.mark.asyncio
 async def test_analyze_workout_image():
@@ -9,13 +9,15 @@ async def test_analyze_workout_image():
         mock_client_instance = MockClient.return_value
         mock_response = MagicMock()
         mock_response.text = """
-        Activity: Running
-        Duration: 30
-        Distance: 5.0
-        Calories: 300
-        Metrics: {"pace": "6:00 min/km"}
+        {
+            "activity": "Running",
+            "duration_minutes": 30,
+            "distance_km": 5.0,
+            "calories": 300,
+            "metrics": {"pace": "6:00 min/km"}
+        }
         """
-        mock_client_instance.models.generate_content.return_value = mock_response
+        mock_client_instance.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
         ai = GeminiAI()
         # Mocking the client again purely to ensure it's the one we expect if __init__ creates it
@@ -29,3 +31,143 @@ async def test_analyze_workout_image():
         assert result["distance_km"] == 5.0
         assert result["calories"] == 300
         assert result["metrics"]["pace"] == "6:00 min/km"
+
+
+@pytest.mark.asyncio
+async def test_classify_and_analyze_uses_single_call():
+    with patch('google.genai.Client') as MockClient:
+        mock_client_instance = MockClient.return_value
+        mock_response = MagicMock()
+        mock_response.text = """
+        {
+            "type": "food",
+            "confidence": "high",
+            "reasoning": "A bowl of oatmeal",
+            "food": {
+                "description": "Oatmeal with berries",
+                "calories": 350,
+                "macros": {"protein": 12, "carbs": 60, "fat": 7}
+            },
+            "workout": null,
+            "health": null
+        }
+        """
+        mock_client_instance.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+
+        result = await ai.classify_and_analyze(b"fake_image_bytes")
+
+        assert mock_client_instance.aio.models.generate_content.await_count == 1
+        assert result["type"] == "food"
+        assert result["confidence"] == "high"
+        assert result["food"] is not None
+        assert result["food"]["calories"] == 350
+        assert result["food"]["macros"]["carbs"] == 60
+        assert result["workout"] is None
+
+
+@pytest.mark.asyncio
+async def test_classify_and_analyze_falls_back_to_second_call():
+    with patch('google.genai.Client') as MockClient:
+        mock_client_instance = MockClient.return_value
+        combined = MagicMock()
+        combined.text = (
+            '{"type": "workout", "confidence": "high", "reasoning": "Strava screenshot", '
+            '"food": null, "workout": null, "health": null}'
+        )
+        detailed = MagicMock()
+        detailed.text = (
+            '{"activity": "Cycling", "duration_minutes": 45, "distance_km": 20.5, '
+            '"calories": 500, "metrics": {}}'
+        )
+        mock_client_instance.aio.models.generate_content = AsyncMock(side_effect=[combined, detailed])
+
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+
+        result = await ai.classify_and_analyze(b"fake_image_bytes")
+
+        assert mock_client_instance.aio.models.generate_content.await_count == 2
+        assert result["workout"] is not None
+        assert result["workout"]["activity"] == "Cycling"
+
+
+@pytest.mark.asyncio
+async def test_default_classify_and_analyze_is_two_step():
+    from tests.fakes import FakeAIProvider
+
+    fake = FakeAIProvider()
+    result = await fake.classify_and_analyze(b"fake_image_bytes")
+
+    assert fake.calls["classify"] == 1
+    assert fake.calls["food"] == 1
+    assert result["food"] is not None
+    assert result["food"]["description"] == "Pasta"
+
+
+@pytest.mark.asyncio
+async def test_requests_schema_constrained_json():
+    with patch('google.genai.Client') as MockClient:
+        mock_client_instance = MockClient.return_value
+        mock_response = MagicMock()
+        mock_response.text = '{"type": "health", "confidence": "medium", "reasoning": "A scale"}'
+        mock_client_instance.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+
+        result = await ai.classify_photo(b"fake_image_bytes")
+
+        config = mock_client_instance.aio.models.generate_content.await_args_list[0].kwargs["config"]
+        assert config["response_mime_type"] == "application/json"
+        assert config["response_json_schema"]["properties"]["type"]["enum"] == [
+            "food", "workout", "health", "other"
+        ]
+        assert result["type"] == "health"
+
+
+@pytest.mark.asyncio
+async def test_unparseable_answer_gets_one_repair_retry():
+    from app.core.ai_schema import parse_failures, parse_repairs
+
+    with patch('google.genai.Client') as MockClient:
+        mock_client_instance = MockClient.return_value
+        drifted = MagicMock()
+        drifted.text = "Description: Salad\nCalories: 200"
+        repaired = MagicMock()
+        repaired.text = '{"description": "Salad", "calories": 200, "macros": {"protein": 5, "carbs": 10, "fat": 12}}'
+        mock_client_instance.aio.models.generate_content = AsyncMock(side_effect=[drifted, repaired])
+
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+        failures_before = parse_failures["food"]
+        repairs_before = parse_repairs["food"]
+
+        result = await ai.analyze_food_image(b"fake_image_bytes")
+
+        assert result["calories"] == 200
+        assert result["macros"]["fat"] == 12
+        assert parse_failures["food"] == failures_before + 1
+        assert parse_repairs["food"] == repairs_before + 1
+        repair_contents = mock_client_instance.aio.models.generate_content.await_args_list[1].kwargs["contents"]
+        assert "Description: Salad" in repair_contents
+
+
+@pytest.mark.asyncio
+async def test_second_unparseable_answer_raises():
+    from app.core.ai_schema import AIResponseParseError
+
+    with patch('google.genai.Client') as MockClient:
+        mock_client_instance = MockClient.return_value
+        missing_macros = MagicMock()
+        missing_macros.text = '{"description": "Salad", "calories": 200, "macros": {"protein": 5}}'
+        mock_client_instance.aio.models.generate_content = AsyncMock(return_value=missing_macros)
+
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+
+        with pytest.raises(AIResponseParseError):
+            await ai.analyze_food_image(b"fake_image_bytes")
+        assert mock_client_instance.aio.models.generate_content.await_count == 2
@@ -0,0 +1,121 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+from app.core.ai_cache import AnalysisCache, CachedAIProvider
+from tests.fakes import FakeAIProvider
+
+
+@pytest.mark.asyncio
+async def test_repeated_image_is_served_from_memory():
+    fake = FakeAIProvider()
+    ai = CachedAIProvider(fake, AnalysisCache())
+
+    first = await ai.analyze_food_image(b"photo")
+    second = await ai.analyze_food_image(b"photo")
+
+    assert first == second
+    assert fake.calls["food"] == 1
+    assert ai.cache.memory_hits == 1
+    assert ai.cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_key_includes_task_and_model():
+    fake = FakeAIProvider()
+    ai = CachedAIProvider(fake, AnalysisCache())
+
+    await ai.classify_photo(b"photo")
+    await ai.analyze_food_image(b"photo")
+    await ai.analyze_food_image(b"other photo")
+
+    assert fake.calls["classify"] == 1
+    assert fake.calls["food"] == 2
+    assert ai.cache_key("food", b"photo") != CachedAIProvider(
+        FakeAIProvider(model_name="bigger-model"), AnalysisCache()
+    ).cache_key("food", b"photo")
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_copies():
+    ai = CachedAIProvider(FakeAIProvider(), AnalysisCache())
+
+    first = await ai.analyze_food_image(b"photo")
+    first["macros"]["protein"] = 999
+    second = await ai.analyze_food_image(b"photo")
+
+    assert second["macros"]["protein"] == 20
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ai = CachedAIProvider(FakeAIProvider(), AnalysisCache(db_path=db_path))
+    await ai.analyze_workout_image(b"photo")
+    ai.cache.close()
+
+    fake = FakeAIProvider()
+    restarted = CachedAIProvider(fake, AnalysisCache(db_path=db_path))
+    result = await restarted.analyze_workout_image(b"photo")
+
+    assert result["activity"] == "Running"
+    assert fake.calls["workout"] == 0
+    assert restarted.cache.disk_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_by_entries_and_bytes():
+    cache = AnalysisCache(max_memory_entries=2)
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2})
+    await cache.set("c", {"v": 3})
+
+    assert await cache.get("a") is None
+    assert await cache.get("c") == {"v": 3}
+    assert cache.evictions == 1
+
+    small = AnalysisCache(max_memory_bytes=40)
+    await small.set("a", {"v": "x" * 20})
+    await small.set("b", {"v": "y" * 20})
+    assert await small.get("a") is None
+    assert await small.get("b") is not None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(max_memory_entries=1, db_path=str(tmp_path / "cache.db"), max_db_bytes=60)
+    await cache.set("a", {"v": "x" * 20})
+    await cache.set("b", {"v": "y" * 20})
+    await cache.set("c", {"v": "z" * 20})
+
+    assert await cache.get("a") is None
+    assert await cache.get("c") == {"v": "z" * 20}
+    assert cache.stats()["disk_bytes"] <= 60
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_runs_off_the_event_loop(tmp_path, monkeypatch):
+    cache = AnalysisCache(max_memory_entries=1, db_path=str(tmp_path / "cache.db"))
+    loop_thread = threading.get_ident()
+    connect = cache._connect
+    threads: list[int] = []
+
+    def tracking_connect():
+        threads.append(threading.get_ident())
+        return connect()
+
+    monkeypatch.setattr(cache, "_connect", tracking_connect)
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2})
+    assert await cache.get("a") == {"v": 1}
+    cache.close()
+
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+def test_importing_the_cache_does_not_load_pillow():
+    code = "import sys, app.core.ai_cache; assert 'PIL' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
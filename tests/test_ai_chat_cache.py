@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from app.core.ai_chat_cache import CachedChatAIProvider, ChatAnswerCache, is_standalone
+from tests.fakes import FakeAIProvider
+
+
+@pytest.mark.asyncio
+async def test_repeated_question_skips_the_model():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+
+    first = await ai.chat("How much protein should I eat?", context="User: goal: muscle gain")
+    second = await ai.chat("how much protein should i eat", context="User: goal: muscle gain")
+
+    assert first == second
+    assert fake.calls["chat"] == 1
+    assert ai.cache.exact_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_question_reuses_the_answer():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+
+    await ai.chat("how much protein should i eat")
+    await ai.chat("how much protein should i eat daily")
+    await ai.chat("what should i eat before a workout")
+    await ai.chat("what should i eat after a workout")
+
+    assert fake.calls["chat"] == 3
+    assert ai.cache.near_hits == 1
+    assert ai.cache.top_questions(1) == [("how much protein should i eat", 1)]
+
+
+@pytest.mark.asyncio
+async def test_answers_depend_on_the_profile():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+    question = "is running better than cycling"
+
+    await ai.chat(question, context="User: 25 years old")
+    await ai.chat(question, context="User: 25 years old")
+    await ai.chat(question, context="User: 60 years old")
+
+    assert fake.calls["chat"] == 2
+
+
+@pytest.mark.asyncio
+async def test_follow_ups_are_not_shared_across_conversations():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+    follow_up = "and what about tomorrow?"
+
+    await ai.chat(follow_up, context="User: 25 years old\n\nRecent conversation:\nUser: plan a leg day")
+    await ai.chat(follow_up, context="User: 25 years old\n\nRecent conversation:\nUser: what should I eat")
+
+    assert fake.calls["chat"] == 2
+    assert ai.cache.stats()["entries"] == 0
+
+
+def test_questions_tied_to_the_conversation_or_logs_are_not_standalone():
+    assert is_standalone("How much protein is in an egg?")
+    assert is_standalone("Скільки білка потрібно на день?")
+    assert not is_standalone("and what about dinner?")
+    assert not is_standalone("Is that too much sugar?")
+    assert not is_standalone("Did I eat enough protein today?")
+    assert not is_standalone("Скільки я з'їв сьогодні?")
+    assert not is_standalone("why?")
+
+
+@pytest.mark.asyncio
+async def test_short_follow_ups_are_not_cached():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+
+    await ai.chat("why?")
+    await ai.chat("why?")
+
+    assert fake.calls["chat"] == 2
+    assert ai.cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_summaries_bypass_the_answer_cache():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+
+    await ai.summarize("Update the running summary of a conversation")
+    await ai.summarize("Update the running summary of a conversation")
+
+    assert fake.calls["summarize"] == 2
+    assert fake.calls["chat"] == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_answer_is_cached_once_complete():
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+    question = "how much water should I drink"
+
+    streamed = [chunk async for chunk in ai.chat_stream(question)]
+    cached = [chunk async for chunk in ai.chat_stream(question)]
+
+    assert cached == ["".join(streamed)]
+    assert fake.calls["chat"] == 1
+
+
+def test_cache_expires_and_evicts(monkeypatch):
+    cache = ChatAnswerCache(max_entries=2, ttl=60)
+    for question in ("first question here", "second question here", "third question here"):
+        cache.set(question, "answer")
+
+    assert cache.evictions == 1
+    assert cache.get("first question here") is None
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.core.ai_chat_cache.time.monotonic", lambda: now + 120)
+    assert cache.get("third question here") is None
+    assert cache.expirations >= 1
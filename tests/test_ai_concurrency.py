@@ -0,0 +1,63 @@
+import asyncio
+import time
+import pytest
+from app.core.ai_gemini import GeminiAI
+from unittest.mock import MagicMock, patch
+
+CALL_LATENCY = 0.2
+
+
+def make_gemini(max_concurrency: int) -> GeminiAI:
+    async def slow_generate_content(**kwargs):
+        await asyncio.sleep(CALL_LATENCY)
+        response = MagicMock()
+        response.text = '{"type": "food", "confidence": "high", "reasoning": "plate of pasta"}'
+        return response
+
+    with patch('google.genai.Client'):
+        ai = GeminiAI(max_concurrency=max_concurrency)
+    ai.client = MagicMock()
+    ai.client.aio.models.generate_content = slow_generate_content
+    return ai
+
+
+@pytest.mark.asyncio
+async def test_concurrent_analyses_finish_in_about_one_call():
+    ai = make_gemini(max_concurrency=10)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(ai.classify_photo(b"img") for _ in range(10)))
+    elapsed = time.perf_counter() - start
+
+    assert all(result["type"] == "food" for result in results)
+    assert elapsed < CALL_LATENCY * 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_bounds_in_flight_calls():
+    ai = make_gemini(max_concurrency=2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ai.classify_photo(b"img") for _ in range(4)))
+    elapsed = time.perf_counter() - start
+
+    # 4 calls through 2 slots take two rounds
+    assert elapsed >= CALL_LATENCY * 2
+
+
+@pytest.mark.asyncio
+async def test_calls_do_not_block_event_loop():
+    ai = make_gemini(max_concurrency=1)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await ai.classify_photo(b"img")
+    task.cancel()
+
+    assert ticks >= 5
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+import pytest
+
+from app.core.ai_base import AITimeoutError, AITransientError, AIUnavailableError
+from app.core.ai_deadline import DeadlineAIProvider
+from app.core.ai_schema import AIResponseParseError
+from app.core.ai_types import FoodAnalysisResult
+from app.core.circuit_breaker import CircuitBreaker
+from tests.fakes import FakeAIProvider
+
+
+class StallingStream(FakeAIProvider):
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        yield "Hello"
+        await asyncio.sleep(1)
+        yield "never"
+
+
+class GarbledProvider(FakeAIProvider):
+    async def analyze_food_image(self, image_bytes: bytes) -> FoodAnalysisResult:
+        await self._call("food")
+        raise AIResponseParseError("food", "{not json", "invalid JSON")
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_cut_off_at_its_task_deadline():
+    inner = FakeAIProvider(latency=1.0)
+    ai = DeadlineAIProvider(inner, {"classify": 0.05}, default_deadline=5.0)
+
+    start = time.perf_counter()
+    with pytest.raises(AITimeoutError):
+        await ai.classify_photo(b"photo")
+
+    assert time.perf_counter() - start < 0.5
+    assert inner.cancelled == 1
+    assert ai.timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_the_provider():
+    inner = FakeAIProvider(error=AITransientError("503"))
+    ai = DeadlineAIProvider(inner, {}, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    for _ in range(2):
+        with pytest.raises(AITransientError):
+            await ai.chat("hi")
+    with pytest.raises(AIUnavailableError) as raised:
+        await ai.chat("hi")
+
+    assert inner.calls["chat"] == 2
+    assert ai.rejected == 1
+    assert raised.value.retry_after is not None and raised.value.retry_after > 50
+
+
+@pytest.mark.asyncio
+async def test_unreadable_answers_do_not_trip_the_circuit():
+    ai = DeadlineAIProvider(GarbledProvider(), {}, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+
+    for _ in range(3):
+        with pytest.raises(AIResponseParseError):
+            await ai.analyze_food_image(b"photo")
+
+    assert ai.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_stalled_stream_times_out_between_chunks():
+    ai = DeadlineAIProvider(StallingStream(), {"chat": 0.05})
+
+    chunks: list[str] = []
+    with pytest.raises(AITimeoutError):
+        async for chunk in ai.chat_stream("hi"):
+            chunks.append(chunk)
+
+    assert chunks == ["Hello"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_frees_the_half_open_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    ai = DeadlineAIProvider(FakeAIProvider(latency=1.0), {}, breaker=breaker)
+    breaker.record_failure()
+    await asyncio.sleep(0.02)
+
+    probe = asyncio.ensure_future(ai.chat("hi"))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.allow()
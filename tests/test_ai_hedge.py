@@ -0,0 +1,166 @@
+import asyncio
+import time
+import pytest
+from app.core.ai_base import AIUnavailableError, AITransientError
+from app.core.ai_hedge import HedgedAIProvider
+from app.core.ai_schema import AIResponseParseError
+from app.core.circuit_breaker import CircuitBreaker
+from tests.fakes import FakeAIProvider
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    primary = FakeAIProvider(latency=0.01, model_name="primary")
+    secondary = FakeAIProvider(latency=0.01, model_name="secondary")
+    ai = HedgedAIProvider(primary, secondary, hedge_delay=0.1)
+
+    await ai.analyze_food_image(b"photo")
+
+    assert primary.calls["food"] == 1
+    assert secondary.calls["food"] == 0
+    assert ai.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_loser_cancelled():
+    primary = FakeAIProvider(latency=0.5, model_name="primary")
+    secondary = FakeAIProvider(latency=0.02, model_name="secondary")
+    ai = HedgedAIProvider(primary, secondary, hedge_delay=0.05)
+
+    start = time.perf_counter()
+    result = await ai.chat("hello")
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0)
+
+    assert result == "echo: hello"
+    assert elapsed < 0.2
+    assert secondary.calls["chat"] == 1
+    assert primary.cancelled == 1
+    assert ai.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_primary_failure_fails_over_without_waiting_for_hedge_delay():
+    primary = FakeAIProvider(error=AITransientError("503"))
+    secondary = FakeAIProvider(latency=0.01)
+    ai = HedgedAIProvider(primary, secondary, hedge_delay=1.0)
+
+    start = time.perf_counter()
+    result = await ai.classify_photo(b"photo")
+
+    assert result["type"] == "food"
+    assert time.perf_counter() - start < 0.5
+    assert ai.failovers == 1
+
+
+@pytest.mark.asyncio
+async def test_both_failing_raises_last_error():
+    ai = HedgedAIProvider(
+        FakeAIProvider(error=AITransientError("primary down")),
+        FakeAIProvider(error=AITransientError("secondary down")),
+        hedge_delay=0.01,
+    )
+
+    with pytest.raises(AITransientError, match="secondary down"):
+        await ai.analyze_food_image(b"photo")
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_routes_around_failing_provider():
+    primary = FakeAIProvider(error=AITransientError("503"))
+    secondary = FakeAIProvider()
+    ai = HedgedAIProvider(primary, secondary, hedge_delay=1.0, failure_threshold=3, reset_timeout=60)
+
+    for _ in range(5):
+        await ai.analyze_food_image(b"photo")
+
+    assert primary.calls["food"] == 3
+    assert secondary.calls["food"] == 5
+    assert ai.stats()["circuits"] == ["open", "closed"]
+
+
+@pytest.mark.asyncio
+async def test_all_circuits_open_fails_fast():
+    ai = HedgedAIProvider(
+        FakeAIProvider(error=AITransientError("down")),
+        FakeAIProvider(error=AITransientError("down")),
+        hedge_delay=0.01,
+        failure_threshold=1,
+        reset_timeout=60,
+    )
+    with pytest.raises(AITransientError):
+        await ai.chat("hi")
+
+    with pytest.raises(AIUnavailableError) as error:
+        await ai.chat("hi")
+    assert error.value.retry_after is not None and error.value.retry_after > 50
+
+
+def test_circuit_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_that_loses_the_race_frees_its_slot():
+    primary = FakeAIProvider(latency=0.5, model_name="primary")
+    secondary = FakeAIProvider(latency=0.01, model_name="secondary")
+    ai = HedgedAIProvider(primary, secondary, hedge_delay=0.02, failure_threshold=1, reset_timeout=0.01)
+    breaker = ai.breakers[id(primary)]
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+
+    await ai.chat("hello")
+    await asyncio.sleep(0)
+
+    assert primary.cancelled == 1
+    # The next call may probe the primary again
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_unreadable_answers_do_not_open_the_circuit():
+    primary = FakeAIProvider(error=AIResponseParseError("food", "{", "not JSON"), model_name="primary")
+    secondary = FakeAIProvider(model_name="secondary")
+    ai = HedgedAIProvider(primary, secondary, hedge_delay=1.0, failure_threshold=1)
+
+    for _ in range(3):
+        await ai.analyze_food_image(b"photo")
+
+    # The primary answered each time, so it keeps getting the first try
+    assert primary.calls["food"] == 3
+    assert ai.breakers[id(primary)].state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_frees_the_probe_slot():
+    primary = FakeAIProvider(latency=0.5, model_name="primary")
+    ai = HedgedAIProvider(primary, FakeAIProvider(), failure_threshold=1, reset_timeout=0.01)
+    breaker = ai.breakers[id(primary)]
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    reader = asyncio.ensure_future(anext(ai.chat_stream("hello")))
+    await asyncio.sleep(0.02)
+    reader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await reader
+
+    assert primary.cancelled == 1
+    assert breaker.allow()
@@ -0,0 +1,97 @@
+import statistics
+
+import pytest
+from app.core.ai import get_ai_client
+from app.core.ai_base import AIRateLimitError, AITransientError
+from app.core.ai_mock import MockAIProvider
+
+
+def make_mock(**overrides) -> MockAIProvider:
+    options = {
+        "latency_median": 0.0,
+        "latency_p99": 0.0,
+        "error_rate": 0.0,
+        "rate_limit_rate": 0.0,
+        "rate_limit_burst": 3,
+        "seed": 7,
+    }
+    options.update(overrides)
+    return MockAIProvider(**options)
+
+
+async def outcomes(provider: MockAIProvider, count: int) -> list[str]:
+    results = []
+    for index in range(count):
+        try:
+            await provider.analyze_food_image(str(index).encode())
+            results.append("ok")
+        except AIRateLimitError:
+            results.append("429")
+        except AITransientError:
+            results.append("error")
+    return results
+
+
+def test_factory_builds_mock_provider():
+    assert isinstance(get_ai_client("mock"), MockAIProvider)
+
+
+@pytest.mark.asyncio
+async def test_same_image_gets_same_analysis():
+    provider = make_mock()
+
+    first = await provider.classify_and_analyze(b"photo-1")
+    again = await provider.classify_and_analyze(b"photo-1")
+
+    assert first == again
+    assert [first["food"], first["workout"], first["health"]].count(None) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_call_analysis_matches_dedicated_call():
+    provider = make_mock()
+
+    for index in range(20):
+        image = f"photo-{index}".encode()
+        result = await provider.classify_and_analyze(image)
+        if result["type"] == "food":
+            assert result["food"] == await provider.analyze_food_image(image)
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reproducible_for_a_seed():
+    first = await outcomes(make_mock(error_rate=0.2, rate_limit_rate=0.05), 200)
+    second = await outcomes(make_mock(error_rate=0.2, rate_limit_rate=0.05), 200)
+
+    assert first == second
+    assert 20 < first.count("error") < 60
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_come_in_bursts():
+    results = await outcomes(make_mock(rate_limit_rate=0.05, rate_limit_burst=3), 300)
+
+    text = "".join("x" if result == "429" else "." for result in results)
+    runs = [run for run in text.split(".") if run]
+    assert runs
+    # Every burst is the configured length, except possibly one cut off at the end
+    assert all(len(run) % 3 == 0 for run in runs[:-1])
+
+
+def test_latency_matches_configured_percentiles():
+    provider = make_mock(latency_median=0.5, latency_p99=2.0)
+
+    samples = sorted(provider._latency() for _ in range(20000))
+
+    assert statistics.median(samples) == pytest.approx(0.5, rel=0.05)
+    assert samples[int(len(samples) * 0.99)] == pytest.approx(2.0, rel=0.1)
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_reassembles_chat_answer():
+    provider = make_mock()
+
+    chunks = [chunk async for chunk in provider.chat_stream("hello")]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == await provider.chat("hello")
@@ -0,0 +1,184 @@
+import asyncio
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from pydantic import SecretStr
+
+from app.core.ai_base import AIRateLimitError, AITransientError
+from app.core.config import settings
+from app.core.ai_instrument import InstrumentedAIProvider
+from app.core.ai_openai import OpenAIProvider, shared_async_client
+from app.core.metrics import MetricsRegistry
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+ANSWERS = {
+    "classify": {"type": "food", "confidence": "high", "reasoning": "A burger"},
+    "food": {"description": "Burger", "calories": 700, "macros": {"protein": 35, "carbs": 50, "fat": 40}},
+}
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MockOpenAIHandler)
+        self.requests: list[dict] = []
+        self.connections: set[tuple[str, int]] = set()
+        self.status = 200
+        self.headers: dict[str, str] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockOpenAIServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append({"path": self.path, "body": body})
+        self.server.connections.add(self.client_address)
+
+        if self.server.status != 200:
+            payload = {"error": {"message": "mock failure", "type": "mock"}}
+        else:
+            response_format = body.get("response_format")
+            if response_format:
+                content = json.dumps(ANSWERS[response_format["json_schema"]["name"]])
+            else:
+                content = "Drink more water."
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": {"prompt_tokens": 12, "completion_tokens": 8, "total_tokens": 20},
+            }
+
+        data = json.dumps(payload).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in self.server.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def mock_openai(monkeypatch):
+    server = MockOpenAIServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", SecretStr("test-key"))
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setattr(settings, "OPENAI_MODEL", "gpt-test")
+    shared_async_client.cache_clear()
+    yield server
+    server.shutdown()
+    server.server_close()
+    shared_async_client.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_classify_photo_sends_image_and_schema(mock_openai):
+    ai = OpenAIProvider()
+
+    result = await ai.classify_photo(PNG_BYTES)
+
+    assert result == ANSWERS["classify"]
+    request = mock_openai.requests[0]
+    assert request["path"] == "/v1/chat/completions"
+    assert request["body"]["model"] == "gpt-test"
+    assert request["body"]["response_format"]["type"] == "json_schema"
+    image_url = request["body"]["messages"][0]["content"][1]["image_url"]["url"]
+    assert image_url == "data:image/png;base64," + base64.b64encode(PNG_BYTES).decode()
+
+
+@pytest.mark.asyncio
+async def test_analyze_food_image(mock_openai):
+    ai = OpenAIProvider()
+
+    result = await ai.analyze_food_image(PNG_BYTES)
+
+    assert result["calories"] == 700
+    assert result["macros"]["protein"] == 35
+
+
+@pytest.mark.asyncio
+async def test_chat_uses_system_instruction(mock_openai):
+    ai = OpenAIProvider()
+
+    response = await ai.chat("How much water?", context="Runs 5k daily")
+
+    assert response == "Drink more water."
+    messages = mock_openai.requests[0]["body"]["messages"]
+    assert messages[0]["role"] == "system"
+    assert messages[1]["content"].startswith("User context: Runs 5k daily")
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_pooled_connections(mock_openai):
+    first = OpenAIProvider(max_concurrency=2)
+    second = OpenAIProvider(max_concurrency=2)
+    assert first.client is second.client
+
+    for _ in range(3):
+        await first.chat("hi")
+    assert len(mock_openai.connections) == 1
+
+    await asyncio.gather(*(first.chat("hi") for _ in range(6)))
+    assert len(mock_openai.connections) <= 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_maps_to_rate_limit_error(mock_openai):
+    mock_openai.status = 429
+    mock_openai.headers = {"Retry-After": "2"}
+    ai = OpenAIProvider()
+
+    with pytest.raises(AIRateLimitError) as error:
+        await ai.chat("hi")
+    assert error.value.retry_after == 2.0
+    assert len(mock_openai.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_server_error_maps_to_transient_error(mock_openai):
+    mock_openai.status = 500
+    ai = OpenAIProvider()
+
+    with pytest.raises(AITransientError):
+        await ai.analyze_food_image(PNG_BYTES)
+
+
+def test_requires_api_key(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+
+    with pytest.raises(ValueError):
+        OpenAIProvider()
+
+
+@pytest.mark.asyncio
+async def test_reported_usage_reaches_instrumentation(mock_openai):
+    registry = MetricsRegistry()
+    ai = InstrumentedAIProvider(OpenAIProvider(), registry)
+
+    await ai.chat("How much water?")
+
+    assert registry.counter("ai_tokens", "").value(task="chat", model="gpt-test", direction="input") == 12
+    assert registry.counter("ai_tokens", "").value(task="chat", model="gpt-test", direction="output") == 8
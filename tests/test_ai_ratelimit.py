@@ -0,0 +1,153 @@
+import asyncio
+import time
+import pytest
+from app.core.ai_base import AIRateLimitError, AITransientError
+from app.core.ai_ratelimit import AdaptiveConcurrency, RateLimitedAIProvider, TokenBucket, backoff_delay
+from tests.fakes import FakeAIProvider
+
+
+class FlakyProvider(FakeAIProvider):
+    def __init__(self, failures: list[Exception]):
+        super().__init__()
+        self.failures = failures
+
+    async def analyze_food_image(self, image_bytes: bytes):
+        if self.failures:
+            self.calls["food_failed"] += 1
+            raise self.failures.pop(0)
+        return await super().analyze_food_image(image_bytes)
+
+
+def make_limited(inner, max_retries: int = 3) -> RateLimitedAIProvider:
+    return RateLimitedAIProvider(
+        inner,
+        TokenBucket(rate=0, burst=1),
+        AdaptiveConcurrency(initial=4),
+        max_retries=max_retries,
+        backoff_base=0.001,
+        backoff_max=0.01,
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=50, burst=1)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+    elapsed = time.perf_counter() - start
+
+    # First token is in the bucket, the next five arrive at 50/s
+    assert elapsed >= 5 / 50 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst():
+    bucket = TokenBucket(rate=1, burst=5)
+
+    start = time.perf_counter()
+    for _ in range(5):
+        await bucket.acquire()
+
+    assert time.perf_counter() - start < 0.05
+
+
+def test_aimd_window_grows_and_shrinks():
+    window = AdaptiveConcurrency(initial=8, minimum=1, maximum=10)
+
+    window.on_throttle(epoch=0)
+    assert window.limit == 4
+
+    for _ in range(8):
+        window.on_success()
+    assert 5 < window.limit < 6.5
+
+    for _ in range(1000):
+        window.on_success()
+    assert window.limit == 10
+
+
+def test_aimd_cuts_once_per_throttled_window():
+    window = AdaptiveConcurrency(initial=16)
+
+    for _ in range(5):
+        window.on_throttle(epoch=0)
+
+    assert window.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_window_bounds_in_flight_calls():
+    window = AdaptiveConcurrency(initial=2)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        await window.acquire()
+        peak = max(peak, window.in_flight)
+        await asyncio.sleep(0.01)
+        await window.release()
+
+    await asyncio.gather(*(worker() for _ in range(6)))
+
+    assert peak == 2
+
+
+def test_backoff_respects_cap_and_retry_after():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=4) <= 4
+    assert backoff_delay(0, base=0.5, cap=4, retry_after=3) >= 3
+
+
+@pytest.mark.asyncio
+async def test_retries_rate_limit_and_transient_errors():
+    inner = FlakyProvider([AIRateLimitError("429"), AITransientError("503")])
+    ai = make_limited(inner)
+
+    result = await ai.analyze_food_image(b"photo")
+
+    assert result["description"] == "Pasta"
+    assert inner.calls["food_failed"] == 2
+    assert ai.retries == 2
+    assert ai.throttled == 1
+    assert ai.window.limit < 4
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    inner = FlakyProvider([AIRateLimitError("429") for _ in range(5)])
+    ai = make_limited(inner, max_retries=2)
+
+    with pytest.raises(AIRateLimitError):
+        await ai.analyze_food_image(b"photo")
+    assert inner.calls["food_failed"] == 3
+    assert ai.window.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    inner = FlakyProvider([ValueError("bad request")])
+    ai = make_limited(inner)
+
+    with pytest.raises(ValueError):
+        await ai.analyze_food_image(b"photo")
+    assert inner.calls["food_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gemini_maps_429_to_rate_limit_error():
+    from unittest.mock import AsyncMock, patch
+    from google.genai import errors as genai_errors
+    from app.core.ai_gemini import GeminiAI
+
+    with patch('google.genai.Client') as MockClient:
+        mock_client_instance = MockClient.return_value
+        mock_client_instance.aio.models.generate_content = AsyncMock(
+            side_effect=genai_errors.ClientError(429, {"error": {"message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+        )
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+
+        with pytest.raises(AIRateLimitError):
+            await ai.chat("hi")
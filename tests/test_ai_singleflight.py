@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from app.core.ai_singleflight import SingleFlight, SingleFlightAIProvider
+from tests.fakes import FakeAIProvider
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    fake = FakeAIProvider(latency=0.05)
+    ai = SingleFlightAIProvider(fake)
+
+    results = await asyncio.gather(*(ai.analyze_food_image(b"photo") for _ in range(5)))
+
+    assert fake.calls["food"] == 1
+    assert all(result == results[0] for result in results)
+    assert ai.flights.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_coalesced():
+    fake = FakeAIProvider(latency=0.05)
+    ai = SingleFlightAIProvider(fake)
+
+    await asyncio.gather(
+        ai.analyze_food_image(b"photo"),
+        ai.analyze_food_image(b"other photo"),
+        ai.classify_photo(b"photo"),
+    )
+
+    assert fake.calls["food"] == 2
+    assert fake.calls["classify"] == 1
+    assert ai.flights.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_each_call_provider():
+    fake = FakeAIProvider()
+    ai = SingleFlightAIProvider(fake)
+
+    await ai.analyze_food_image(b"photo")
+    await ai.analyze_food_image(b"photo")
+
+    assert fake.calls["food"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_waiter():
+    flights = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    results = await asyncio.gather(
+        flights.do("key", failing), flights.do("key", failing), return_exceptions=True
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flights.do("key", slow))
+    second = asyncio.create_task(flights.do("key", slow))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_when_all_waiters_leave():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flights.do("key", slow))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    assert flights.stats()["in_flight"] == 0
@@ -0,0 +1,73 @@
+import pytest
+
+from app.core.ai_schema import AIResponseParseError
+from app.core.ai_tiers import TieredAIProvider
+from app.core.ai_types import ClassificationResult
+from tests.fakes import FakeAIProvider
+
+TIERS = {"classify": "fast", "chat": "fast", "food_text": "fast", "food": "accurate"}
+
+
+class UnsureProvider(FakeAIProvider):
+    async def classify_photo(self, image_bytes: bytes) -> ClassificationResult:
+        await self._call("classify")
+        return {"type": "other", "confidence": "low", "reasoning": "Blurry"}
+
+
+class GarbledProvider(FakeAIProvider):
+    async def analyze_food_text(self, description: str):
+        await self._call("food_text")
+        raise AIResponseParseError("food_text", "{not json", "invalid JSON")
+
+
+@pytest.mark.asyncio
+async def test_tasks_run_on_their_tier():
+    fast, accurate = FakeAIProvider(model_name="small"), FakeAIProvider(model_name="large")
+    ai = TieredAIProvider(fast, accurate, TIERS)
+
+    await ai.classify_photo(b"photo")
+    await ai.chat("hi")
+    await ai.analyze_food_image(b"photo")
+    # Unmapped tasks use the accurate model
+    await ai.analyze_health_image(b"photo")
+
+    assert fast.calls == {"classify": 1, "chat": 1}
+    assert accurate.calls == {"food": 1, "health": 1}
+    assert ai.stats() == {"fast_calls": 2, "accurate_calls": 2, "escalations": 0}
+    assert ai.model_name == "small+large"
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_escalates_to_accurate_model():
+    fast, accurate = UnsureProvider(model_name="small"), FakeAIProvider(model_name="large")
+    ai = TieredAIProvider(fast, accurate, TIERS)
+
+    result = await ai.classify_photo(b"photo")
+
+    assert result["confidence"] == "high"
+    assert fast.calls["classify"] == 1
+    assert accurate.calls["classify"] == 1
+    assert ai.escalations == {"classify": 1}
+
+
+@pytest.mark.asyncio
+async def test_unparseable_answer_escalates_to_accurate_model():
+    fast, accurate = GarbledProvider(model_name="small"), FakeAIProvider(model_name="large")
+    ai = TieredAIProvider(fast, accurate, TIERS)
+
+    result = await ai.analyze_food_text("grandma's casserole")
+
+    assert result["calories"] == 250.0
+    assert accurate.calls["food_text"] == 1
+    assert ai.stats()["escalations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_accurate_tier_errors_are_not_retried():
+    fast, accurate = FakeAIProvider(model_name="small"), GarbledProvider(model_name="large")
+    ai = TieredAIProvider(fast, accurate, {"food_text": "accurate"})
+
+    with pytest.raises(AIResponseParseError):
+        await ai.analyze_food_text("casserole")
+
+    assert sum(fast.calls.values()) == 0
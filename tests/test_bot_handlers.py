@@ -0,0 +1,57 @@
+from contextlib import nullcontext
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.bot.handlers import AI_UNAVAILABLE_TEXT, analyze_photo, cmd_meal, handle_text, photo_storage
+from app.core.ai_base import AITransientError
+from tests.fakes import FakeAIProvider
+
+
+def make_message(text: str | None = None) -> MagicMock:
+    message = MagicMock()
+    message.text = text
+    message.from_user.id = 7
+    message.answer = AsyncMock(return_value=MagicMock(edit_text=AsyncMock()))
+    return message
+
+
+def replies(message: MagicMock) -> list[str]:
+    return [call.args[0] for call in message.answer.await_args_list]
+
+
+@pytest.mark.asyncio
+async def test_failing_provider_falls_back_to_manual_photo_type():
+    message = make_message()
+    ai = FakeAIProvider(error=AITransientError("502 from provider"))
+
+    with patch("app.bot.handlers.get_ai", lambda: ai):
+        await analyze_photo(7, b"photo", None, message)
+
+    assert message.answer.await_args_list[-1].kwargs["reply_markup"] is not None
+    assert photo_storage.pop(7) == b"photo"
+
+
+@pytest.mark.asyncio
+async def test_failing_provider_reports_unavailable_for_meals_and_chat():
+    ai = FakeAIProvider(error=AITransientError("connection reset"))
+    nutrition = MagicMock()
+    nutrition.return_value.log_meal_text = AsyncMock(side_effect=AITransientError("connection reset"))
+    chat = MagicMock()
+    chat.return_value.chat_stream = AsyncMock(side_effect=lambda user_id, text: ai.chat_stream(text))
+    meal = make_message("/meal toast")
+    question = make_message("How much protein do I need?")
+
+    with (
+        patch("app.bot.handlers.get_ai", lambda: ai),
+        patch("app.bot.handlers.AsyncSessionLocal", nullcontext),
+        patch("app.bot.handlers.NutritionService", nutrition),
+        patch("app.bot.handlers.ChatService", chat),
+    ):
+        await cmd_meal(meal, MagicMock(args="toast"))
+        await handle_text(question)
+
+    assert replies(meal) == [AI_UNAVAILABLE_TEXT]
+    # The chat placeholder itself turns into the notice
+    assert replies(question) == ["…"]
+    question.answer.return_value.edit_text.assert_awaited_once_with(AI_UNAVAILABLE_TEXT)
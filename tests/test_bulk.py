@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app.db.database import get_db
+from app.db.models import HealthLog, Meal, Workout
+from app.main import app
+from app.schemas.bulk import BULK_MAX_ITEMS
+
+
+async def post(session, path: str, payload: object):
+    async def _get_db():
+        yield session
+
+    with patch.dict(app.dependency_overrides, {get_db: _get_db}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=payload)
+
+
+@pytest.mark.asyncio
+async def test_bulk_meals_returns_ids_in_order(test_db_with_tables):
+    meals = [
+        {"user_id": 1, "description": f"Meal {index}", "calories": 100 + index, "macros": {"p": index}}
+        for index in range(5)
+    ]
+    meals[0]["timestamp"] = "2026-01-02T08:30:00"
+
+    response = await post(test_db_with_tables, "/api/meals/bulk", meals)
+
+    assert response.status_code == 201
+    ids = response.json()["ids"]
+    assert len(ids) == 5
+    rows = {meal.id: meal for meal in (await test_db_with_tables.execute(select(Meal))).scalars()}
+    assert [rows[id].description for id in ids] == [f"Meal {index}" for index in range(5)]
+    assert rows[ids[0]].timestamp.date().isoformat() == "2026-01-02"
+    assert rows[ids[1]].timestamp is not None
+
+
+@pytest.mark.asyncio
+async def test_bulk_timestamps_with_an_offset_are_stored_in_utc(test_db_with_tables):
+    entries = [
+        {"user_id": 1, "category": "weight", "description": "Morning", "timestamp": "2026-01-01T08:00:00+02:00"},
+        {"user_id": 1, "category": "weight", "description": "Evening", "timestamp": "2026-01-01T20:00:00"},
+    ]
+
+    response = await post(test_db_with_tables, "/api/health/bulk", entries)
+
+    assert response.status_code == 201
+    logs = (await test_db_with_tables.execute(select(HealthLog).order_by(HealthLog.id))).scalars().all()
+    assert [log.timestamp.isoformat() for log in logs] == ["2026-01-01T06:00:00", "2026-01-01T20:00:00"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_workouts_and_health_logs(test_db_with_tables):
+    workouts = [
+        {"user_id": 1, "description": "Run", "duration_minutes": 30, "activity_type": "Running"},
+        {"user_id": 2, "description": "Swim", "duration_minutes": 45, "metrics": {"laps": 20}},
+    ]
+    entries = [
+        {"user_id": 1, "category": "weight", "description": "Morning", "data": {"weight": 80.5}},
+        {"user_id": 1, "category": "sleep", "description": "Night"},
+    ]
+
+    workout_response = await post(test_db_with_tables, "/api/workouts/bulk", workouts)
+    health_response = await post(test_db_with_tables, "/api/health/bulk", entries)
+
+    assert workout_response.status_code == 201
+    assert health_response.status_code == 201
+    saved_workouts = (await test_db_with_tables.execute(select(Workout).order_by(Workout.id))).scalars().all()
+    assert [workout.id for workout in saved_workouts] == workout_response.json()["ids"]
+    assert saved_workouts[1].metrics == {"laps": 20}
+    saved_logs = (await test_db_with_tables.execute(select(HealthLog).order_by(HealthLog.id))).scalars().all()
+    assert [entry.category for entry in saved_logs] == ["weight", "sleep"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_rejects_empty_and_oversized_batches(test_db_with_tables):
+    meal = {"user_id": 1, "description": "Toast", "calories": 80, "macros": {}}
+
+    empty = await post(test_db_with_tables, "/api/meals/bulk", [])
+    oversized = await post(test_db_with_tables, "/api/meals/bulk", [meal] * (BULK_MAX_ITEMS + 1))
+    invalid = await post(test_db_with_tables, "/api/meals/bulk", [meal, {"user_id": 1}])
+
+    assert empty.status_code == 422
+    assert oversized.status_code == 422
+    assert invalid.status_code == 422
+    assert (await test_db_with_tables.execute(select(Meal))).scalars().all() == []
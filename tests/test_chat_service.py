@@ -1,17 +1,99 @@
 import pytest
+from app.core.ai_chat_cache import CachedChatAIProvider, ChatAnswerCache
 from app.services.chat_service import ChatService
+from app.services.context_cache import UserContextCache
+from app.services.context_service import ContextService
+from app.services.meal_service import MealService
+from app.services.user_service import UserService
+from app.services.workout_service import WorkoutService
+from app.db.models import User
 from unittest.mock import AsyncMock
+from tests.fakes import FakeAIProvider
 
 @pytest.mark.asyncio
-async def test_chat_response():
+async def test_chat_response(test_db_with_tables):
     mock_ai = AsyncMock()
     # Mocking chat response
     mock_ai.chat.return_value = "AI Response"
-    
-    # Mock DB to fetch context (simplified for now)
-    mock_db = AsyncMock()
-    
-    service = ChatService(mock_db, mock_ai)
+
+    service = ChatService(test_db_with_tables, mock_ai)
     response = await service.chat(user_id=1, message="Hello")
-    
+
     assert response == "AI Response"
+
+
+@pytest.mark.asyncio
+async def test_chat_passes_user_snapshot_as_context(test_db_with_tables):
+    test_db_with_tables.add(User(telegram_id=42, age=25, weight=80.0, goal="weight loss"))
+    await test_db_with_tables.commit()
+    await MealService(test_db_with_tables).create_meal(42, "Oatmeal", 350.0, {"protein": 12, "carbs": 60, "fat": 7})
+    mock_ai = AsyncMock()
+    mock_ai.chat.return_value = "AI Response"
+
+    await ChatService(test_db_with_tables, mock_ai).chat(user_id=42, message="Hello")
+
+    context = mock_ai.chat.await_args_list[0].kwargs["context"]
+    assert "User: 25 years old, weight 80 kg, goal: weight loss" in context
+    assert "Recent meals: Oatmeal (350 kcal)" in context
+    assert "Today: 350 kcal eaten, 0 workouts" in context
+
+
+@pytest.mark.asyncio
+async def test_standalone_questions_share_answers_across_meal_logs(test_db_with_tables):
+    meals = MealService(test_db_with_tables)
+    await meals.create_meal(1, "Oatmeal", 350.0, {"protein": 12, "carbs": 60, "fat": 7})
+    await meals.create_meal(2, "Burger", 800.0, {"protein": 35, "carbs": 60, "fat": 45})
+    fake = FakeAIProvider()
+    ai = CachedChatAIProvider(fake, ChatAnswerCache())
+
+    for user_id in (1, 2, 1):
+        await ChatService(test_db_with_tables, ai).chat(user_id, "How much protein is in an egg?")
+    await ChatService(test_db_with_tables, ai).chat(1, "Is that enough for breakfast?")
+
+    assert fake.calls["chat"] == 2
+    assert ai.cache.exact_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_context_is_cached_until_a_write(test_db_with_tables):
+    cache = UserContextCache(max_entries=10)
+    service = ContextService(test_db_with_tables, cache)
+
+    first = await service.get_context(42)
+    assert await service.get_context(42) == first
+    assert cache.misses == 1
+    assert cache.hits == 1
+
+    # A write only drops the sections it affects
+    cache.invalidate(42, "meals", "today")
+    snapshot = cache.get(42)
+    assert set(snapshot.sections) == {"profile", "workouts", "health"}
+
+
+@pytest.mark.asyncio
+async def test_service_writes_invalidate_the_shared_cache(test_db_with_tables):
+    service = ContextService(test_db_with_tables)
+    assert "Recent workouts" not in await service.get_context(42)
+    misses = service.cache.misses
+
+    await WorkoutService(test_db_with_tables).create_workout(42, "Morning run", 30, activity_type="Running")
+    await UserService(test_db_with_tables).get_or_create_user(42)
+    await UserService(test_db_with_tables).update_user(42, age=31)
+    context = await service.get_context(42)
+
+    assert "Recent workouts: Running 30 min" in context
+    assert "User: 31 years old" in context
+    # Refreshed section by section, not rebuilt
+    assert service.cache.misses == misses
+
+
+def test_cache_evicts_least_recently_used_user():
+    cache = UserContextCache(max_entries=2)
+    for user_id in (1, 2, 1, 3):
+        cache.get(user_id)
+
+    assert cache.evictions == 1
+    assert cache.stats()["entries"] == 2
+    # User 1 was used more recently than user 2
+    cache.get(1)
+    assert cache.stats()["misses"] == 3
@@ -0,0 +1,221 @@
+import json
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.bot.handlers import AI_BUSY_TEXT, AI_UNAVAILABLE_TEXT, EMPTY_REPLY_TEXT, stream_reply
+from app.core.ai import get_ai
+from app.db.database import get_db
+from app.core.ai_base import AIRateLimitError, AIUnavailableError
+from app.core.ai_gemini import GeminiAI
+from app.core.ai_hedge import HedgedAIProvider
+from app.core.ai_ratelimit import AdaptiveConcurrency, RateLimitedAIProvider, TokenBucket
+from app.main import app
+from app.services.conversation_service import conversation_memory
+from tests.fakes import FakeAIProvider
+
+
+@pytest.fixture
+def test_memory_db(monkeypatch, test_db_engine, test_db_with_tables):
+    """Routes the conversation memory's own sessions to the test database"""
+    monkeypatch.setattr(conversation_memory, "session_factory", async_sessionmaker(test_db_engine, expire_on_commit=False))
+    return test_db_with_tables
+
+
+class StreamingProvider(FakeAIProvider):
+    def __init__(self, chunks: list[str], failures: list[Exception] | None = None, fail_after: int | None = None):
+        super().__init__()
+        self.chunks = chunks
+        self.failures = failures or []
+        self.fail_after = fail_after
+
+    async def chat_stream(self, user_message: str, context: str | None = None) -> AsyncIterator[str]:
+        self.calls["chat_stream"] += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise AIRateLimitError("mid-stream")
+            yield chunk
+
+
+async def collect(chunks: AsyncIterator[str]) -> list[str]:
+    return [chunk async for chunk in chunks]
+
+
+def make_limited(inner: FakeAIProvider) -> RateLimitedAIProvider:
+    return RateLimitedAIProvider(
+        inner,
+        TokenBucket(rate=0, burst=1),
+        AdaptiveConcurrency(initial=4),
+        max_retries=3,
+        backoff_base=0.001,
+        backoff_max=0.01,
+    )
+
+
+@pytest.mark.asyncio
+async def test_default_chat_stream_yields_full_answer():
+    provider = FakeAIProvider()
+
+    assert await collect(provider.chat_stream("hi")) == ["echo: hi"]
+
+
+@pytest.mark.asyncio
+async def test_gemini_chat_stream_yields_chunks():
+    async def stream():
+        for text in ["Hello", None, ", world"]:
+            chunk = MagicMock()
+            chunk.text = text
+            yield chunk
+
+    with patch("google.genai.Client") as MockClient:
+        mock_client_instance = MockClient.return_value
+        mock_client_instance.aio.models.generate_content_stream = AsyncMock(return_value=stream())
+
+        ai = GeminiAI()
+        ai.client = mock_client_instance
+
+        assert await collect(ai.chat_stream("hi", context="ctx")) == ["Hello", ", world"]
+        contents = mock_client_instance.aio.models.generate_content_stream.await_args_list[0].kwargs["contents"]
+        assert "ctx" in contents
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_stream_retries_before_first_chunk():
+    inner = StreamingProvider(["a", "b"], failures=[AIRateLimitError("slow down")])
+    limited = make_limited(inner)
+
+    assert await collect(limited.chat_stream("hi")) == ["a", "b"]
+    assert inner.calls["chat_stream"] == 2
+    assert limited.retries == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_stream_does_not_retry_after_first_chunk():
+    inner = StreamingProvider(["a", "b"], fail_after=1)
+    limited = make_limited(inner)
+
+    received: list[str] = []
+    with pytest.raises(AIRateLimitError):
+        async for chunk in limited.chat_stream("hi"):
+            received.append(chunk)
+
+    assert received == ["a"]
+    assert inner.calls["chat_stream"] == 1
+    assert limited.window.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_stream_fails_over_before_first_chunk():
+    primary = StreamingProvider(["p"], failures=[AIRateLimitError("down")])
+    secondary = StreamingProvider(["s1", "s2"])
+    hedged = HedgedAIProvider(primary, secondary)
+
+    assert await collect(hedged.chat_stream("hi")) == ["s1", "s2"]
+    assert hedged.failovers == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint_sends_server_sent_events(test_memory_db):
+    provider = StreamingProvider(["Hel", "lo"])
+    async def override_get_db():
+        yield test_memory_db
+
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: provider, get_db: override_get_db}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/chat/stream", json={"user_id": 1, "message": "hi"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.strip().split("\n\n")
+    assert [json.loads(event.removeprefix("data: "))["text"] for event in events[:2]] == ["Hel", "lo"]
+    assert events[-1].startswith("event: done")
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint_reports_provider_errors(test_memory_db):
+    provider = StreamingProvider(["Hel", "lo"], fail_after=1)
+    async def override_get_db():
+        yield test_memory_db
+
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: provider, get_db: override_get_db}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/chat/stream", json={"user_id": 1, "message": "hi"})
+
+    events = response.text.strip().split("\n\n")
+    assert events[-1].startswith("event: error")
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_throttles_edits():
+    reply = MagicMock()
+    reply.edit_text = AsyncMock()
+    message = MagicMock()
+    message.answer = AsyncMock(return_value=reply)
+
+    async def chunks():
+        for chunk in ["one ", "two ", "three"]:
+            yield chunk
+
+    text = await stream_reply(message, chunks(), edit_interval=60)
+
+    assert text == "one two three"
+    message.answer.assert_awaited_once_with("…")
+    # Interval never elapses, so only the final edit goes out
+    reply.edit_text.assert_awaited_once_with("one two three")
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_edits_as_chunks_arrive():
+    reply = MagicMock()
+    reply.edit_text = AsyncMock()
+    message = MagicMock()
+    message.answer = AsyncMock(return_value=reply)
+
+    async def chunks():
+        for chunk in ["one ", "two"]:
+            yield chunk
+
+    await stream_reply(message, chunks(), edit_interval=0)
+
+    assert [call.args[0] for call in reply.edit_text.await_args_list] == ["one ", "one two"]
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_turns_the_placeholder_into_the_failure_notice():
+    async def failing(chunks: list[str], error: Exception) -> AsyncIterator[str]:
+        for chunk in chunks:
+            yield chunk
+        raise error
+
+    async def empty() -> AsyncIterator[str]:
+        return
+        yield
+
+    shown: list[list[str]] = []
+    for chunks in (
+        failing([], AIRateLimitError("429")),
+        failing(["Eat more ", "fibre"], AIUnavailableError("circuit open")),
+        empty(),
+    ):
+        reply = MagicMock()
+        reply.edit_text = AsyncMock()
+        message = MagicMock()
+        message.answer = AsyncMock(return_value=reply)
+
+        await stream_reply(message, chunks, edit_interval=60)
+
+        message.answer.assert_awaited_once_with("…")
+        shown.append([call.args[0] for call in reply.edit_text.await_args_list])
+
+    assert shown == [
+        [AI_BUSY_TEXT],
+        [f"Eat more fibre\n\n{AI_UNAVAILABLE_TEXT}"],
+        [EMPTY_REPLY_TEXT],
+    ]
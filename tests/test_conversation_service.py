@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.models import ChatMessage, ChatSummary
+from app.services.chat_service import ChatService
+from app.services.conversation_service import ConversationMemory, ConversationService, estimate_tokens
+
+
+async def add_turns(service: ConversationService, count: int, user_id: int = 7) -> None:
+    for index in range(count):
+        await service.add_turn(user_id, f"question {index} " + "x" * 36, f"answer {index} " + "y" * 36)
+
+
+@pytest.mark.asyncio
+async def test_window_keeps_newest_turns_within_budget(test_db_with_tables):
+    # Each message is about 15 tokens, so 100 tokens hold six of them
+    service = ConversationService(test_db_with_tables, token_budget=100)
+    await add_turns(service, 10)
+
+    window = await service.get_window(7)
+
+    assert sum(message.tokens for message in window.messages) <= 100
+    assert [message.content.split()[:2] for message in window.messages[-2:]] == [["question", "9"], ["answer", "9"]]
+    assert window.pending_tokens > 100
+    assert window.render().startswith("Recent conversation:\nUser: question")
+
+
+@pytest.mark.asyncio
+async def test_compaction_folds_old_turns_into_summary(test_db_with_tables):
+    service = ConversationService(test_db_with_tables, token_budget=100)
+    await add_turns(service, 10)
+    ai = AsyncMock()
+    ai.summarize.return_value = "User asks numbered questions."
+
+    assert await service.compact(7, ai)
+
+    ai.chat.assert_not_awaited()
+    prompt = ai.summarize.await_args_list[0].args[0]
+    assert "question 0" in prompt
+    assert "question 9" not in prompt
+    window = await service.get_window(7)
+    assert window.summary == "User asks numbered questions."
+    # The newest half of the budget stays verbatim
+    assert window.pending_tokens <= 50
+    assert window.render().startswith("Earlier conversation (summary): User asks numbered questions.")
+
+
+@pytest.mark.asyncio
+async def test_compaction_trims_summarized_turns_past_retention(test_db_with_tables):
+    service = ConversationService(test_db_with_tables, token_budget=100)
+    await add_turns(service, 10)
+    old = datetime.now(timezone.utc) - timedelta(days=365)
+    await test_db_with_tables.execute(update(ChatMessage).where(ChatMessage.id <= 4).values(timestamp=old))
+    await test_db_with_tables.commit()
+    ai = AsyncMock()
+    ai.summarize.return_value = "Summary"
+
+    await service.compact(7, ai)
+
+    remaining = await test_db_with_tables.scalar(select(func.count()).select_from(ChatMessage))
+    summary = await test_db_with_tables.get(ChatSummary, 7)
+    assert remaining == 16
+    assert summary is not None and summary.through_message_id > 4
+
+
+@pytest.mark.asyncio
+async def test_chat_sends_history_and_compacts_in_background(test_db_engine, test_db_with_tables, monkeypatch):
+    monkeypatch.setattr("app.services.conversation_service.settings.CHAT_HISTORY_TOKEN_BUDGET", 60)
+    memory = ConversationMemory(async_sessionmaker(test_db_engine, expire_on_commit=False))
+    ai = AsyncMock()
+    ai.chat.return_value = "Sure, " + "z" * 40
+    ai.summarize.return_value = "Summary"
+    service = ChatService(test_db_with_tables, ai, memory)
+
+    for index in range(6):
+        await service.chat(user_id=7, message=f"message {index}")
+    await memory.drain()
+
+    last_context = ai.chat.await_args_list[-1].kwargs["context"]
+    assert "User: message 4" in last_context
+    summary = await test_db_with_tables.get(ChatSummary, 7)
+    assert summary is not None
+
+
+def test_estimate_tokens_grows_with_length():
+    assert estimate_tokens("a" * 400) > estimate_tokens("a" * 40)
@@ -0,0 +1,153 @@
+import io
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image, ImageDraw
+from app.core.ai_preprocess import PreprocessingAIProvider
+from app.core.images import ImagePreprocessor, dhash, detect_mime_type, hamming_distance, preprocess_image
+from tests.fakes import FakeAIProvider
+
+
+def make_image(fmt: str, size: tuple[int, int], mode: str = "RGB", exif: bool = False) -> bytes:
+    image = Image.new(mode, size, (200, 100, 50, 255) if mode == "RGBA" else (200, 100, 50))
+    buffer = io.BytesIO()
+    kwargs = {}
+    if exif:
+        exif_data = Image.Exif()
+        exif_data[0x010F] = "ScaleCorp"  # Make
+        kwargs["exif"] = exif_data.tobytes()
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def test_detect_mime_type():
+    assert detect_mime_type(make_image("JPEG", (10, 10))) == "image/jpeg"
+    assert detect_mime_type(make_image("PNG", (10, 10))) == "image/png"
+    assert detect_mime_type(make_image("WEBP", (10, 10))) == "image/webp"
+    assert detect_mime_type(b"not an image") is None
+
+
+def test_png_screenshot_is_downscaled_to_jpeg():
+    png = make_image("PNG", (1170, 2532), mode="RGBA")
+
+    prepared = preprocess_image(png, max_edge=1024, quality=85)
+
+    assert prepared.mime_type == "image/jpeg"
+    assert prepared.original_size == len(png)
+    with Image.open(io.BytesIO(prepared.data)) as result:
+        assert result.format == "JPEG"
+        assert max(result.size) == 1024
+
+
+def test_metadata_is_stripped():
+    jpeg = make_image("JPEG", (64, 64), exif=True)
+    with Image.open(io.BytesIO(jpeg)) as original:
+        assert original.getexif()
+
+    prepared = preprocess_image(jpeg, max_edge=1024, quality=85)
+
+    with Image.open(io.BytesIO(prepared.data)) as result:
+        assert not result.getexif()
+
+
+def test_undecodable_bytes_pass_through():
+    prepared = preprocess_image(b"garbage", max_edge=1024, quality=85)
+
+    assert prepared.data == b"garbage"
+    assert prepared.mime_type == "image/jpeg"
+
+
+@pytest.mark.asyncio
+async def test_provider_receives_preprocessed_image():
+    received: list[bytes] = []
+
+    class RecordingProvider(FakeAIProvider):
+        async def analyze_food_image(self, image_bytes: bytes):
+            received.append(image_bytes)
+            return await super().analyze_food_image(image_bytes)
+
+    ai = PreprocessingAIProvider(RecordingProvider(), ImagePreprocessor(max_edge=256, workers=0))
+    png = make_image("PNG", (2000, 1000))
+
+    await ai.analyze_food_image(png)
+
+    assert detect_mime_type(received[0]) == "image/jpeg"
+    with Image.open(io.BytesIO(received[0])) as result:
+        assert result.size == (256, 128)
+
+
+def test_flat_png_stays_png_when_smaller():
+    image = Image.new("RGBA", (1080, 1080), (0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse((90, 90, 990, 990), fill=(30, 160, 140, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    png = buffer.getvalue()
+
+    prepared = preprocess_image(png, max_edge=2048, quality=85)
+
+    assert prepared.mime_type == "image/png"
+    assert len(prepared.data) <= len(png)
+
+
+def make_photo(seed: int, quality: int = 90, crop: int = 0, scale: float = 1.0) -> bytes:
+    image = Image.new("RGB", (800, 600), (240, 230, 200))
+    draw = ImageDraw.Draw(image)
+    for index in range(12):
+        x = (seed * 131 + index * 197) % 800
+        y = (seed * 71 + index * 113) % 600
+        fill = ((seed * 50 + index * 40) % 256, index * 20, 255 - index * 20)
+        draw.ellipse((x, y, x + 60 + index * 20, y + 40 + index * 15), fill=fill)
+    if crop:
+        image = image.crop((crop, crop, 800 - crop, 600 - crop))
+    if scale != 1.0:
+        image = image.resize((int(image.width * scale), int(image.height * scale)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_dhash_matches_recompressed_and_cropped_copies():
+    original = dhash(make_photo(1))
+    assert original is not None
+
+    recompressed = dhash(make_photo(1, quality=40))
+    cropped = dhash(make_photo(1, crop=15))
+    resized = dhash(make_photo(1, scale=0.5))
+    other = dhash(make_photo(2))
+
+    assert recompressed is not None and hamming_distance(original, recompressed) <= 4
+    assert cropped is not None and hamming_distance(original, cropped) <= 8
+    assert resized is not None and hamming_distance(original, resized) <= 8
+    assert other is not None and hamming_distance(original, other) > 16
+    assert -(1 << 63) <= original < 1 << 63
+    assert dhash(b"not an image") is None
+
+
+def test_decompression_bombs_are_not_decoded(monkeypatch):
+    jpeg = make_image("JPEG", (640, 480))
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    assert preprocess_image(jpeg, max_edge=256, quality=85).data == jpeg
+    assert dhash(jpeg) is None
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_is_replaced():
+    preprocessor = ImagePreprocessor(max_edge=256, workers=1)
+    broken = preprocessor._executor()
+    assert broken is not None
+    # A worker dying (OOM kill, decoder crash) breaks the whole pool
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+    jpeg = make_image("JPEG", (640, 480))
+
+    try:
+        passed_through = await preprocessor.prepare(jpeg)
+        recovered = await preprocessor.prepare(jpeg)
+    finally:
+        preprocessor.shutdown()
+
+    assert passed_through.data == jpeg
+    with Image.open(io.BytesIO(recovered.data)) as result:
+        assert result.size == (256, 192)
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.ai_base import AIUnavailableError
+from app.core.metrics import MetricsRegistry
+from app.db.database import get_db
+from app.db.models import Base
+from app.main import app
+from app.services.job_service import JobService
+from app.services.job_worker import JobWorkerPool, get_job_pool
+from app.services.meal_service import MealService
+from tests.fakes import FakeAIProvider
+
+JPEG_BYTES = b"\xff\xd8\xff\xe0photo"
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    # Workers use their own sessions, so the queue needs a real database file
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def wait_for_status(sessions, job_id: int, status: str, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        async with sessions() as session:
+            job = await JobService(session).get_job(job_id)
+            if job is not None and job.status == status:
+                return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never became {status}")
+
+
+def make_pool(sessions, ai: FakeAIProvider, **options) -> JobWorkerPool:
+    return JobWorkerPool(
+        ai=lambda: ai, session_factory=sessions, poll_interval=0.05, registry=MetricsRegistry(), **options
+    )
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_claimed_oldest_first_and_only_once(sessions):
+    async with sessions() as session:
+        ids = [(await JobService(session).enqueue("food", b"photo")).id for _ in range(3)]
+
+    async def claim() -> int | None:
+        async with sessions() as session:
+            job = await JobService(session).claim()
+            return job.id if job is not None else None
+
+    claimed = [await claim() for _ in range(4)]
+
+    assert claimed == [*ids, None]
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_job_and_logs_the_meal(sessions):
+    fake = FakeAIProvider()
+    pool = make_pool(sessions, fake, workers=2)
+    await pool.start()
+    try:
+        async with sessions() as session:
+            job = await JobService(session).enqueue("food", b"photo", user_id=42)
+        pool.notify()
+        await wait_for_status(sessions, job.id, "done")
+    finally:
+        await pool.stop()
+
+    async with sessions() as session:
+        done = await JobService(session).get_job(job.id)
+        meals = await MealService(session).get_user_meals(42)
+    assert done is not None and done.result is not None
+    assert done.result["description"] == "Pasta"
+    assert done.image is None
+    assert [meal.id for meal in meals] == [done.record_id]
+    assert pool.wait_time.count(task="food") == 1
+    assert pool.outcomes.value(task="food", outcome="done") == 1
+
+
+@pytest.mark.asyncio
+async def test_job_fails_once_the_provider_stays_unavailable(sessions):
+    fake = FakeAIProvider(error=AIUnavailableError("circuit open", retry_after=0.01))
+    pool = make_pool(sessions, fake, workers=1, max_attempts=2)
+    await pool.start()
+    try:
+        async with sessions() as session:
+            job = await JobService(session).enqueue("classify", b"photo")
+        pool.notify()
+        await wait_for_status(sessions, job.id, "failed")
+    finally:
+        await pool.stop()
+
+    assert fake.calls["classify"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stopping_the_pool_requeues_running_jobs(sessions):
+    ai = FakeAIProvider(latency=5.0)
+    pool = make_pool(sessions, ai, workers=1)
+    await pool.start()
+    async with sessions() as session:
+        job = await JobService(session).enqueue("workout", b"photo")
+    pool.notify()
+    await asyncio.wait_for(ai.started.wait(), 5)
+    await pool.stop()
+
+    async with sessions() as session:
+        requeued = await JobService(session).get_job(job.id)
+    assert requeued is not None and requeued.status == "queued"
+
+
+@pytest.mark.asyncio
+async def test_stopping_during_a_claim_requeues_the_claimed_job(sessions, monkeypatch):
+    claim = JobService.claim
+    claimed = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_claim(self: JobService):
+        job = await claim(self)
+        if job is not None:
+            claimed.set()
+            await release.wait()
+        return job
+
+    monkeypatch.setattr(JobService, "claim", slow_claim)
+    pool = make_pool(sessions, FakeAIProvider(latency=5.0), workers=1)
+    await pool.start()
+    async with sessions() as session:
+        job = await JobService(session).enqueue("workout", b"photo")
+    pool.notify()
+    await asyncio.wait_for(claimed.wait(), 5)
+    # The job is committed as running but the worker has not seen it yet
+    stopping = asyncio.create_task(pool.stop())
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    release.set()
+    await stopping
+
+    async with sessions() as session:
+        requeued = await JobService(session).get_job(job.id)
+    assert requeued is not None and requeued.status == "queued"
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_job_id_right_away(sessions):
+    # The pool is never started: the request must not wait for the analysis
+    pool = make_pool(sessions, FakeAIProvider(latency=5.0))
+    async def override_get_db():
+        async with sessions() as session:
+            yield session
+
+    with patch.dict(app.dependency_overrides, {get_db: override_get_db, get_job_pool: lambda: pool}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {"file": ("meal.jpg", JPEG_BYTES, "image/jpeg")}
+            submitted = await client.post("/api/jobs/food", files=files, data={"user_id": "42"})
+            polled = await client.get(f"/api/jobs/{submitted.json()['id']}")
+            unknown = await client.post("/api/jobs/dance", files=files)
+
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued"
+    assert polled.json()["user_id"] == 42
+    assert pool.depth == 1
+    assert unknown.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_events_stream_until_the_job_finishes(sessions):
+    pool = make_pool(sessions, FakeAIProvider(latency=0.2), workers=1)
+    async def override_get_db():
+        async with sessions() as session:
+            yield session
+
+    await pool.start()
+    try:
+        with patch.dict(app.dependency_overrides, {get_db: override_get_db, get_job_pool: lambda: pool}):
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                files = {"file": ("scale.jpg", JPEG_BYTES, "image/jpeg")}
+                job_id = (await client.post("/api/jobs/health", files=files)).json()["id"]
+                events = await client.get(f"/api/jobs/{job_id}/events")
+    finally:
+        await pool.stop()
+
+    statuses = [line for line in events.text.splitlines() if line.startswith("data:")]
+    assert '"status":"done"' in statuses[-1]
+    assert len(statuses) >= 2
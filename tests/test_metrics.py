@@ -0,0 +1,107 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.ai_base import AIRateLimitError
+from app.core.ai_instrument import InstrumentedAIProvider, record_usage
+from app.core.ai_schema import parse_failures
+from app.core.metrics import MetricsRegistry, stats_collector
+from app.main import app
+from tests.fakes import FakeAIProvider
+
+
+class MeteredProvider(FakeAIProvider):
+    """Reports token usage the way the real providers do after each response"""
+
+    async def analyze_food_image(self, image_bytes: bytes):
+        record_usage(1000, 200)
+        # A repair request adds to the same call's total
+        record_usage(100, 50)
+        return await super().analyze_food_image(image_bytes)
+
+    async def chat_stream(self, user_message: str, context: str | None = None):
+        yield "Hello"
+        yield " there"
+        record_usage(30, 5)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), labels=("task",))
+
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, task="food")
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{task="food",le="0.1"} 2.0' in text
+    assert 'latency_seconds_bucket{task="food",le="1.0"} 3.0' in text
+    assert 'latency_seconds_bucket{task="food",le="+Inf"} 4.0' in text
+    assert 'latency_seconds_count{task="food"} 4.0' in text
+    assert 'latency_seconds_sum{task="food"} 5.65' in text
+
+
+def test_stats_collector_exports_numeric_stats_as_gauges():
+    registry = MetricsRegistry()
+    registry.add_collector(
+        stats_collector("ai_cache", lambda: {"memory_hits": 3, "circuits": ["closed"]}, {"model": "m"})
+    )
+
+    text = registry.render()
+
+    assert '# TYPE ai_cache_memory_hits gauge' in text
+    assert 'ai_cache_memory_hits{model="m"} 3.0' in text
+    assert "circuits" not in text
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_records_latency_tokens_and_cost():
+    registry = MetricsRegistry()
+    provider = MeteredProvider(model_name="gpt-4o")
+    ai = InstrumentedAIProvider(provider, registry)
+
+    await ai.analyze_food_image(b"x" * 2048)
+
+    labels = {"task": "food", "model": "gpt-4o"}
+    assert ai.requests.value(outcome="ok", **labels) == 1
+    assert ai.latency.count(**labels) == 1
+    assert ai.tokens.value(direction="input", **labels) == 1100
+    assert ai.tokens.value(direction="output", **labels) == 250
+    assert ai.cost.value(**labels) == pytest.approx((1100 * 2.50 + 250 * 10.00) / 1_000_000)
+    assert ai.image_bytes.sum(**labels) == 2048
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_labels_errors_by_class():
+    registry = MetricsRegistry()
+    ai = InstrumentedAIProvider(FakeAIProvider(error=AIRateLimitError("busy")), registry)
+
+    with pytest.raises(AIRateLimitError):
+        await ai.chat("hi")
+
+    assert ai.requests.value(task="chat", model="fake-model", outcome="AIRateLimitError") == 1
+    assert ai.latency.count(task="chat", model="fake-model") == 1
+
+
+@pytest.mark.asyncio
+async def test_instrumented_stream_records_first_chunk_and_usage():
+    registry = MetricsRegistry()
+    ai = InstrumentedAIProvider(MeteredProvider(), registry)
+
+    chunks = [chunk async for chunk in ai.chat_stream("hi")]
+
+    assert chunks == ["Hello", " there"]
+    assert ai.first_chunk.count(task="chat", model="fake-model") == 1
+    assert ai.tokens.value(task="chat", model="fake-model", direction="input") == 30
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_parse_failures(monkeypatch):
+    monkeypatch.setitem(parse_failures, "food", 2)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'ai_parse_failures_total{task="food"} 2.0' in response.text
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.ai import get_ai
+from app.core.ai_base import AIUnavailableError
+from app.db.database import get_db
+from app.main import app
+from app.services.meal_service import MealService
+from app.services.nutrition_service import NutritionService
+from app.services.nutrition_table import FoodItem, NutritionTable, get_nutrition_table, parse_meal_text
+from tests.fakes import FakeAIProvider
+
+
+def test_parse_meal_text_reads_quantities_and_units():
+    items = parse_meal_text("2 eggs, гречка 200г та кефір 0,5 л + coffee")
+
+    assert [(item.name, item.quantity, item.unit_grams) for item in items] == [
+        ("eggs", 2.0, None),
+        ("гречка", 200.0, 1),
+        ("кефір", 0.5, 1000),
+        ("coffee", None, None),
+    ]
+
+
+def matched(table: NutritionTable, query: str) -> str | None:
+    food = table.lookup(query)
+    return food.name if food else None
+
+
+def test_lookup_matches_names_aliases_prefixes_and_typos():
+    table = get_nutrition_table()
+
+    assert matched(table, "Banana") == "banana"
+    assert matched(table, "яйця") == "egg"
+    assert matched(table, "buckw") == "buckwheat"
+    assert matched(table, "chiken breast") == "chicken breast"
+    assert matched(table, "quinoa") is None
+    # Sharing a word with a table food is not a match
+    assert matched(table, "chicken soup") is None
+    assert matched(table, "apple pie") is None
+
+
+def test_fuzzy_lookup_prefers_the_closest_name():
+    table = NutritionTable([
+        (FoodItem("rice", 130, 2.7, 28.2, 0.3, 180), []),
+        (FoodItem("rice pudding", 120, 3, 20, 3, 150), []),
+        (FoodItem("rice pudding with raisins", 130, 3, 22, 3, 150), []),
+    ])
+
+    assert matched(table, "rice puding") == "rice pudding"
+    assert matched(table, "rice puding with raisins") == "rice pudding with raisins"
+    assert matched(table, "porridge") is None
+
+
+@pytest.mark.asyncio
+async def test_known_foods_are_logged_without_the_model(test_db_with_tables):
+    fake = FakeAIProvider()
+
+    meal, analysis = await NutritionService(test_db_with_tables, fake).log_meal_text(42, "2 eggs, 200 g buckwheat")
+
+    assert sum(fake.calls.values()) == 0
+    assert not analysis.used_model
+    # 2 x 50 g egg at 143 kcal/100 g plus 200 g buckwheat at 92 kcal/100 g
+    assert meal.calories == 327
+    assert meal.macros == {"protein": 19, "carbs": 40, "fat": 11}
+    assert meal.description == "egg 100 g, buckwheat 200 g"
+    assert (await MealService(test_db_with_tables).get_user_meals(42))[0].id == meal.id
+
+
+@pytest.mark.asyncio
+async def test_only_unresolved_items_go_to_the_model(test_db_with_tables):
+    fake = FakeAIProvider()
+
+    analysis = await NutritionService(test_db_with_tables, fake).analyze_text("banana, grandma's quinoa casserole")
+
+    assert fake.calls["food_text"] == 1
+    assert analysis.used_model
+    assert [item.text for item in analysis.unresolved] == ["grandma's quinoa casserole"]
+    # 120 g banana (107 kcal) plus the fake's 250 kcal estimate
+    assert analysis.result["calories"] == 357
+    assert analysis.result["description"] == "banana 120 g, grandma's quinoa casserole"
+
+
+@pytest.mark.asyncio
+async def test_partial_name_matches_are_estimated_by_the_model(test_db_with_tables):
+    fake = FakeAIProvider()
+
+    analysis = await NutritionService(test_db_with_tables, fake).analyze_text("apple pie, banana")
+
+    assert fake.calls["food_text"] == 1
+    assert [entry.food.name for entry in analysis.resolved] == ["banana"]
+    assert [item.text for item in analysis.unresolved] == ["apple pie"]
+
+
+@pytest.mark.asyncio
+async def test_unavailable_model_logs_what_the_table_resolved(test_db_with_tables):
+    down = FakeAIProvider(error=AIUnavailableError("circuit open", retry_after=30))
+    service = NutritionService(test_db_with_tables, down)
+
+    analysis = await service.analyze_text("banana, grandma's quinoa casserole")
+    with pytest.raises(AIUnavailableError):
+        await service.analyze_text("grandma's quinoa casserole")
+
+    assert not analysis.used_model
+    assert analysis.result["calories"] == 107
+    assert analysis.result["description"] == "banana 120 g, grandma's quinoa casserole"
+
+
+@pytest.mark.asyncio
+async def test_meal_text_endpoint(test_db_with_tables):
+    fake = FakeAIProvider()
+    async def override_get_db():
+        yield test_db_with_tables
+
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: fake, get_db: override_get_db}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/meals/text", json={"user_id": 42, "text": "oatmeal and coffee"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["matched"] == ["oatmeal", "coffee"]
+    assert body["estimated"] == []
+    assert body["calories"] == 175
@@ -0,0 +1,103 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.db.database import get_db
+from app.main import app
+from app.services.health_service import HealthService
+from app.services.meal_service import MealService
+from app.services.pagination import Cursor, InvalidCursorError
+from app.services.types import MealRowData
+from app.services.workout_service import WorkoutService
+
+
+async def walk(session, path: str, limit: int) -> tuple[list[int], int]:
+    """Follows X-Next-Cursor to the last page; returns the ids seen and the page count"""
+
+    async def _get_db():
+        yield session
+
+    ids: list[int] = []
+    pages = 0
+    params: dict[str, str | int] = {"limit": limit}
+    with patch.dict(app.dependency_overrides, {get_db: _get_db}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # A cursor that does not advance would page forever
+            while pages < 20:
+                response = await client.get(path, params=params)
+                assert response.status_code == 200
+                pages += 1
+                ids += [item["id"] for item in response.json()]
+                cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                if cursor is None:
+                    return ids, pages
+                params = {"limit": limit, "cursor": cursor}
+    raise AssertionError(f"{path} did not reach a last page")
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    cursor = Cursor(datetime(2026, 3, 4, 5, 6, 7, 890), 42)
+
+    assert Cursor.decode(cursor.encode()) == cursor
+    for token in ("", "not a cursor", Cursor(datetime(2026, 1, 1), 1).encode()[:-3], "WzFd"):
+        with pytest.raises(InvalidCursorError):
+            Cursor.decode(token)
+
+
+@pytest.mark.asyncio
+async def test_meal_pages_cover_every_row_once_in_order(test_db_with_tables):
+    service = MealService(test_db_with_tables)
+    # Server-default timestamps (whole seconds) mixed with bound ones that
+    # tie on the same instant, and another user's rows in between
+    for index in range(3):
+        await service.create_meal(user_id=1, description=f"Now {index}", calories=100, macros={})
+    tied = datetime(2026, 1, 1, 12, 0, 0)
+    rows: list[MealRowData] = [
+        {"user_id": 1, "description": f"Tied {index}", "calories": 100, "macros": {}, "timestamp": tied}
+        for index in range(4)
+    ]
+    rows.append({"user_id": 2, "description": "Other", "calories": 100, "macros": {}, "timestamp": tied})
+    rows.append({"user_id": 1, "description": "Old", "calories": 100, "macros": {}, "timestamp": datetime(2025, 6, 1)})
+    await service.create_meals(rows)
+    newest_first = [meal.id for meal in await service.get_user_meals(1, limit=100)]
+
+    ids, pages = await walk(test_db_with_tables, "/api/meals/1", limit=3)
+
+    assert len(newest_first) == 8
+    assert ids == newest_first
+    assert pages == 3
+
+
+@pytest.mark.asyncio
+async def test_workout_and_health_pages(test_db_with_tables):
+    await WorkoutService(test_db_with_tables).create_workouts(
+        [{"user_id": 1, "description": f"Run {index}", "timestamp": datetime(2026, 1, 1 + index)} for index in range(5)]
+    )
+    await HealthService(test_db_with_tables).log_health_entries(
+        [{"user_id": 1, "category": "sleep", "timestamp": datetime(2026, 1, 1 + index)} for index in range(4)]
+    )
+
+    workout_ids, workout_pages = await walk(test_db_with_tables, "/api/workouts/1", limit=2)
+    health_ids, health_pages = await walk(test_db_with_tables, "/api/health/1", limit=4)
+
+    assert workout_ids == [5, 4, 3, 2, 1]
+    assert workout_pages == 3
+    # An exact last page has no cursor
+    assert health_ids == [4, 3, 2, 1]
+    assert health_pages == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_bad_cursor_and_oversized_limit():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        bad_cursor = await client.get("/api/meals/1", params={"cursor": "not a cursor"})
+        too_many = await client.get("/api/workouts/1", params={"limit": settings.PAGE_SIZE_MAX + 1})
+
+    assert bad_cursor.status_code == 400
+    assert too_many.status_code == 422
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.db.models import Meal
+from app.services.health_service import HealthService
+from app.services.meal_service import MealService
+from app.services.photo_service import PhotoService
+
+HASH = 0x0F0F_F0F0_1234_5678
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_reuses_the_logged_analysis(test_db_with_tables):
+    await MealService(test_db_with_tables).create_meal(
+        42, "Oatmeal", 350.0, {"protein": 12, "carbs": 60, "fat": 7}, image_hash=HASH
+    )
+
+    match = await PhotoService(test_db_with_tables).find_duplicate(42, HASH ^ 0b101)
+
+    assert match is not None
+    assert match.distance == 2
+    assert match.analysis["type"] == "food"
+    assert match.analysis["food"] == {
+        "description": "Oatmeal",
+        "calories": 350.0,
+        "macros": {"protein": 12, "carbs": 60, "fat": 7},
+    }
+
+
+@pytest.mark.asyncio
+async def test_closest_photo_wins_across_meals_and_health_logs(test_db_with_tables):
+    await MealService(test_db_with_tables).create_meal(42, "Salad", 200.0, {"protein": 5, "carbs": 10, "fat": 12}, image_hash=HASH ^ 0b111)
+    await HealthService(test_db_with_tables).log_health_entry(
+        42, "weight", "Scale", data={"weight": 80.0}, image_hash=HASH ^ 0b1
+    )
+
+    match = await PhotoService(test_db_with_tables).find_duplicate(42, HASH)
+
+    assert match is not None
+    assert match.analysis["type"] == "health"
+    assert match.analysis["health"] == {"category": "weight", "data": {"weight": 80.0}, "description": "Scale"}
+
+
+@pytest.mark.asyncio
+async def test_distant_old_or_foreign_photos_do_not_match(test_db_with_tables):
+    meals = MealService(test_db_with_tables)
+    await meals.create_meal(42, "Pizza", 800.0, {"protein": 30, "carbs": 90, "fat": 35}, image_hash=~HASH)
+    await meals.create_meal(7, "Oatmeal", 350.0, {"protein": 12, "carbs": 60, "fat": 7}, image_hash=HASH)
+    old = await meals.create_meal(42, "Oatmeal", 350.0, {"protein": 12, "carbs": 60, "fat": 7}, image_hash=HASH)
+    await test_db_with_tables.execute(
+        update(Meal).where(Meal.id == old.id).values(timestamp=datetime.now(timezone.utc) - timedelta(days=3))
+    )
+    await test_db_with_tables.commit()
+
+    assert await PhotoService(test_db_with_tables).find_duplicate(42, HASH) is None
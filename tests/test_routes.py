@@ -1,11 +1,15 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
+from app.core.ai import get_ai
+
+# Only the JPEG signature matters: the AI provider is mocked
+JPEG_BYTES = b"\xff\xd8\xff\xe0fake_bytes"
 
 @pytest.mark.asyncio
 async def test_classify_photo_endpoint():
     # Mock the AI provider
-    from unittest.mock import AsyncMock, patch
+    from unittest.mock import AsyncMock, MagicMock, patch
     
     # Create a mock result
     mock_result = {
@@ -14,15 +18,117 @@ async def test_classify_photo_endpoint():
         "reasoning": "Looks like a salad"
     }
 
-    # Patch the ai_client instance in the routes module
-    with patch("app.api.routes.ai_client") as mock_ai:
+    # Override the AI client dependency of the routes
+    mock_ai = MagicMock()
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: mock_ai}):
         mock_ai.classify_photo = AsyncMock(return_value=mock_result)
         
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as client:
             # Mocking file upload
-            files = {'file': ('test.jpg', b'fake_bytes', 'image/jpeg')}
+            files = {'file': ('test.jpg', JPEG_BYTES, 'image/jpeg')}
             response = await client.post("/api/analyze/classify", files=files)
         
         assert response.status_code == 200
         assert response.json()["type"] == "food"
+
+@pytest.mark.asyncio
+async def test_analyze_auto_endpoint():
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    mock_result = {
+        "type": "food",
+        "confidence": "high",
+        "reasoning": "Looks like a salad",
+        "food": {"description": "Salad", "calories": 200.0, "macros": {"protein": 5, "carbs": 10, "fat": 12}},
+        "workout": None,
+        "health": None,
+    }
+
+    mock_ai = MagicMock()
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: mock_ai}):
+        mock_ai.classify_and_analyze = AsyncMock(return_value=mock_result)
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {'file': ('test.jpg', JPEG_BYTES, 'image/jpeg')}
+            response = await client.post("/api/analyze/auto", files=files)
+
+        assert response.status_code == 200
+        assert response.json()["food"]["calories"] == 200.0
+        mock_ai.classify_and_analyze.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_unparseable_analysis_returns_502():
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from app.core.ai_schema import AIResponseParseError
+
+    mock_ai = MagicMock()
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: mock_ai}):
+        mock_ai.analyze_food_image = AsyncMock(side_effect=AIResponseParseError("food", "???", "not json"))
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {'file': ('test.jpg', JPEG_BYTES, 'image/jpeg')}
+            response = await client.post("/api/analyze/food", files=files)
+
+        assert response.status_code == 502
+
+@pytest.mark.asyncio
+async def test_rate_limited_analysis_returns_429():
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from app.core.ai_base import AIRateLimitError
+
+    mock_ai = MagicMock()
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: mock_ai}):
+        mock_ai.classify_photo = AsyncMock(side_effect=AIRateLimitError("429", retry_after=7))
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {'file': ('test.jpg', JPEG_BYTES, 'image/jpeg')}
+            response = await client.post("/api/analyze/classify", files=files)
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+
+@pytest.mark.asyncio
+async def test_timed_out_analysis_returns_503():
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from app.core.ai_base import AITimeoutError
+
+    mock_ai = MagicMock()
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: mock_ai}):
+        mock_ai.analyze_food_image = AsyncMock(side_effect=AITimeoutError("deadline", retry_after=12))
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {'file': ('test.jpg', JPEG_BYTES, 'image/jpeg')}
+            response = await client.post("/api/analyze/food", files=files)
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "12"
+
+@pytest.mark.asyncio
+async def test_failing_provider_returns_503_before_its_circuit_opens(monkeypatch):
+    from unittest.mock import patch
+    from app.core.ai import build_ai_client
+    from app.core.ai_base import AITransientError
+    from app.core.config import settings
+    from tests.fakes import FakeAIProvider
+
+    monkeypatch.setattr(settings, "AI_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "AI_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "IMAGE_PREPROCESS_ENABLED", False)
+    ai = build_ai_client(FakeAIProvider(error=AITransientError("502 from provider")))
+
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: ai}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {'file': ('test.jpg', JPEG_BYTES, 'image/jpeg')}
+            responses = [
+                await client.post("/api/analyze/food", files=files)
+                for _ in range(settings.AI_CIRCUIT_FAILURE_THRESHOLD + 1)
+            ]
+
+    assert [response.status_code for response in responses] == [503] * len(responses)
+    assert all(int(response.headers["Retry-After"]) >= 1 for response in responses)
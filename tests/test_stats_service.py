@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
 from app.services.stats_service import StatsService
 
 @pytest.mark.asyncio
@@ -43,3 +43,52 @@ async def test_get_history():
     
     # Let's just create a basic structure test
     assert hasattr(service, "get_history")
+
+
+@pytest.mark.asyncio
+async def test_get_history_matches_daily_summaries(test_db_with_tables, test_db_engine):
+    from sqlalchemy import event
+
+    from app.db.models import Meal, Workout
+
+    today = datetime.now().date()
+
+    def at(days_ago: int, moment: time) -> datetime:
+        return datetime.combine(today - timedelta(days=days_ago), moment)
+
+    test_db_with_tables.add_all([
+        Meal(user_id=1, timestamp=at(0, time(8, 30)), calories=420.5, macros={}),
+        Meal(user_id=1, timestamp=at(0, time(19)), calories=310.7, macros={}),
+        # Both ends of a day, and a meal without calories
+        Meal(user_id=1, timestamp=at(2, time.min), calories=100, macros={}),
+        Meal(user_id=1, timestamp=at(2, time.max), calories=None, macros={}),
+        Meal(user_id=1, timestamp=at(5, time(12)), calories=650, macros={}),
+        # Outside the range, and another user's meal
+        Meal(user_id=1, timestamp=at(7, time(12)), calories=999, macros={}),
+        Meal(user_id=2, timestamp=at(0, time(12)), calories=777, macros={}),
+        Workout(user_id=1, timestamp=at(0, time(7)), description="Run", duration_minutes=30),
+        Workout(user_id=1, timestamp=at(0, time(18)), description="Lift", duration_minutes=45),
+        Workout(user_id=1, timestamp=at(3, time(23, 59, 59)), description="Walk", duration_minutes=None),
+        Workout(user_id=1, timestamp=at(6, time.min), description="Swim", duration_minutes=20),
+        Workout(user_id=2, timestamp=at(3, time(12)), description="Other", duration_minutes=60),
+    ])
+    await test_db_with_tables.commit()
+    service = StatsService(test_db_with_tables)
+    expected = [await service.get_daily_summary(1, today - timedelta(days=i)) for i in range(7)]
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_db_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        history = await service.get_history(1, days=7)
+    finally:
+        event.remove(test_db_engine.sync_engine, "before_cursor_execute", record)
+
+    assert history == expected
+    assert history[0] == {"date": today.isoformat(), "calories": 731, "workout_count": 2, "workout_duration": 75}
+    assert history[4]["calories"] == 0
+    assert len(statements) == 2
+    assert await service.get_history(1, days=0) == []
@@ -0,0 +1,138 @@
+import hashlib
+import io
+import pickle
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+
+from app.api.uploads import MULTIPART_OVERHEAD_BYTES, UPLOAD_CHUNK_BYTES
+from app.core.ai import build_ai_client, get_ai
+from app.core.ai_base import DelegatingAIProvider
+from app.core.ai_cache import image_digest
+from app.core.ai_preprocess import PreprocessingAIProvider
+from app.core.config import settings
+from app.core.hashed_image import HashedImage
+from app.main import app
+from tests.fakes import FakeAIProvider
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 1024
+
+
+async def post_food(data: bytes, **kwargs) -> tuple[int, MagicMock]:
+    mock_ai = MagicMock()
+    mock_ai.analyze_food_image = AsyncMock(
+        return_value={"description": "Soup", "calories": 200.0, "macros": {"protein": 5, "carbs": 20, "fat": 8}}
+    )
+    with patch.dict(app.dependency_overrides, {get_ai: lambda: mock_ai}):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/analyze/food", files={"file": ("meal.jpg", data, "image/jpeg")}, **kwargs
+            )
+    return response.status_code, mock_ai
+
+
+@pytest.mark.asyncio
+async def test_upload_reaches_the_model_with_its_digest():
+    status, mock_ai = await post_food(JPEG)
+
+    image = mock_ai.analyze_food_image.await_args.args[0]
+    assert status == 200
+    assert isinstance(image, HashedImage)
+    assert image == JPEG
+    assert image_digest(image) == hashlib.sha256(JPEG).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_non_image_upload_is_rejected():
+    status, mock_ai = await post_food(b"%PDF-1.7 not a photo")
+
+    assert status == 415
+    mock_ai.analyze_food_image.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_upload_over_the_cap_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 64 * 1024)
+
+    status, mock_ai = await post_food(JPEG)
+
+    assert status == 413
+    mock_ai.analyze_food_image.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_declared_oversized_body_is_refused_before_it_is_read():
+    async def body():
+        yield b"never parsed"
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/analyze/food",
+            content=body(),
+            headers={"Content-Length": str(settings.UPLOAD_MAX_BYTES * 2), "Content-Type": "multipart/form-data"},
+        )
+
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_chunked_oversized_body_is_refused_while_it_streams():
+    chunk = b"\0" * UPLOAD_CHUNK_BYTES
+    sent = 0
+
+    async def body():
+        nonlocal sent
+        head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n\r\n' + JPEG[:4]
+        yield head
+        while sent < settings.UPLOAD_MAX_BYTES * 3:
+            sent += len(chunk)
+            yield chunk
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/analyze/food", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+        )
+
+    assert response.status_code == 413
+    assert sent <= settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES + len(chunk)
+
+
+def test_hashed_image_survives_pickling():
+    image = HashedImage(JPEG, hashlib.sha256(JPEG).hexdigest())
+
+    restored = pickle.loads(pickle.dumps(image))
+
+    assert isinstance(restored, HashedImage)
+    assert restored == JPEG
+    assert restored.sha256 == image.sha256
+
+
+@pytest.mark.asyncio
+async def test_uploads_go_through_the_preprocessing_process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_PREPROCESS_ENABLED", True)
+    monkeypatch.setattr(settings, "IMAGE_PREPROCESS_WORKERS", 1)
+    monkeypatch.setattr(settings, "AI_CACHE_ENABLED", False)
+    ai = build_ai_client(FakeAIProvider())
+    layer = ai
+    while not isinstance(layer, PreprocessingAIProvider):
+        assert isinstance(layer, DelegatingAIProvider)
+        layer = layer.inner
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), (200, 80, 40)).save(buffer, format="JPEG")
+
+    try:
+        with patch.dict(app.dependency_overrides, {get_ai: lambda: ai}):
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                for path in ("/api/analyze/food", "/api/analyze/auto"):
+                    response = await client.post(
+                        path, files={"file": ("meal.jpg", buffer.getvalue(), "image/jpeg")}
+                    )
+                    assert response.status_code == 200, response.text
+    finally:
+        layer.preprocessor.shutdown()